@@ -0,0 +1,233 @@
+"""
+Amortization Engine for EMI Risk Assessment
+Vectorized NumPy loan math shared by the what-if, prepayment and lender APIs
+"""
+
+from typing import Dict, List
+import numpy as np
+
+# Scenario names in the order they are reported
+SCENARIOS = ('no_action', 'reduce_tenure', 'reduce_emi', 'partial_prepayment',
+             'balance_transfer', 'balance_transfer_prepayment')
+
+SCENARIO_LABELS = {
+    'no_action': 'Continue Current Loan',
+    'reduce_tenure': 'Prepayment (Reduce Tenure)',
+    'reduce_emi': 'Prepayment (Reduce EMI)',
+    'partial_prepayment': 'Partial Prepayment',
+    'balance_transfer': 'Balance Transfer',
+    'balance_transfer_prepayment': 'Balance Transfer + Prepayment',
+}
+
+
+def calculate_emi(principal, annual_rate, tenure_months) -> np.ndarray:
+    """Closed-form EMI for any broadcastable mix of principals, annual rates (% p.a.) and tenures (months)"""
+    principal = np.asarray(principal, dtype=float)
+    tenure_months = np.asarray(tenure_months, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / (12 * 100)
+
+    growth = np.power(1 + monthly_rate, tenure_months)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = principal * monthly_rate * growth / (growth - 1)
+        flat = principal / tenure_months
+    # Zero-rate loans repay the principal in equal instalments
+    return np.where(monthly_rate == 0, flat, emi)
+
+
+def outstanding_balance(principal, annual_rate, emi, months_paid) -> np.ndarray:
+    """Balance left after ``months_paid`` instalments of ``emi`` (never below zero)"""
+    principal = np.asarray(principal, dtype=float)
+    emi = np.asarray(emi, dtype=float)
+    months_paid = np.asarray(months_paid, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / (12 * 100)
+
+    growth = np.power(1 + monthly_rate, months_paid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = principal * growth - emi * (growth - 1) / monthly_rate
+    balance = np.where(monthly_rate == 0, principal - emi * months_paid, balance)
+    return np.maximum(balance, 0.0)
+
+
+def tenure_for_emi(principal, annual_rate, emi) -> np.ndarray:
+    """Months needed to repay ``principal`` with a fixed ``emi``; inf when the EMI never covers interest"""
+    principal = np.asarray(principal, dtype=float)
+    emi = np.asarray(emi, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / (12 * 100)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coverage = 1 - principal * monthly_rate / emi
+        months = -np.log(coverage) / np.log1p(monthly_rate)
+        months = np.where(coverage > 0, months, np.inf)
+        months = np.where(monthly_rate == 0, principal / emi, months)
+    return np.where(principal <= 0, 0.0, months)
+
+
+def amortization_schedule(principal, annual_rate, tenure_months, emi=None, max_horizon: int = None,
+                          max_cells: int = None) -> Dict[str, np.ndarray]:
+    """Month-by-month schedules for many loans at once, as (loans, months) arrays padded with zeros
+
+    Raises ValueError before allocating anything when the longest schedule exceeds ``max_horizon``
+    months or loans x months exceeds ``max_cells``.
+    """
+    principal = np.atleast_1d(np.asarray(principal, dtype=float))
+    annual_rate = np.atleast_1d(np.asarray(annual_rate, dtype=float))
+    tenure_months = np.atleast_1d(np.asarray(tenure_months, dtype=float))
+    principal, annual_rate, tenure_months = np.broadcast_arrays(principal, annual_rate, tenure_months)
+    if emi is None:
+        emi = calculate_emi(principal, annual_rate, tenure_months)
+    emi = np.broadcast_to(np.asarray(emi, dtype=float), principal.shape)
+
+    # Schedules run until the loan closes; an EMI that never covers interest stops at the nominal tenure
+    closing_month = tenure_for_emi(principal, annual_rate, emi)
+    closing_month = np.where(np.isfinite(closing_month), closing_month, tenure_months)
+    longest = float(np.max(closing_month, initial=0))
+    if max_horizon is not None and longest > max_horizon:
+        raise ValueError(f"schedule runs {longest:.0f} months, over the limit of {max_horizon}")
+    horizon = int(np.ceil(longest - 1e-9))
+    if max_cells is not None and principal.size * horizon > max_cells:
+        raise ValueError(f"{principal.size} loans x {horizon} months exceeds the limit of {max_cells} schedule cells")
+    months = np.arange(1, horizon + 1, dtype=float)[None, :]
+    monthly_rate = (annual_rate / (12 * 100))[:, None]
+
+    # Closed-form opening balance for every month, then the interest / principal split
+    opening = outstanding_balance(principal[:, None], annual_rate[:, None], emi[:, None], months - 1)
+    interest = opening * monthly_rate
+    payment = np.minimum(emi[:, None], opening + interest)
+    principal_paid = payment - interest
+    closing = np.maximum(opening - principal_paid, 0.0)
+
+    return {
+        'month': months[0].astype(int),
+        'emi': emi,
+        'payment': payment,
+        'interest': interest,
+        'principal': principal_paid,
+        'balance': closing,
+        'total_interest': interest.sum(axis=1),
+        'total_payment': payment.sum(axis=1),
+        'months_to_close': (payment > 0).sum(axis=1),
+    }
+
+
+def evaluate_scenarios(principal, annual_rate, tenure_months, current_emi=None, prepayment_amount=0.0,
+                       prepayment_month=0, transfer_rate=None, transfer_fee=0.0,
+                       partial_fraction: float = 0.5) -> Dict[str, Dict[str, np.ndarray]]:
+    """Evaluate every prepayment / balance-transfer scenario for any number of loans in one vectorized pass
+
+    All loan arguments broadcast against each other. ``prepayment_month`` is the number of regular
+    instalments paid before the lump sum (or transfer); 0 means immediately.
+    """
+    principal, annual_rate, tenure_months, prepayment_amount, prepayment_month, transfer_fee = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (principal, annual_rate, tenure_months, prepayment_amount,
+                                               prepayment_month, transfer_fee)))
+    if current_emi is None:
+        current_emi = calculate_emi(principal, annual_rate, tenure_months)
+    current_emi = np.broadcast_to(np.asarray(current_emi, dtype=float), principal.shape)
+    transfer_rate = annual_rate if transfer_rate is None else np.broadcast_to(
+        np.asarray(transfer_rate, dtype=float), principal.shape)
+
+    k = np.minimum(prepayment_month, tenure_months)
+    remaining = tenure_months - k
+    balance_k = outstanding_balance(principal, annual_rate, current_emi, k)
+    paid_before = current_emi * k
+
+    # Baseline: keep paying the current EMI until the loan closes
+    base_tenure = tenure_for_emi(principal, annual_rate, current_emi)
+    base_total = current_emi * base_tenure
+
+    def summarise(emi, tenure, total_payment, outlay):
+        total_interest = total_payment - principal
+        return {
+            'emi': emi,
+            'tenure_months': tenure,
+            'total_payment': total_payment,
+            'total_interest': total_interest,
+            'interest_saved': base_total - total_payment,
+            'tenure_reduction_months': base_tenure - tenure,
+            'emi_reduction': current_emi - emi,
+            'cash_outlay': outlay,
+        }
+
+    prepaid = np.minimum(prepayment_amount, balance_k)
+    after_prepay = balance_k - prepaid
+
+    # Lump sum, keep the EMI and finish early
+    tenure_rt = k + tenure_for_emi(after_prepay, annual_rate, current_emi)
+    total_rt = paid_before + prepaid + current_emi * (tenure_rt - k)
+
+    # Lump sum, keep the tenure and lower the EMI
+    emi_re = np.where(remaining > 0, calculate_emi(after_prepay, annual_rate, np.maximum(remaining, 1)), 0.0)
+    total_re = paid_before + prepaid + emi_re * remaining
+
+    # Part of the lump sum only, lowering the EMI
+    partial = prepaid * partial_fraction
+    emi_pp = np.where(remaining > 0, calculate_emi(balance_k - partial, annual_rate, np.maximum(remaining, 1)), 0.0)
+    total_pp = paid_before + partial + emi_pp * remaining
+
+    # Move the outstanding balance to a new lender at month k for the remaining tenure
+    emi_bt = np.where(remaining > 0, calculate_emi(balance_k, transfer_rate, np.maximum(remaining, 1)), 0.0)
+    total_bt = paid_before + transfer_fee + emi_bt * remaining
+
+    # Transfer, then prepay the lump sum into the new loan at the same month
+    emi_btp = np.where(remaining > 0, calculate_emi(after_prepay, transfer_rate, np.maximum(remaining, 1)), 0.0)
+    total_btp = paid_before + transfer_fee + prepaid + emi_btp * remaining
+
+    zero = np.zeros_like(principal)
+    return {
+        'no_action': summarise(current_emi, base_tenure, base_total, zero),
+        'reduce_tenure': summarise(current_emi, tenure_rt, total_rt, prepaid),
+        'reduce_emi': summarise(emi_re, tenure_months, total_re, prepaid),
+        'partial_prepayment': summarise(emi_pp, tenure_months, total_pp, partial),
+        'balance_transfer': summarise(emi_bt, tenure_months, total_bt, transfer_fee),
+        'balance_transfer_prepayment': summarise(emi_btp, tenure_months, total_btp, transfer_fee + prepaid),
+    }
+
+
+def strategy_comparison(principal: float, annual_rate: float, tenure_months: float, current_emi=None,
+                        prepayment_amount: float = 0.0, prepayment_month: int = 0, transfer_rate=None,
+                        transfer_fee: float = 0.0) -> List[Dict]:
+    """Rows in the layout of models/strategy_comparison.csv for a single loan profile"""
+    scenarios = evaluate_scenarios(principal, annual_rate, tenure_months, current_emi, prepayment_amount,
+                                   prepayment_month, transfer_rate, transfer_fee)
+    new_rate = annual_rate if transfer_rate is None else transfer_rate
+    prepayment_month = int(prepayment_month)
+    descriptions = {
+        'no_action': 'No changes to current loan structure',
+        'reduce_tenure': f"Prepay ₹{prepayment_amount:,.0f} (Month {prepayment_month}) and keep the EMI",
+        'reduce_emi': f"Prepay ₹{prepayment_amount:,.0f} (Month {prepayment_month}) and lower the EMI",
+        'partial_prepayment': f"Prepay ₹{prepayment_amount * 0.5:,.0f} (Month {prepayment_month}) and lower the EMI",
+        'balance_transfer': f"Transfer to {new_rate}% rate with ₹{transfer_fee:,.0f} fee",
+        'balance_transfer_prepayment': f"BT to {new_rate}% + prepay ₹{prepayment_amount:,.0f} (Month {prepayment_month})",
+    }
+
+    rows = []
+    for name in SCENARIOS:
+        scenario = scenarios[name]
+        rows.append({
+            'Strategy': SCENARIO_LABELS[name],
+            'EMI': float(scenario['emi']),
+            'Total_Cost': float(scenario['total_payment']),
+            'Savings': float(scenario['interest_saved']),
+            'Description': descriptions[name]
+        })
+    return sorted(rows, key=lambda row: row['Total_Cost'])
+
+
+def prepayment_sensitivity(principal: float, annual_rate: float, tenure_months: float, amounts,
+                           current_emi=None, prepayment_month: int = 0) -> List[Dict]:
+    """Rows in the layout of models/prepayment_sensitivity_analysis.csv, one per prepayment amount"""
+    amounts = np.asarray(amounts, dtype=float)
+    scenarios = evaluate_scenarios(principal, annual_rate, tenure_months, current_emi,
+                                   prepayment_amount=amounts, prepayment_month=prepayment_month)
+    reduce_emi = scenarios['reduce_emi']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(amounts > 0, reduce_emi['interest_saved'] / amounts * 100, 0.0)
+
+    return [{
+        'Prepayment Amount': f"₹{amount:,.0f}",
+        'Savings': float(saved),
+        'ROI': float(r),
+        'New EMI': float(emi),
+        'EMI Reduction': float(reduction)
+    } for amount, saved, r, emi, reduction in zip(amounts, reduce_emi['interest_saved'], roi,
+                                                  reduce_emi['emi'], reduce_emi['emi_reduction'])]
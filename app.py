@@ -3,134 +3,232 @@ EMI Risk Assessment Flask Web Application
 A modern, responsive web platform for EMI eligibility prediction and financial risk assessment.
 """
 
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
-import pandas as pd
+from flask import (Flask, Response, g, render_template, request, jsonify, flash, redirect, stream_with_context,
+                   url_for)
+import click
 import numpy as np
-import joblib
-import sqlite3
+import threading
+import time
+import atexit
 import json
 import os
-from datetime import datetime
+import csv
+import io
+from db import (ConnectionPool, RECORD_COLUMNS, STATEMENTS, apply_to_summary, decode_cursor, encode_cursor,
+                parse_record_filters, read_summary, rebuild_summary, records_count_query, records_query)
+from prediction_cache import PredictionCache
+from metrics import metrics
+from real_time_manager import get_manager, init_manager
+from model_registry import get_registry
 import logging
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.utils import PlotlyJSONEncoder
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Change this in production
 app.config['JSON_SORT_KEYS'] = False
+app.config['MAX_BATCH_SIZE'] = 100000  # Upper bound on customers per /api/predict/batch request
+app.config['MAX_SWEEP_CELLS'] = 200000  # Upper bound on model-scored cells per /api/whatif/sweep request
+app.config['OPTIMIZER_BUDGET_MS'] = 100  # Default latency budget for /api/prepayment/optimize
+app.config['OPTIMIZER_MAX_CANDIDATES'] = 200000  # Amount x month grid ceiling; longer tenures get a wider month stride
+app.config['MAX_LOAN_TENURE_MONTHS'] = 600  # Longest tenure accepted by the amortization and prepayment endpoints
+app.config['MAX_LOANS_PER_REQUEST'] = 100000  # Upper bound on loans per amortization / prepayment request
+app.config['MAX_SCHEDULE_MONTHS'] = 1200  # Longest month-by-month schedule (a low EMI can run past the tenure)
+app.config['MAX_SCHEDULE_CELLS'] = 1000000  # Upper bound on loans x months per /api/amortization/schedule request
+app.config['BT_CURRENT_RATE'] = 12.0  # Assumed rate (% p.a.) of saved loans when scanning balance transfers
+app.config['DATABASE'] = 'financial_data.db'
+app.config['DB_POOL_SIZE'] = 8  # Pooled SQLite connections shared by request threads
+app.config['RECORDS_COUNT_TTL'] = 60  # Seconds a filtered record count is reused before recounting
+app.config['WRITE_BEHIND'] = os.environ.get('EMI_WRITE_BEHIND', '0') == '1'  # Queue /api/save_record inserts
+app.config['WRITE_BEHIND_MAX_QUEUE'] = 10000
+app.config['WRITE_BEHIND_BATCH_SIZE'] = 500  # Records per group commit
+app.config['WRITE_BEHIND_FLUSH_INTERVAL'] = 0.05  # Seconds before a partial batch is committed
+app.config['DASHBOARD_STREAM_TICK'] = 5.0  # Seconds between dashboard snapshots pushed over SSE
+app.config['DASHBOARD_STREAM_HEARTBEAT'] = 15.0  # Seconds of silence before a heartbeat comment
+app.config['DASHBOARD_STREAM_MAX_CLIENTS'] = 100  # Further clients get 503 and fall back to polling
+app.config['MICRO_BATCH'] = os.environ.get('EMI_MICRO_BATCH', '1') == '1'  # Coalesce concurrent single predictions
+app.config['MICRO_BATCH_MAX_ROWS'] = 32  # Largest coalesced model call
+app.config['MICRO_BATCH_MAX_WAIT_MS'] = 2.0  # Longest a request waits for others to join its batch (under load only)
+app.config['MICRO_BATCH_TIMEOUT'] = 5.0  # Seconds a request waits on its batch before scoring on its own thread
+app.config['ADMIN_TOKEN'] = os.environ.get('EMI_ADMIN_TOKEN')  # Required in X-Admin-Token for /api/admin/* when set
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global variables for models and scalers
-models = {}
-scalers = {}
-label_encoder = None
-feature_names = {}
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-def load_models():
-    """Load trained models and preprocessing objects"""
-    global models, scalers, label_encoder, feature_names
-    
-    try:
-        models['classification'] = joblib.load('models/classification_model.pkl')
-        models['regression'] = joblib.load('models/regression_model.pkl')
-        scalers['classification'] = joblib.load('models/scaler_classification.pkl')
-        scalers['regression'] = joblib.load('models/scaler_regression.pkl')
-        label_encoder = joblib.load('models/label_encoder.pkl')
-        feature_names = joblib.load('models/feature_names.pkl')
-        logger.info("Models loaded successfully")
-        return True
-    except Exception as e:
-        logger.error(f"Error loading models: {str(e)}")
-        return False
+@app.after_request
+def record_request_latency(response):
+    """Per-endpoint latency histogram and status counters (static files are skipped)"""
+    start = g.pop('request_start', None)
+    if start is not None and request.endpoint not in (None, 'static'):
+        metrics.observe('http_request_latency', time.perf_counter() - start, endpoint=request.endpoint)
+        metrics.increment('http_requests', endpoint=request.endpoint, status=f"{response.status_code // 100}xx")
+    return response
+
+def init_app():
+    """Build the real-time manager (models, threads) and the database pool now instead of on first use
+
+    Call it from a gunicorn ``post_worker_init`` hook to warm each worker before it takes traffic.
+    """
+    start = time.perf_counter()
+    manager = init_manager()
+    get_db_pool()
+    logger.info(f"Application initialized in {time.perf_counter() - start:.2f}s")
+    return manager
+
+def csv_response(rows, filename):
+    """Render a list of row dicts as a downloadable CSV response"""
+    buffer = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    return Response(buffer.getvalue(), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+# Loan fields accepted by the amortization APIs, with defaults (None = required or derived)
+LOAN_FIELDS = {
+    'principal': None,
+    'interest_rate': None,
+    'tenure_months': None,
+    'current_emi': None,
+    'prepayment_amount': 0.0,
+    'prepayment_month': 0,
+    'transfer_rate': None,
+    'transfer_fee': 0.0
+}
+
+def parse_loans(data):
+    """Turn one loan object or {"loans": [...]} into column arrays for the amortization engine"""
+    loans = data.get('loans') if isinstance(data.get('loans'), list) else [data]
+    if not loans:
+        raise ValueError('loans must be a non-empty list')
+    if len(loans) > app.config['MAX_LOANS_PER_REQUEST']:
+        raise ValueError(f"Number of loans exceeds limit of {app.config['MAX_LOANS_PER_REQUEST']}")
+
+    columns = {}
+    for field, default in LOAN_FIELDS.items():
+        values = [loan.get(field, default) if isinstance(loan, dict) else None for loan in loans]
+        if field in ('principal', 'interest_rate', 'tenure_months') and any(v is None for v in values):
+            raise ValueError(f'{field} is required for every loan')
+        if field in ('current_emi', 'transfer_rate') and all(v is None for v in values):
+            columns[field] = None
+            continue
+        if any(v is None for v in values):
+            raise ValueError(f'{field} must be given for every loan or for none')
+        columns[field] = np.asarray(values, dtype=float)
+
+    if np.any(columns['tenure_months'] <= 0) or np.any(columns['principal'] <= 0):
+        raise ValueError('principal and tenure_months must be positive')
+    if np.any(columns['tenure_months'] > app.config['MAX_LOAN_TENURE_MONTHS']):
+        raise ValueError(f"tenure_months exceeds limit of {app.config['MAX_LOAN_TENURE_MONTHS']}")
+
+    # The engine takes the rate as annual_rate (% p.a.)
+    columns['annual_rate'] = columns.pop('interest_rate')
+    return columns, isinstance(data.get('loans'), list)
+
+def rounded(values, digits=2):
+    """Round a NumPy array (or scalar) into JSON-friendly floats"""
+    return np.round(np.asarray(values, dtype=float), digits).tolist()
+
+db_pool = None
+db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Shared SQLite connection pool, created on first use"""
+    global db_pool
+    if db_pool is None:
+        with db_pool_lock:
+            if db_pool is None:
+                db_pool = ConnectionPool(app.config['DATABASE'], max_size=app.config['DB_POOL_SIZE'])
+    return db_pool
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('financial_data.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def engineer_features(input_data):
-    """Apply feature engineering to input data"""
-    df = pd.DataFrame([input_data])
-    
-    # Convert string values to appropriate types
-    numeric_columns = ['age', 'monthly_salary', 'years_of_employment', 'family_size', 'dependents',
-                       'monthly_rent', 'school_fees', 'college_fees', 'travel_expenses',
-                       'groceries_utilities', 'other_monthly_expenses', 'current_emi_amount',
-                       'credit_score', 'bank_balance', 'emergency_fund', 'requested_amount',
-                       'requested_tenure']
-    
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    # Financial Ratios
-    df['debt_to_income_ratio'] = np.where(df['monthly_salary'] > 0, 
-                                          (df['current_emi_amount'] / df['monthly_salary']) * 100, 0)
-    
-    df['savings_ratio'] = np.where(df['monthly_salary'] > 0,
-                                   (df['bank_balance'] + df['emergency_fund']) / df['monthly_salary'], 0)
-    
-    df['total_monthly_expenses'] = (df['monthly_rent'] + df['school_fees'] + 
-                                    df['college_fees'] + df['travel_expenses'] +
-                                    df['groceries_utilities'] + df['other_monthly_expenses'])
-    
-    df['expense_to_income_ratio'] = np.where(df['monthly_salary'] > 0,
-                                             (df['total_monthly_expenses'] / df['monthly_salary']) * 100, 0)
-    
-    df['disposable_income'] = df['monthly_salary'] - df['total_monthly_expenses'] - df['current_emi_amount']
-    
-    df['requested_to_income_ratio'] = np.where(df['monthly_salary'] > 0,
-                                               df['requested_amount'] / df['monthly_salary'], 0)
-    
-    df['financial_buffer_score'] = np.where(df['requested_amount'] > 0,
-                                            (df['bank_balance'] + df['emergency_fund']) / df['requested_amount'], 0)
-    
-    # Categorical features
-    df['age_group'] = pd.cut(df['age'], bins=[0, 25, 35, 45, 55, 100], 
-                             labels=['Young', 'Young_Adult', 'Middle_Age', 'Senior', 'Elder'])
-    
-    # Income categories
-    df['income_category'] = pd.cut(df['monthly_salary'],
-                                   bins=[0, 30000, 50000, 80000, np.inf],
-                                   labels=['Low_Income', 'Medium_Income', 'High_Income', 'Very_High_Income'])
-    
-    # Credit score categories
-    df['credit_category'] = pd.cut(df['credit_score'],
-                                   bins=[0, 600, 700, 750, 850],
-                                   labels=['Poor', 'Fair', 'Good', 'Excellent'])
-    
-    # Family size categories
-    df['family_size_category'] = pd.cut(df['family_size'],
-                                        bins=[0, 2, 4, 6, 20],
-                                        labels=['Small', 'Medium', 'Large', 'Very_Large'])
-    
-    # Interaction features
-    employment_mapping = {'Government': 4, 'Private': 3, 'Self_Employed': 2, 'Contract': 1}
-    df['employment_stability'] = df['employment_type'].map(employment_mapping).fillna(1)
-    
-    education_mapping = {'Graduate': 4, 'Post_Graduate': 5, 'Undergraduate': 3, 'High_School': 2, 'Others': 1}
-    df['education_score'] = df['education'].map(education_mapping).fillna(1)
-    
-    house_mapping = {'Owned': 3, 'Rented': 1, 'Family': 2}
-    df['house_ownership_score'] = df['house_type'].map(house_mapping).fillna(1)
-    
-    # Risk score
-    df['risk_score'] = (
-        df['debt_to_income_ratio'] * 0.3 +
-        df['expense_to_income_ratio'] * 0.2 +
-        (100 - df['credit_score']/8.5) * 0.25 +
-        (1/df['employment_stability']) * 10 * 0.15 +
-        (1/df['education_score']) * 10 * 0.1
-    )
-    
-    return df
+    """Check out a pooled database connection (use as ``with get_db_connection() as conn:``)"""
+    return get_db_pool().connection()
+
+write_behind = None
+
+def get_write_behind():
+    """Shared write-behind queue, started on first use and flushed at interpreter exit"""
+    global write_behind
+    if write_behind is None:
+        pool = get_db_pool()
+        with db_pool_lock:
+            if write_behind is None:
+                from write_behind import WriteBehindQueue
+                write_behind = WriteBehindQueue(pool, max_queue=app.config['WRITE_BEHIND_MAX_QUEUE'],
+                                                batch_size=app.config['WRITE_BEHIND_BATCH_SIZE'],
+                                                flush_interval=app.config['WRITE_BEHIND_FLUSH_INTERVAL'])
+                atexit.register(write_behind.stop)
+    return write_behind
+
+dashboard_broadcaster = None
+dashboard_broadcaster_lock = threading.Lock()
+
+def get_dashboard_broadcaster():
+    """Shared SSE broadcaster fed by the real-time manager's snapshots and new predictions"""
+    global dashboard_broadcaster
+    if dashboard_broadcaster is None:
+        real_time_manager = get_manager()
+        with dashboard_broadcaster_lock:
+            if dashboard_broadcaster is None:
+                from dashboard_stream import DashboardBroadcaster
+                broadcaster = DashboardBroadcaster(real_time_manager.get_real_time_dashboard_data,
+                                                   tick_interval=app.config['DASHBOARD_STREAM_TICK'],
+                                                   heartbeat_interval=app.config['DASHBOARD_STREAM_HEARTBEAT'],
+                                                   max_subscribers=app.config['DASHBOARD_STREAM_MAX_CLIENTS'])
+
+                def push_prediction(record):
+                    if broadcaster.has_subscribers:
+                        broadcaster.publish('prediction', record.to_dict())
+
+                real_time_manager.prediction_listeners.append(push_prediction)
+                dashboard_broadcaster = broadcaster
+    return dashboard_broadcaster
+
+micro_batcher = None
+micro_batcher_lock = threading.Lock()
+
+def get_micro_batcher():
+    """Shared dispatcher that batches concurrent single predictions into one manager call per task"""
+    global micro_batcher
+    if micro_batcher is None:
+        real_time_manager = get_manager()
+        with micro_batcher_lock:
+            if micro_batcher is None:
+                from micro_batching import MicroBatcher
+                micro_batcher = MicroBatcher(real_time_manager.predict_singles,
+                                             max_batch=app.config['MICRO_BATCH_MAX_ROWS'],
+                                             max_wait=app.config['MICRO_BATCH_MAX_WAIT_MS'] / 1000,
+                                             timeout=app.config['MICRO_BATCH_TIMEOUT'])
+    return micro_batcher
+
+def predict_single(task, customer_data):
+    """One eligibility ('classification') or EMI ('regression') prediction, micro-batched when enabled"""
+    if app.config['MICRO_BATCH']:
+        return get_micro_batcher().predict(task, customer_data)
+    return get_manager().predict_singles(task, [customer_data])[0]
+
+# Record totals are approximate: a count is reused for RECORDS_COUNT_TTL seconds per filter set
+records_count_cache = PredictionCache(max_size=256, ttl_seconds=app.config['RECORDS_COUNT_TTL'])
+
+def count_records(conn, filters):
+    """Cached COUNT(*) for a filter set; returns (total, served_from_cache)"""
+    if not filters:
+        # The unfiltered total is exact and O(1) from the summary tables
+        return int(conn.execute(STATEMENTS['summary_total']).fetchone()[0]), False
+    key = tuple(sorted(filters.items()))
+    total = records_count_cache.get(key)
+    if total is not None:
+        return total, True
+    sql, params = records_count_query(filters)
+    total = conn.execute(sql, params).fetchone()[0]
+    records_count_cache.put(key, total)
+    return total, False
 
 @app.route('/')
 def index():
@@ -160,29 +258,22 @@ def prepayment():
 def dashboard():
     """Analytics dashboard"""
     try:
-        conn = get_db_connection()
-        
-        # Get basic statistics
+        # Get basic statistics from the incrementally maintained summary tables
         stats = {}
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            summary = read_summary(conn)
+        groups = summary['eligibility'].values()
         
         # Total records
-        cursor.execute("SELECT COUNT(*) FROM financial_records")
-        stats['total_records'] = cursor.fetchone()[0]
+        stats['total_records'] = sum(group['record_count'] for group in groups)
         
         # Eligibility breakdown
-        cursor.execute("SELECT emi_eligibility, COUNT(*) FROM financial_records GROUP BY emi_eligibility")
-        eligibility_data = cursor.fetchall()
-        stats['eligibility_breakdown'] = {row[0]: row[1] for row in eligibility_data}
+        stats['eligibility_breakdown'] = {label: group['record_count'] for label, group in summary['eligibility'].items()}
         
         # Average metrics
-        cursor.execute("SELECT AVG(monthly_salary), AVG(credit_score), AVG(max_monthly_emi) FROM financial_records")
-        avg_data = cursor.fetchone()
-        stats['avg_salary'] = avg_data[0] or 0
-        stats['avg_credit_score'] = avg_data[1] or 0
-        stats['avg_emi'] = avg_data[2] or 0
-        
-        conn.close()
+        for stat, column in (('avg_salary', 'salary'), ('avg_credit_score', 'credit_score'), ('avg_emi', 'max_emi')):
+            count = sum(group[f'{column}_count'] for group in groups)
+            stats[stat] = sum(group[f'{column}_sum'] for group in groups) / count if count else 0
         
         return render_template('dashboard.html', stats=stats)
     except Exception as e:
@@ -199,41 +290,20 @@ def realtime_dashboard():
 def records():
     """View customer records"""
     try:
-        conn = get_db_connection()
-        page = request.args.get('page', 1, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = 20
         offset = (page - 1) * per_page
         
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM financial_records")
-        total = cursor.fetchone()[0]
-        
-        cursor.execute(f"""
-            SELECT id, age, gender, monthly_salary, credit_score, emi_eligibility, 
-                   max_monthly_emi, prediction_date 
-            FROM financial_records 
-            LIMIT {per_page} OFFSET {offset}
-        """)
-        
-        records_data = cursor.fetchall()
-        conn.close()
+        with get_db_connection() as conn:
+            total, _ = count_records(conn, {})
+            # One extra row tells whether a next page exists without an exact count
+            records_data = conn.execute(STATEMENTS['records_page'], (per_page + 1, offset)).fetchall()
         
         # Convert to list of dictionaries
-        records_list = []
-        for row in records_data:
-            records_list.append({
-                'id': row[0],
-                'age': row[1],
-                'gender': row[2],
-                'monthly_salary': row[3],
-                'credit_score': row[4],
-                'emi_eligibility': row[5],
-                'max_monthly_emi': row[6],
-                'prediction_date': row[7]
-            })
+        records_list = [dict(row) for row in records_data[:per_page]]
         
         has_prev = page > 1
-        has_next = offset + per_page < total
+        has_next = len(records_data) > per_page
         
         return render_template('records.html', 
                              records=records_list,
@@ -251,13 +321,12 @@ def predict_eligibility():
     """API endpoint for EMI eligibility prediction"""
     try:
         data = request.get_json()
-        from real_time_manager import real_time_manager
 
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
         # Delegate to the real-time manager so that statistics and recent predictions are updated
-        result = real_time_manager.predict_emi_eligibility(data)
+        result = predict_single('classification', data)
         return jsonify(result)
 
     except Exception as e:
@@ -269,13 +338,12 @@ def predict_emi_amount():
     """API endpoint for EMI amount prediction"""
     try:
         data = request.get_json()
-        from real_time_manager import real_time_manager
 
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
         # Delegate to the real-time manager so that statistics and recent predictions are updated
-        result = real_time_manager.predict_emi_amount(data)
+        result = predict_single('regression', data)
         return jsonify(result)
 
     except Exception as e:
@@ -287,83 +355,357 @@ def comprehensive_prediction():
     """API endpoint for comprehensive risk assessment"""
     try:
         data = request.get_json()
-        
-        # Get eligibility prediction
-        eligibility_response = predict_eligibility()
-        if eligibility_response.status_code != 200:
-            return eligibility_response
+        real_time_manager = get_manager()
 
-        eligibility_result = eligibility_response.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
 
-        # Normalize eligibility result into canonical shape expected by the front-end
-        canonical_eligibility = {
-            'eligibility': 'Not Eligible',
-            'confidence': 0.0
-        }
+        # Single pass: the manager encodes once and scores both models without intermediate responses
+        result = real_time_manager.assess(data)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Comprehensive prediction error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """API endpoint for scoring many customers in one vectorized model call"""
+    try:
+        data = request.get_json()
+        real_time_manager = get_manager()
+
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        # Accept either a bare list of customers or {"customers": [...], "tasks": [...]}
+        if isinstance(data, list):
+            customers, tasks = data, ['eligibility', 'emi_amount']
+        else:
+            customers = data.get('customers')
+            tasks = data.get('tasks') or ['eligibility', 'emi_amount']
+
+        if not isinstance(customers, list) or not customers:
+            return jsonify({'error': 'customers must be a non-empty list'}), 400
+        if len(customers) > app.config['MAX_BATCH_SIZE']:
+            return jsonify({'error': f"Batch size exceeds limit of {app.config['MAX_BATCH_SIZE']}"}), 400
+
+        if not isinstance(tasks, list):
+            return jsonify({'error': 'tasks must be a list'}), 400
+        unknown_tasks = set(tasks) - {'eligibility', 'emi_amount'}
+        if unknown_tasks:
+            return jsonify({'error': f"Unknown tasks: {', '.join(sorted(unknown_tasks))}"}), 400
+
+        results = real_time_manager.predict_batch(customers,
+                                                  include_eligibility='eligibility' in tasks,
+                                                  include_emi_amount='emi_amount' in tasks)
+        failed = sum(1 for r in results if 'error' in r)
+
+        return jsonify({
+            'count': len(results),
+            'failed': failed,
+            'results': results
+        })
+
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/whatif/sweep', methods=['POST'])
+def whatif_sweep():
+    """API endpoint for scoring a what-if grid over amount, tenure, rate, salary and credit score"""
+    try:
+        data = request.get_json()
+        real_time_manager = get_manager()
+
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        base_profile = data.get('base') or data.get('base_profile') or {}
+        ranges = data.get('ranges') or {}
+        if not isinstance(base_profile, dict) or not isinstance(ranges, dict):
+            return jsonify({'error': 'base and ranges must be JSON objects'}), 400
+
+        try:
+            result = real_time_manager.whatif_sweep(base_profile, ranges, max_cells=app.config['MAX_SWEEP_CELLS'])
+        except (ValueError, KeyError, TypeError) as e:
+            return jsonify({'error': f'Invalid sweep request: {e}'}), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"What-if sweep error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/prepayment/scenarios', methods=['POST'])
+def prepayment_scenarios():
+    """API endpoint for server-side prepayment and balance transfer scenarios (JSON or ?format=csv)"""
+    try:
+        from amortization import evaluate_scenarios, strategy_comparison
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
 
         try:
-            if isinstance(eligibility_result, dict):
-                # label could be present as 'eligibility', 'eligibility_status' or 'prediction'
-                label = eligibility_result.get('eligibility') or eligibility_result.get('eligibility_status') or eligibility_result.get('prediction')
-                conf = eligibility_result.get('confidence') if 'confidence' in eligibility_result else (
-                    eligibility_result.get('prediction_probability') or eligibility_result.get('prediction_prob') or None
-                )
-
-                if label:
-                    # Normalize common labels (strings like 'Eligible', 'Not Eligible', 'Not_Eligible')
-                    label_norm = str(label).replace('_', ' ').strip()
-                    canonical_eligibility['eligibility'] = 'Eligible' if label_norm.lower() in ('eligible', 'approved', 'yes') else ('Conditional' if label_norm.lower() in ('conditional', 'review') else 'Not Eligible')
-
-                if isinstance(conf, (int, float)):
-                    # Convert fraction (0-1) to percent if needed
-                    if conf <= 1:
-                        canonical_eligibility['confidence'] = round(float(conf) * 100, 2)
-                    else:
-                        canonical_eligibility['confidence'] = round(float(conf), 2)
-        except Exception as e:
-            logger.warning(f"Could not normalize eligibility_result: {e}")
+            loans, many = parse_loans(data)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
 
+        scenarios = evaluate_scenarios(**loans)
         result = {
-            'eligibility': canonical_eligibility,
-            'eligibility_raw': eligibility_result,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'scenarios': {name: {metric: rounded(values) for metric, values in metrics.items()}
+                          for name, metrics in scenarios.items()}
         }
 
-        # If eligible, get EMI amount prediction
-        if canonical_eligibility['eligibility'] == 'Eligible':
-            emi_response = predict_emi_amount()
-            if emi_response.status_code == 200:
-                emi_result = emi_response.get_json()
-                result['emi_prediction'] = emi_result
-
-                # Determine risk level using emi_to_income_ratio if available
-                emi_ratio = None
-                try:
-                    emi_ratio = float(emi_result.get('emi_to_income_ratio'))
-                except Exception:
-                    pass
-
-                if emi_ratio is not None:
-                    if emi_ratio < 30:
-                        result['risk_level'] = 'Low'
-                    elif emi_ratio < 45:
-                        result['risk_level'] = 'Moderate'
-                    else:
-                        result['risk_level'] = 'High'
-                else:
-                    result['risk_level'] = 'Unknown'
-            else:
-                result['emi_prediction'] = None
-                result['risk_level'] = 'Unknown'
-        else:
-            result['emi_prediction'] = None
-            result['risk_level'] = 'High'
-            result['recommendation'] = 'Not eligible for EMI. Consider improving credit score or reducing existing debt.'
-        
+        if not many:
+            # Single profile: also emit the strategy_comparison.csv layout
+            result['scenarios'] = {name: {metric: values[0] for metric, values in metrics.items()}
+                                   for name, metrics in result['scenarios'].items()}
+            result['strategy_comparison'] = strategy_comparison(
+                **{field: (values[0] if values is not None else None) for field, values in loans.items()})
+            if request.args.get('format') == 'csv':
+                return csv_response(result['strategy_comparison'], 'strategy_comparison.csv')
+
         return jsonify(result)
-        
+
     except Exception as e:
-        logger.error(f"Comprehensive prediction error: {str(e)}")
+        logger.error(f"Prepayment scenarios error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/prepayment/sensitivity', methods=['POST'])
+def prepayment_sensitivity_analysis():
+    """API endpoint regenerating the prepayment sensitivity table for any profile (JSON or ?format=csv)"""
+    try:
+        from amortization import prepayment_sensitivity
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        try:
+            loans, many = parse_loans(data)
+            amounts = [float(a) for a in data.get('amounts', [25000, 50000, 75000, 100000, 150000])]
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        if many:
+            return jsonify({'error': 'Sensitivity analysis takes a single loan profile'}), 400
+
+        rows = prepayment_sensitivity(loans['principal'][0], loans['annual_rate'][0], loans['tenure_months'][0],
+                                      amounts,
+                                      current_emi=loans['current_emi'][0] if loans['current_emi'] is not None else None,
+                                      prepayment_month=loans['prepayment_month'][0])
+        if request.args.get('format') == 'csv':
+            return csv_response(rows, 'prepayment_sensitivity_analysis.csv')
+        return jsonify({'rows': rows})
+
+    except Exception as e:
+        logger.error(f"Prepayment sensitivity error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/prepayment/optimize', methods=['POST'])
+def prepayment_optimize():
+    """API endpoint searching prepayment amount, month and strategy under a liquidity constraint"""
+    try:
+        from prepayment_optimizer import optimize_prepayment
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        try:
+            loans, many = parse_loans(data)
+            if many:
+                raise ValueError('The optimizer takes a single loan profile')
+            options = {
+                'bank_balance': float(data.get('bank_balance', 0)),
+                'emergency_fund': float(data.get('emergency_fund', 0)),
+                'cash_buffer': float(data.get('cash_buffer', 0)),
+                'emergency_fund_usable': float(data.get('emergency_fund_usable', 0)),
+                'amount_steps': min(max(int(data.get('amount_steps', 100)), 1), 1000),
+                'month_step': max(int(data.get('month_step', 1)), 1),
+                'max_month': int(data['max_month']) if data.get('max_month') is not None else None,
+                'budget_ms': min(float(data.get('budget_ms', app.config['OPTIMIZER_BUDGET_MS'])), 1000.0),
+                'max_candidates': app.config['OPTIMIZER_MAX_CANDIDATES']
+            }
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        result = optimize_prepayment(loans['principal'][0], loans['annual_rate'][0], loans['tenure_months'][0],
+                                     current_emi=loans['current_emi'][0] if loans['current_emi'] is not None else None,
+                                     **options)
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Prepayment optimizer error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/amortization/schedule', methods=['POST'])
+def amortization_schedule_api():
+    """API endpoint returning month-by-month amortization schedules for one or many loans"""
+    try:
+        from amortization import amortization_schedule
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        try:
+            loans, many = parse_loans(data)
+            schedule = amortization_schedule(loans['principal'], loans['annual_rate'], loans['tenure_months'],
+                                             emi=loans['current_emi'], max_horizon=app.config['MAX_SCHEDULE_MONTHS'],
+                                             max_cells=app.config['MAX_SCHEDULE_CELLS'])
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        result = {key: (values.tolist() if key in ('month', 'months_to_close') else rounded(values))
+                  for key, values in schedule.items()}
+        if not many:
+            # Trim the padding and unwrap the single loan
+            months = int(schedule['months_to_close'][0])
+            result = {key: (values[:months] if key == 'month' else
+                            values[0][:months] if isinstance(values[0], list) else values[0])
+                      for key, values in result.items()}
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Amortization schedule error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/lenders/match', methods=['POST'])
+def lenders_match():
+    """API endpoint pricing every eligible lender in the catalogue for one applicant"""
+    try:
+        from lender_engine import lender_engine
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        try:
+            profile = {
+                'loan_amount': float(data.get('requested_amount', 0)),
+                'tenure_months': float(data.get('requested_tenure', 0)),
+                'credit_score': float(data.get('credit_score', 0)),
+                'monthly_income': float(data.get('monthly_salary', 0)),
+                'employment_type': str(data.get('employment_type', 'Private')),
+                'existing_emi': float(data.get('current_emi_amount', 0)),
+                'sort_by': data.get('sort_by', 'total_cost'),
+                'top_k': int(data.get('top_k', 10))
+            }
+            if profile['loan_amount'] <= 0 or profile['tenure_months'] <= 0:
+                raise ValueError('requested_amount and requested_tenure must be positive')
+            result = lender_engine.match(**profile)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        if request.args.get('format') == 'csv':
+            # Same layout as models/lender_comparison_*_profile.csv
+            rows = [{
+                'Lender': match['lender'],
+                'Type': match['type'],
+                'Interest Rate': match['interest_rate'],
+                'EMI': match['emi'],
+                'Processing Fee': match['processing_fee'],
+                'Total Interest': match['total_interest'],
+                'Total Payment': match['total_payment'],
+                'Approval Probability': match['approval_probability'],
+                'Max Tenure': match['max_tenure']
+            } for match in result['matches']]
+            return csv_response(rows, 'lender_comparison.csv')
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Lender matching error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def run_balance_transfer_scan(current_rate=None, months_elapsed=0, top_k=3, full=False):
+    """Run the balance-transfer scanner against the records database"""
+    from balance_transfer_scanner import scan_balance_transfers
+
+    with get_db_connection() as conn:
+        return scan_balance_transfers(conn, current_rate=current_rate or app.config['BT_CURRENT_RATE'],
+                                      months_elapsed=months_elapsed, top_k=top_k, full=full)
+
+@app.route('/api/balance_transfer/scan', methods=['POST'])
+def balance_transfer_scan():
+    """API endpoint scanning saved records for balance-transfer opportunities (incremental by default)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            options = {
+                'current_rate': float(data['current_rate']) if data.get('current_rate') is not None else None,
+                'months_elapsed': max(int(data.get('months_elapsed', 0)), 0),
+                'top_k': min(max(int(data.get('top_k', 3)), 1), 20),
+                'full': bool(data.get('full', False))
+            }
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify(run_balance_transfer_scan(**options))
+
+    except Exception as e:
+        logger.error(f"Balance transfer scan error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/balance_transfer/opportunities', methods=['GET'])
+def balance_transfer_opportunities():
+    """API endpoint listing persisted balance-transfer opportunities, best savings first"""
+    try:
+        from balance_transfer_scanner import ensure_schema
+
+        record_id = request.args.get('record_id', type=int)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 1000)
+
+        with get_db_connection() as conn:
+            ensure_schema(conn)
+            if record_id is not None:
+                rows = conn.execute(STATEMENTS['opportunities_for_record'], (record_id, limit)).fetchall()
+            else:
+                rows = conn.execute(STATEMENTS['top_opportunities'], (limit,)).fetchall()
+
+        return jsonify({'opportunities': [dict(row) for row in rows]})
+
+    except Exception as e:
+        logger.error(f"Balance transfer opportunities error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/records', methods=['GET'])
+def api_records():
+    """API endpoint listing records newest first with filters and keyset (cursor) pagination"""
+    try:
+        try:
+            filters = parse_record_filters(request.args)
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+            limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        with get_db_connection() as conn:
+            sql, params = records_query(filters, after, limit + 1)
+            rows = conn.execute(sql, params).fetchall()
+            total, cached = None, False
+            if request.args.get('include_total', 'true') != 'false':
+                total, cached = count_records(conn, filters)
+
+        records_list = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = records_list[-1]
+            next_cursor = encode_cursor(last['prediction_date'], last['id'])
+
+        return jsonify({
+            'records': records_list,
+            'next_cursor': next_cursor,
+            'limit': limit,
+            'total': total,
+            'total_is_cached': cached,
+            'filters': filters
+        })
+
+    except Exception as e:
+        logger.error(f"Records API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/save_record', methods=['POST'])
@@ -372,35 +714,20 @@ def save_record():
     try:
         data = request.get_json()
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Insert new record
-        cursor.execute("""
-            INSERT INTO financial_records 
-            (age, gender, marital_status, education, monthly_salary, employment_type,
-             years_of_employment, company_type, house_type, monthly_rent, family_size,
-             dependents, school_fees, college_fees, travel_expenses, groceries_utilities,
-             other_monthly_expenses, existing_loans, current_emi_amount, credit_score,
-             bank_balance, emergency_fund, emi_scenario, requested_amount, requested_tenure,
-             predicted_eligibility, predicted_emi_amount)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data.get('age'), data.get('gender'), data.get('marital_status'),
-            data.get('education'), data.get('monthly_salary'), data.get('employment_type'),
-            data.get('years_of_employment'), data.get('company_type'), data.get('house_type'),
-            data.get('monthly_rent'), data.get('family_size'), data.get('dependents'),
-            data.get('school_fees'), data.get('college_fees'), data.get('travel_expenses'),
-            data.get('groceries_utilities'), data.get('other_monthly_expenses'),
-            data.get('existing_loans'), data.get('current_emi_amount'), data.get('credit_score'),
-            data.get('bank_balance'), data.get('emergency_fund'), data.get('emi_scenario'),
-            data.get('requested_amount'), data.get('requested_tenure'),
-            data.get('predicted_eligibility'), data.get('predicted_emi_amount')
-        ))
+        if app.config['WRITE_BEHIND']:
+            # Queue for the group-commit writer; a full queue falls back to a synchronous insert
+            ticket = get_write_behind().submit(data)
+            if ticket is not None:
+                return jsonify({'success': True, 'queued': True, 'ticket': ticket}), 202
         
-        conn.commit()
-        record_id = cursor.lastrowid
-        conn.close()
+        with get_db_connection() as conn:
+            # Insert new record
+            values = [data.get(column) for column in RECORD_COLUMNS]
+            cursor = conn.execute(STATEMENTS['insert_record'], values)
+            # Dashboard aggregates are updated in the same transaction, from exactly the stored columns
+            apply_to_summary(conn, [dict(zip(RECORD_COLUMNS, values))])
+            conn.commit()
+            record_id = cursor.lastrowid
         
         return jsonify({'success': True, 'record_id': record_id})
         
@@ -408,46 +735,59 @@ def save_record():
         logger.error(f"Save record error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/save_record/<int:ticket>', methods=['GET'])
+def save_record_status(ticket):
+    """Resolve a write-behind ticket to its record id once the row has been committed"""
+    if write_behind is None:
+        return jsonify({'error': 'Write-behind mode is not enabled'}), 404
+    return jsonify(write_behind.status(ticket))
+
+@app.route('/api/save_records', methods=['POST'])
+def save_records():
+    """Save many records in bulk, optionally scoring the ones that carry no prediction"""
+    try:
+        from record_ingest import ingest_records
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        # Accept either a bare list of records or {"records": [...], "score": true}
+        records = data if isinstance(data, list) else data.get('records')
+        score = False if isinstance(data, list) else bool(data.get('score', False))
+        if not isinstance(records, list) or not records:
+            return jsonify({'error': 'records must be a non-empty list'}), 400
+        if len(records) > app.config['MAX_BATCH_SIZE']:
+            return jsonify({'error': f"Batch size exceeds limit of {app.config['MAX_BATCH_SIZE']}"}), 400
+
+        predict_batch = None
+        if score:
+            real_time_manager = get_manager()
+            predict_batch = real_time_manager.predict_batch
+
+        with get_db_connection() as conn:
+            stats = ingest_records(conn, records, predict_batch=predict_batch)
+
+        return jsonify(dict(stats, success=stats['inserted'] > 0))
+
+    except Exception as e:
+        logger.error(f"Save records error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/dashboard_summary')
 def dashboard_data():
     """API endpoint for dashboard summary data (legacy DB-derived). Renamed to avoid collision with real-time API."""
     try:
-        conn = get_db_connection()
-        
-        # Eligibility distribution
-        cursor = conn.cursor()
-        cursor.execute("SELECT emi_eligibility, COUNT(*) FROM financial_records GROUP BY emi_eligibility")
-        eligibility_data = cursor.fetchall()
-        
-        # Salary distribution by eligibility
-        cursor.execute("""
-            SELECT emi_eligibility, AVG(monthly_salary) 
-            FROM financial_records 
-            GROUP BY emi_eligibility
-        """)
-        salary_data = cursor.fetchall()
-        
-        # Credit score distribution
-        cursor.execute("""
-            SELECT 
-                CASE 
-                    WHEN credit_score < 600 THEN 'Poor'
-                    WHEN credit_score < 700 THEN 'Fair'
-                    WHEN credit_score < 750 THEN 'Good'
-                    ELSE 'Excellent'
-                END as credit_category,
-                COUNT(*)
-            FROM financial_records 
-            GROUP BY credit_category
-        """)
-        credit_data = cursor.fetchall()
-        
-        conn.close()
+        with get_db_connection() as conn:
+            summary = read_summary(conn)
         
+        # Unlabelled records keep the 'null' key the GROUP BY queries used to produce
+        groups = {('null' if label is None else label): group for label, group in summary['eligibility'].items()}
         result = {
-            'eligibility_distribution': {row[0]: row[1] for row in eligibility_data},
-            'salary_by_eligibility': {row[0]: row[1] for row in salary_data},
-            'credit_distribution': {row[0]: row[1] for row in credit_data}
+            'eligibility_distribution': {label: group['record_count'] for label, group in groups.items()},
+            'salary_by_eligibility': {label: group['salary_sum'] / group['salary_count'] if group['salary_count'] else None
+                                      for label, group in groups.items()},
+            'credit_distribution': summary['credit']
         }
         
         return jsonify(result)
@@ -461,13 +801,12 @@ def dashboard_data():
 def api_predict_eligibility():
     """API endpoint for EMI eligibility prediction using ML models"""
     try:
-        from real_time_manager import real_time_manager
         customer_data = request.get_json()
         
         if not customer_data:
             return jsonify({'error': 'No data provided'}), 400
         
-        result = real_time_manager.predict_emi_eligibility(customer_data)
+        result = predict_single('classification', customer_data)
         return jsonify(result)
         
     except Exception as e:
@@ -478,13 +817,12 @@ def api_predict_eligibility():
 def api_predict_emi_amount():
     """API endpoint for EMI amount prediction using ML models"""
     try:
-        from real_time_manager import real_time_manager
         customer_data = request.get_json()
         
         if not customer_data:
             return jsonify({'error': 'No data provided'}), 400
         
-        result = real_time_manager.predict_emi_amount(customer_data)
+        result = predict_single('regression', customer_data)
         return jsonify(result)
         
     except Exception as e:
@@ -493,21 +831,51 @@ def api_predict_emi_amount():
 
 @app.route('/api/dashboard_data', methods=['GET'])
 def api_dashboard_data():
-    """API endpoint for real-time dashboard data"""
+    """API endpoint for real-time dashboard data (ETag revalidation and ``since=<cursor>`` deltas)"""
     try:
-        from real_time_manager import real_time_manager
-        data = real_time_manager.get_real_time_dashboard_data()
-        return jsonify(data)
+        real_time_manager = get_manager()
+        # A cursor from another worker or process is ignored and answered with a full payload
+        since = real_time_manager.cursor_sequence(request.args.get('since'))
+        # The tag is known before anything is built, so an unchanged dashboard costs no serialization;
+        # it carries the process epoch, so a tag from another worker or process never matches
+        etag = real_time_manager.dashboard_cursor(real_time_manager.sequence)
+        if since is not None:
+            etag = f"{etag}-{since}"
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            data = real_time_manager.get_real_time_dashboard_data(
+                since=real_time_manager.dashboard_cursor(since) if since is not None else None)
+            etag = data['cursor'] if since is None else f"{data['cursor']}-{since}"
+            response = jsonify(data)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         logger.error(f"Dashboard data API error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/dashboard_stream', methods=['GET'])
+def api_dashboard_stream():
+    """Server-Sent Events stream of dashboard snapshots and new predictions"""
+    try:
+        broadcaster = get_dashboard_broadcaster()
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscriber = broadcaster.subscribe(last_event_id)
+        if subscriber is None:
+            return jsonify({'error': 'Too many dashboard stream clients; poll /api/dashboard_data instead'}), 503
+        return Response(stream_with_context(broadcaster.stream(subscriber)), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    except Exception as e:
+        logger.error(f"Dashboard stream error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/generate_sample_predictions', methods=['POST'])
 def api_generate_sample_predictions():
     """API endpoint to generate sample predictions for testing"""
     try:
-        from real_time_manager import real_time_manager
+        real_time_manager = get_manager()
         data = request.get_json() or {}
         count = data.get('count', 5)
         
@@ -527,7 +895,7 @@ def api_generate_sample_predictions():
 def api_model_status():
     """API endpoint for model status information"""
     try:
-        from real_time_manager import real_time_manager
+        real_time_manager = get_manager()
         
         status = {
             'classification_model': 'classification' in real_time_manager.models,
@@ -536,7 +904,15 @@ def api_model_status():
             'encoders_loaded': len(real_time_manager.encoders) > 0,
             'total_predictions': real_time_manager.system_stats['total_predictions'],
             'success_rate': real_time_manager.system_stats['successful_predictions'] / max(real_time_manager.system_stats['total_predictions'], 1),
-            'avg_response_time': real_time_manager.system_stats['avg_prediction_time']
+            'avg_response_time': real_time_manager.system_stats['avg_prediction_time'],
+            'latency_percentiles': metrics.latency_summary('prediction_latency', 'model')['all'],
+            'prediction_cache': real_time_manager.prediction_cache.stats(),
+            'model_version': real_time_manager.model_version,
+            'model_registry': get_registry(real_time_manager.bundle.path or real_time_manager.model_path).stats(),
+            'mlflow': real_time_manager.mlflow_refresher.status(),
+            'dashboard_stream': dashboard_broadcaster.stats() if dashboard_broadcaster is not None else None,
+            'database_pool': get_db_pool().stats(),
+            'write_behind': write_behind.stats() if write_behind is not None else None
         }
         
         return jsonify(status)
@@ -546,14 +922,81 @@ def api_model_status():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    """API endpoint exposing windowed latency percentiles per endpoint and model plus raw counters"""
+    try:
+        snapshot = metrics.snapshot()
+        return jsonify({
+            'request_latency': metrics.latency_summary('http_request_latency', 'endpoint'),
+            'prediction_latency': metrics.latency_summary('prediction_latency', 'model'),
+            'micro_batching': micro_batcher.stats() if micro_batcher is not None else None,
+            'counters': snapshot['counters']
+        })
+    except Exception as e:
+        logger.error(f"Metrics error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def admin_authorized():
+    """True when no admin token is configured or the request carries the right one"""
+    token = app.config['ADMIN_TOKEN']
+    return not token or request.headers.get('X-Admin-Token') == token
+
+@app.route('/api/admin/models', methods=['GET'])
+def api_admin_models():
+    """Active model bundle, available versions and recent reload outcomes"""
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+    try:
+        real_time_manager = get_manager()
+        return jsonify(real_time_manager.model_versions())
+    except Exception as e:
+        logger.error(f"Model versions error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/models/reload', methods=['POST'])
+def api_admin_models_reload():
+    """Load, warm up and swap in a model bundle (optional JSON body: {"version": "<name>"})"""
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+    try:
+        real_time_manager = get_manager()
+        version = (request.get_json(silent=True) or {}).get('version')
+        result = real_time_manager.reload_models(version=version)
+        if result['status'] != 'swapped':
+            return jsonify(result), 404 if 'not found' in result.get('error', '') else 409
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Model reload error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/models/shadow', methods=['GET', 'POST'])
+def api_admin_models_shadow():
+    """Shadow candidate stats; POST {"version": "<name>"} starts shadow scoring, {"version": null} stops it"""
+    if not admin_authorized():
+        return jsonify({'error': 'Admin token required'}), 403
+    try:
+        real_time_manager = get_manager()
+        if request.method == 'GET':
+            return jsonify(real_time_manager.shadow_stats())
+        version = (request.get_json(silent=True) or {}).get('version')
+        return jsonify(real_time_manager.set_shadow(version))
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"Shadow model error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/debug/recent_predictions', methods=['GET'])
 def api_debug_recent_predictions():
     """Debug endpoint: return recent predictions recorded by the real-time manager (last 20)"""
     try:
-        from real_time_manager import real_time_manager
-        recent = real_time_manager.real_time_data.get('recent_predictions', [])
-        # Return the last 20 entries (most recent first)
-        return jsonify({'count': len(recent), 'recent_predictions': recent[-20:]})
+        real_time_manager = get_manager()
+        recent = real_time_manager.recent_predictions
+        # Return the last 20 entries (oldest first)
+        return jsonify({'count': len(recent), 'recent_predictions': recent.to_list(20)})
     except Exception as e:
         logger.error(f"Debug recent predictions error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -573,6 +1016,47 @@ def test_integration():
     """Enhanced integration test page"""
     return render_template('test_integration.html')
 
+@app.cli.command('scan-balance-transfers')
+@click.option('--current-rate', type=float, default=None, help='Assumed current rate (% p.a.) of saved loans')
+@click.option('--months-elapsed', type=int, default=0, help='Instalments already paid before the transfer')
+@click.option('--top-k', type=int, default=3, help='Opportunities kept per record')
+@click.option('--full', is_flag=True, help='Rescan every record instead of only new ones')
+def scan_balance_transfers_command(current_rate, months_elapsed, top_k, full):
+    """Scan saved records for balance-transfer opportunities"""
+    stats = run_balance_transfer_scan(current_rate, months_elapsed, top_k, full)
+    click.echo(f"Scanned {stats['records_scanned']} records against {stats['lenders']} lenders: "
+               f"{stats['opportunities']} opportunities in {stats['elapsed_seconds']:.2f}s "
+               f"({stats['records_per_second']:.0f} records/s)")
+
+@app.cli.command('import-records')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--score', is_flag=True, help='Score rows without predictions using the loaded models')
+@click.option('--chunk-size', type=int, default=10000, help='Rows per insert transaction')
+def import_records_command(path, score, chunk_size):
+    """Import financial records from a CSV or JSON-lines file"""
+    from record_ingest import ingest_records, read_records_file
+
+    predict_batch = None
+    if score:
+        real_time_manager = get_manager()
+        predict_batch = real_time_manager.predict_batch
+
+    with get_db_connection() as conn:
+        stats = ingest_records(conn, read_records_file(path), chunk_size=max(chunk_size, 1),
+                               predict_batch=predict_batch)
+    for error in stats['errors']:
+        click.echo(f"Row {error['index']}: {error['error']}", err=True)
+    click.echo(f"Imported {stats['inserted']} of {stats['received']} records ({stats['rejected']} rejected, "
+               f"{stats['scored']} scored) in {stats['elapsed_seconds']:.2f}s "
+               f"({stats['rows_per_second']:.0f} rows/s)")
+
+@app.cli.command('rebuild-dashboard-summary')
+def rebuild_dashboard_summary_command():
+    """Recompute the dashboard summary tables from financial_records"""
+    with get_db_connection() as conn:
+        total = rebuild_summary(conn)
+    click.echo(f"Rebuilt dashboard summary over {total} records")
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('error.html', error_code=404, error_message="Page not found"), 404
@@ -583,7 +1067,8 @@ def internal_error(error):
 
 if __name__ == '__main__':
     # Load models on startup
-    if load_models():
+    manager = init_app()
+    if 'classification' in manager.models and 'regression' in manager.models:
         logger.info("Starting EMI Risk Assessment Web Application")
         app.run(debug=True, host='0.0.0.0', port=5000)
     else:
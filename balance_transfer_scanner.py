@@ -0,0 +1,221 @@
+"""
+Balance-Transfer Opportunity Scanner
+Streams saved financial records in keyset chunks, prices a transfer to every lender in the
+catalogue with vectorized (records x lenders) math and persists the ranked opportunities
+"""
+
+from typing import Dict, Optional
+import json
+import time
+import numpy as np
+
+from amortization import calculate_emi, outstanding_balance
+from lender_engine import LenderEngine, approval_probability, customized_rate, lender_engine
+
+SCANNER_NAME = 'balance_transfer'
+
+# Upper bound on (records x lenders) cells held in memory per chunk
+MAX_CHUNK_CELLS = 2_000_000
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS balance_transfer_opportunities (
+        record_id INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        lender_code TEXT,
+        lender TEXT,
+        current_rate REAL,
+        new_rate REAL,
+        current_emi REAL,
+        new_emi REAL,
+        current_total REAL,
+        new_total REAL,
+        savings REAL,
+        roi REAL,
+        transfer_fee REAL,
+        approval_probability REAL,
+        scanned_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (record_id, rank)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_bt_opportunities_savings ON balance_transfer_opportunities (savings DESC)",
+    """
+    CREATE TABLE IF NOT EXISTS scan_state (
+        scanner TEXT PRIMARY KEY,
+        last_record_id INTEGER NOT NULL,
+        params TEXT,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+)
+
+RECORD_COLUMNS = ('id', 'requested_amount', 'requested_tenure', 'credit_score', 'monthly_salary',
+                  'employment_type', 'current_emi_amount')
+
+# Records missing (or holding non-numeric text in) any of these cannot be priced and are skipped
+REQUIRED_COLUMNS = ('requested_amount', 'requested_tenure', 'credit_score', 'monthly_salary')
+
+
+def numeric_column(values) -> np.ndarray:
+    """Float array of raw SQLite values; text that is not a number becomes NaN instead of raising"""
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        column = np.empty(len(values), dtype=float)
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            except (TypeError, ValueError):
+                column[i] = np.nan
+        return column
+
+
+def ensure_schema(conn):
+    """Create the opportunity and scan-state tables if they do not exist"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def score_transfers(records: Dict[str, np.ndarray], lenders: Dict[str, np.ndarray], current_rate: float,
+                    months_elapsed: int, top_k: int) -> Dict[str, np.ndarray]:
+    """Best ``top_k`` transfers per record as (records, top_k) arrays; ineligible or losing cells are masked"""
+    principal = records['requested_amount'][:, None]
+    tenure = records['requested_tenure'][:, None]
+    credit = records['credit_score'][:, None]
+    income = records['monthly_salary'][:, None]
+    employment = records['employment_type'][:, None]
+    existing_emi = records['current_emi_amount'][:, None]
+
+    # The saved request is treated as the running loan at the assumed current rate
+    k = np.minimum(months_elapsed, tenure)
+    remaining = tenure - k
+    current_emi = calculate_emi(principal, current_rate, tenure)
+    balance = outstanding_balance(principal, current_rate, current_emi, k)
+    current_total = current_emi * remaining
+
+    new_rate = customized_rate(lenders['base_rate'][None, :], credit, income, employment, existing_emi)
+    new_emi = calculate_emi(balance, new_rate, np.maximum(remaining, 1))
+    transfer_fee = balance * lenders['processing_fee_percent'][None, :] / 100
+    new_total = new_emi * remaining + transfer_fee
+    savings = current_total - new_total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(transfer_fee > 0, savings / transfer_fee * 100, 0.0)
+
+    eligible = ((lenders['credit_score_min'][None, :] <= credit) &
+                (lenders['income_min'][None, :] <= income) &
+                (lenders['max_tenure'][None, :] >= remaining) &
+                (remaining > 0) & np.isfinite(principal) & np.isfinite(tenure) & (savings > 0))
+    ranked_savings = np.where(eligible, savings, -np.inf)
+
+    k_best = min(top_k, ranked_savings.shape[1])
+    top = np.argpartition(-ranked_savings, k_best - 1, axis=1)[:, :k_best]
+    order = np.argsort(-np.take_along_axis(ranked_savings, top, axis=1), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    rows = np.arange(ranked_savings.shape[0])[:, None]
+
+    return {
+        'lender_index': top,
+        'valid': np.isfinite(ranked_savings[rows, top]),
+        'current_emi': np.broadcast_to(current_emi, top.shape),
+        'current_total': np.broadcast_to(current_total, top.shape),
+        'new_rate': new_rate[rows, top],
+        'new_emi': new_emi[rows, top],
+        'new_total': new_total[rows, top],
+        'savings': savings[rows, top],
+        'roi': roi[rows, top],
+        'transfer_fee': transfer_fee[rows, top],
+        'approval_probability': approval_probability(
+            lenders['credit_score_min'][top], credit, income, employment, existing_emi + new_emi[rows, top]) * 100
+    }
+
+
+def scan_balance_transfers(conn, engine: Optional[LenderEngine] = None, current_rate: float = 12.0,
+                           months_elapsed: int = 0, top_k: int = 3, chunk_size: int = 5000,
+                           full: bool = False) -> Dict:
+    """Scan records added since the last run (or all of them with ``full``) and persist their opportunities
+
+    A change of parameters or of the lender catalogue forces a full rescan. Each chunk is committed
+    together with the scan position, so an interrupted scan resumes where it stopped.
+    """
+    start = time.perf_counter()
+    engine = engine or lender_engine
+    catalog = engine.catalog()
+    lenders = catalog.columns
+    ensure_schema(conn)
+
+    params = json.dumps({'current_rate': float(current_rate), 'months_elapsed': int(months_elapsed),
+                         'top_k': int(top_k), 'catalog_mtime': catalog.mtime}, sort_keys=True)
+    state = conn.execute("SELECT last_record_id, params FROM scan_state WHERE scanner = ?",
+                         (SCANNER_NAME,)).fetchone()
+    if full or state is None or state[1] != params:
+        full = True
+        last_id = 0
+        conn.execute("DELETE FROM balance_transfer_opportunities")
+        conn.commit()
+    else:
+        last_id = state[0]
+
+    rows_per_chunk = max(1, min(int(chunk_size), MAX_CHUNK_CELLS // max(catalog.size, 1)))
+    stats = {'full_scan': full, 'records_scanned': 0, 'records_skipped': 0, 'opportunities': 0, 'chunks': 0,
+             'lenders': catalog.size, 'last_record_id': last_id}
+
+    while catalog.size:
+        chunk = conn.execute(
+            f"SELECT {', '.join(RECORD_COLUMNS)} FROM financial_records WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, rows_per_chunk)).fetchall()
+        if not chunk:
+            break
+
+        columns = list(zip(*chunk))
+        chunk_ids = np.array(columns[0], dtype=int)
+        records = {name: numeric_column(values) for name, values in zip(RECORD_COLUMNS, columns)
+                   if name != 'employment_type'}
+        records['employment_type'] = np.array(columns[RECORD_COLUMNS.index('employment_type')], dtype=object)
+        records['current_emi_amount'] = np.nan_to_num(records['current_emi_amount'])
+
+        # Unpriceable rows are left out of scoring but still count as scanned, so the position advances
+        usable = np.logical_and.reduce([np.isfinite(records[name]) for name in REQUIRED_COLUMNS])
+        records = {name: values[usable] for name, values in records.items()}
+        if usable.any():
+            result = score_transfers(records, lenders, current_rate, months_elapsed, top_k)
+            record_index, rank = np.nonzero(result['valid'])
+        else:
+            result = None
+            record_index = rank = np.empty(0, dtype=int)
+        lender_index = result['lender_index'][record_index, rank]
+        rows = zip(
+            records['id'][record_index].astype(int).tolist(), (rank + 1).tolist(),
+            lenders['code'][lender_index].tolist(), lenders['name'][lender_index].tolist(),
+            [float(current_rate)] * record_index.size,
+            *(result[name][record_index, rank].tolist() for name in
+              ('new_rate', 'current_emi', 'new_emi', 'current_total', 'new_total', 'savings', 'roi',
+               'transfer_fee', 'approval_probability'))) if result is not None else []
+
+        last_id = int(chunk_ids[-1])
+        with conn:
+            record_ids = [(int(record_id),) for record_id in chunk_ids]
+            conn.executemany("DELETE FROM balance_transfer_opportunities WHERE record_id = ?", record_ids)
+            conn.executemany("""
+                INSERT INTO balance_transfer_opportunities
+                (record_id, rank, lender_code, lender, current_rate, new_rate, current_emi, new_emi,
+                 current_total, new_total, savings, roi, transfer_fee, approval_probability)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.execute("""
+                INSERT INTO scan_state (scanner, last_record_id, params, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(scanner) DO UPDATE SET last_record_id = excluded.last_record_id,
+                    params = excluded.params, updated_at = excluded.updated_at
+            """, (SCANNER_NAME, last_id, params))
+
+        stats['records_scanned'] += len(chunk)
+        stats['records_skipped'] += int(np.count_nonzero(~usable))
+        stats['opportunities'] += int(record_index.size)
+        stats['chunks'] += 1
+
+    stats['last_record_id'] = last_id
+    stats['elapsed_seconds'] = time.perf_counter() - start
+    stats['records_per_second'] = (stats['records_scanned'] / stats['elapsed_seconds']
+                                   if stats['elapsed_seconds'] > 0 else 0.0)
+    return stats
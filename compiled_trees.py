@@ -0,0 +1,294 @@
+"""
+Compiled Tree-Ensemble Inference for EMI Risk Assessment
+Flattens fitted XGBoost ensembles (and their StandardScalers) into contiguous NumPy arrays and scores
+rows by vectorized traversal, skipping the per-call DMatrix construction and validation that dominate
+single-row latency; ``verify`` measures parity with the original ``predict``/``predict_proba``
+"""
+
+from typing import Dict, Optional
+import argparse
+import json
+import time
+import numpy as np
+
+# Objective -> link applied to the summed margins
+LINKS = {
+    'reg:squarederror': 'identity',
+    'reg:absoluteerror': 'identity',
+    'reg:pseudohubererror': 'identity',
+    'reg:logistic': 'logistic',
+    'binary:logistic': 'logistic',
+    'multi:softprob': 'softmax'
+}
+
+# Rows traversed at once; bounds the (rows, trees) node-index matrices
+CHUNK_ROWS = 4096
+
+# Default parity tolerance; margins match exactly, but the C library's expf is not always correctly
+# rounded, so a probability can differ in the last float32 ulp
+RTOL = 1e-5
+ATOL = 1e-6
+
+
+def _expf(values: np.ndarray) -> np.ndarray:
+    """float32 exp via float64, rounded once (closer to C expf than numpy's float32 SIMD exp)"""
+    return np.exp(values.astype(np.float64)).astype(np.float32)
+
+
+class CompiledTreeEnsemble:
+    """Every tree of a gbtree model in shared node arrays; leaves point to themselves"""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, roots: np.ndarray, groups: np.ndarray,
+                 base_margin: np.ndarray, link: str, n_features: int, depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.groups = groups
+        self.base_margin = base_margin
+        self.link = link
+        self.n_features = n_features
+        self.depth = depth
+        self._group_trees = [np.flatnonzero(groups == g) for g in range(len(base_margin))]
+
+    @classmethod
+    def from_xgboost(cls, model) -> 'CompiledTreeEnsemble':
+        """Flatten a fitted XGBClassifier/XGBRegressor from its JSON model; ValueError if unsupported"""
+        learner = json.loads(bytes(model.get_booster().save_raw(raw_format='json')))['learner']
+        if learner['gradient_booster']['name'] != 'gbtree':
+            raise ValueError(f"unsupported booster {learner['gradient_booster']['name']!r}")
+        objective = learner['objective']['name']
+        if objective not in LINKS:
+            raise ValueError(f"unsupported objective {objective!r}")
+        params = learner['learner_model_param']
+        if int(params.get('num_target', 1)) > 1:
+            raise ValueError('multi-target models are not supported')
+        n_groups = max(1, int(params.get('num_class', 0)))
+
+        base_score = np.atleast_1d(np.asarray(json.loads(params['base_score']), dtype=np.float32))
+        if base_score.size == 1:
+            base_score = np.repeat(base_score, n_groups)
+        # base_score is stored as a probability for the logistic link
+        if LINKS[objective] == 'logistic':
+            base_score = np.log(base_score / (np.float32(1) - base_score)).astype(np.float32)
+
+        booster = learner['gradient_booster']['model']
+        trees, tree_info = booster['trees'], booster['tree_info']
+        best_iteration = getattr(model, 'best_iteration', None)
+        if best_iteration is not None:
+            per_iteration = int(booster['gbtree_model_param'].get('num_parallel_tree', 1)) * n_groups
+            trees, tree_info = trees[:(best_iteration + 1) * per_iteration], tree_info[:(best_iteration + 1) * per_iteration]
+
+        arrays = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'default_left': [], 'value': []}
+        roots, depth, offset = [], 0, 0
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError('categorical splits are not supported')
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            leaf = left == -1
+            nodes = np.arange(len(left)) + offset
+            arrays['feature'].append(np.where(leaf, 0, tree['split_indices']))
+            # NaN makes ``x < threshold`` false, so a leaf always steps "right" onto itself
+            arrays['threshold'].append(np.where(leaf, np.float32(np.nan), conditions))
+            arrays['left'].append(np.where(leaf, nodes, left + offset))
+            arrays['right'].append(np.where(leaf, nodes, right + offset))
+            arrays['default_left'].append(np.where(leaf, False, np.asarray(tree['default_left'], dtype=bool)))
+            arrays['value'].append(np.where(leaf, conditions, np.float32(0)))
+            depth = max(depth, cls._tree_depth(tree['parents']))
+            roots.append(offset)
+            offset += len(left)
+
+        flat = {name: np.ascontiguousarray(np.concatenate(parts)) for name, parts in arrays.items()}
+        return cls(flat['feature'].astype(np.int64), flat['threshold'].astype(np.float32),
+                   flat['left'].astype(np.int64), flat['right'].astype(np.int64),
+                   flat['default_left'].astype(bool), flat['value'].astype(np.float32),
+                   np.asarray(roots, dtype=np.int64), np.asarray(tree_info, dtype=np.int64), base_score,
+                   LINKS[objective], int(params['num_feature']), depth)
+
+    @staticmethod
+    def _tree_depth(parents) -> int:
+        # Node ids are assigned breadth-first, so a parent always precedes its children
+        depths = [0] * len(parents)
+        for node in range(1, len(parents)):
+            depths[node] = depths[parents[node]] + 1
+        return max(depths)
+
+    def margins(self, rows: np.ndarray) -> np.ndarray:
+        """(rows, groups) raw scores: base margin plus the leaf values, added tree by tree"""
+        rows = np.asarray(rows, dtype=np.float32)
+        if rows.ndim != 2 or rows.shape[1] != self.n_features:
+            raise ValueError(f"expected (rows, {self.n_features}) features, got {rows.shape}")
+        if rows.shape[0] > CHUNK_ROWS:
+            return np.concatenate([self.margins(rows[i:i + CHUNK_ROWS]) for i in range(0, rows.shape[0], CHUNK_ROWS)])
+
+        index = np.arange(rows.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (rows.shape[0], self.roots.size))
+        has_missing = np.isnan(rows).any()
+        for _ in range(self.depth):
+            x = rows[index, self.feature[node]]
+            go_left = x < self.threshold[node]
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaves = self.value[node]
+
+        margins = np.empty((rows.shape[0], len(self._group_trees)), dtype=np.float32)
+        for group, trees in enumerate(self._group_trees):
+            # cumulative sum keeps XGBoost's sequential float32 accumulation order
+            summed = np.column_stack([np.full(rows.shape[0], self.base_margin[group], dtype=np.float32),
+                                      leaves[:, trees]])
+            margins[:, group] = np.cumsum(summed, axis=1, dtype=np.float32)[:, -1]
+        return margins
+
+    def predict(self, rows: np.ndarray) -> np.ndarray:
+        """Same output as the model's ``predict`` (regression) or ``predict_proba`` (classification)"""
+        margins = self.margins(rows)
+        if self.link == 'identity':
+            return margins[:, 0]
+        if self.link == 'logistic':
+            positive = np.float32(1) / (np.float32(1) + _expf(-margins[:, 0]))
+            return np.column_stack([np.float32(1) - positive, positive])
+        # XGBoost's softmax: float32 exps summed in double, then one float32 division each
+        shifted = _expf(margins - margins.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True, dtype=np.float64).astype(np.float32)
+
+    def probe_rows(self, count: int, seed: int = 0, missing_rate: float = 0.0) -> np.ndarray:
+        """Model-space rows whose features sit on, or one ulp below, this ensemble's split thresholds"""
+        rng = np.random.default_rng(seed)
+        split = ~np.isnan(self.threshold)
+        rows = np.zeros((count, self.n_features), dtype=np.float32)
+        for feature in range(self.n_features):
+            thresholds = np.unique(self.threshold[split & (self.feature == feature)])
+            if thresholds.size == 0:
+                continue
+            candidates = np.concatenate([thresholds, np.nextafter(thresholds, np.float32(-np.inf))])
+            rows[:, feature] = rng.choice(candidates, size=count)
+        if missing_rate > 0:
+            rows[rng.random(rows.shape) < missing_rate] = np.nan
+        return rows
+
+
+class CompiledScaler:
+    """StandardScaler.transform as plain array arithmetic (same float64 operations, same result)"""
+
+    def __init__(self, mean: Optional[np.ndarray], scale: Optional[np.ndarray]):
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_sklearn(cls, scaler) -> 'CompiledScaler':
+        if type(scaler).__name__ != 'StandardScaler':
+            raise ValueError(f"unsupported scaler {type(scaler).__name__}")
+        return cls(scaler.mean_ if scaler.with_mean else None, scaler.scale_ if scaler.with_std else None)
+
+    def transform(self, rows: np.ndarray) -> np.ndarray:
+        rows = np.array(rows, dtype=np.float64)
+        if self.mean is not None:
+            rows -= self.mean
+        if self.scale is not None:
+            rows /= self.scale
+        return rows
+
+    def inverse_transform(self, rows: np.ndarray) -> np.ndarray:
+        rows = np.array(rows, dtype=np.float64)
+        if self.scale is not None:
+            rows *= self.scale
+        if self.mean is not None:
+            rows += self.mean
+        return rows
+
+
+class CompiledPipeline:
+    """Compiled scaler (optional) followed by a compiled ensemble for one task"""
+
+    def __init__(self, task: str, ensemble: CompiledTreeEnsemble, scaler: Optional[CompiledScaler] = None):
+        self.task = task
+        self.ensemble = ensemble
+        self.scaler = scaler
+
+    @classmethod
+    def compile(cls, task: str, model, scaler=None) -> 'CompiledPipeline':
+        return cls(task, CompiledTreeEnsemble.from_xgboost(model),
+                   CompiledScaler.from_sklearn(scaler) if scaler is not None else None)
+
+    def score(self, rows: np.ndarray) -> np.ndarray:
+        if self.scaler is not None:
+            rows = self.scaler.transform(rows)
+        return self.ensemble.predict(rows)
+
+
+def _parity(expected: np.ndarray, actual: np.ndarray, rtol: float, atol: float) -> Dict:
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.shape != actual.shape:
+        return {'rows': len(expected), 'exact': False, 'passed': False,
+                'error': f"shape {actual.shape} != {expected.shape}"}
+    diff = np.abs(expected - actual)
+    return {
+        'rows': len(expected),
+        'exact': bool(np.array_equal(expected, actual)),
+        'max_abs_diff': float(diff.max()) if diff.size else 0.0,
+        'mismatched_values': int(np.count_nonzero(diff)),
+        'passed': bool(np.all(diff <= atol + rtol * np.abs(expected)))
+    }
+
+
+def verify(pipeline: CompiledPipeline, model, scaler=None, rows: int = 1000, seed: int = 0,
+           rtol: float = RTOL, atol: float = ATOL) -> Dict:
+    """Compare the compiled path with the original model on threshold probe rows
+
+    ``ensemble`` scores the probes (with some missing values) directly against the model;
+    ``pipeline`` maps them back to raw feature space first so the scaler is covered too.
+    """
+    native = model.predict_proba if pipeline.task == 'classification' else model.predict
+    probes = pipeline.ensemble.probe_rows(rows, seed=seed, missing_rate=0.02)
+    report = {'ensemble': _parity(native(probes), pipeline.ensemble.predict(probes), rtol, atol)}
+    raw = pipeline.scaler.inverse_transform(pipeline.ensemble.probe_rows(rows, seed=seed + 1)) \
+        if pipeline.scaler is not None else probes
+    expected = native(scaler.transform(raw) if scaler is not None else raw)
+    report['pipeline'] = _parity(expected, pipeline.score(raw), rtol, atol)
+    report.update({'exact': report['ensemble']['exact'] and report['pipeline']['exact'],
+                   'passed': report['ensemble']['passed'] and report['pipeline']['passed'],
+                   'rtol': rtol, 'atol': atol})
+    return report
+
+
+def main():
+    from model_bundle import ModelBundle
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--models', default='models', help='model directory (flat layout or a version)')
+    parser.add_argument('--rows', type=int, default=2000, help='probe rows per parity check')
+    parser.add_argument('--repeat', type=int, default=200, help='single-row calls per latency measurement')
+    args = parser.parse_args()
+
+    bundle = ModelBundle.load(args.models)
+    for task, model in sorted(bundle.models.items()):
+        scaler = bundle.scalers.get(task)
+        pipeline = CompiledPipeline.compile(task, model, scaler)
+        report = verify(pipeline, model, scaler, rows=args.rows)
+        print(f"{task}: {pipeline.ensemble.roots.size} trees, depth {pipeline.ensemble.depth}, "
+              f"{'bit-for-bit' if report['exact'] else 'within tolerance' if report['passed'] else 'MISMATCH'}")
+        for check in ('ensemble', 'pipeline'):
+            print(f"  {check:<9} {json.dumps(report[check])}")
+
+        row = pipeline.scaler.inverse_transform(pipeline.ensemble.probe_rows(1, seed=7)) \
+            if pipeline.scaler is not None else pipeline.ensemble.probe_rows(1, seed=7)
+        native = model.predict_proba if task == 'classification' else model.predict
+        for name, score in (('native', lambda r: native(scaler.transform(r) if scaler is not None else r)),
+                            ('compiled', pipeline.score)):
+            score(row)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                score(row)
+            print(f"  {name:<9} {(time.perf_counter() - start) / args.repeat * 1e6:9.1f} µs per single-row call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Server-Sent Events Stream for the Real-time Dashboard
+One ticker thread builds each dashboard update once and fans the encoded frame out to every
+subscriber; predictions are pushed as they happen and recent frames are kept for Last-Event-ID resume
+"""
+
+from collections import deque
+from typing import Callable, Dict, Iterator, Optional
+import json
+import os
+import queue
+import threading
+import time
+
+# Client reconnect delay advertised in the stream (milliseconds)
+RETRY_MS = 3000
+
+
+class Subscriber:
+    """One connected client: a bounded queue of encoded frames"""
+
+    __slots__ = ('queue', 'dropped', 'connected_at')
+
+    def __init__(self, max_pending: int):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.dropped = False
+        self.connected_at = time.time()
+
+
+class DashboardBroadcaster:
+    """Fan-out of dashboard snapshots and prediction events to SSE subscribers"""
+
+    def __init__(self, snapshot: Callable[[], Dict], tick_interval: float = 5.0, heartbeat_interval: float = 15.0,
+                 history: int = 256, max_subscribers: int = 100, max_pending: int = 64):
+        self.snapshot = snapshot
+        self.tick_interval = max(0.1, float(tick_interval))
+        self.heartbeat_interval = max(0.1, float(heartbeat_interval))
+        self.max_subscribers = int(max_subscribers)
+        self.max_pending = max(1, int(max_pending))
+        self._history = deque(maxlen=max(1, int(history)))
+        self._subscribers = set()
+        self._last_id = 0
+        # Ids are "<epoch>-<n>": the counter is per process, so an id minted by another gunicorn worker
+        # (or before a restart) must not be mistaken for a position in this broadcaster's history
+        self.epoch = f"{os.getpid():x}{int(time.time() * 1000):x}"
+        self._last_dashboard = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stats = {'published': 0, 'ticks': 0, 'tick_errors': 0, 'dropped_subscribers': 0,
+                       'resumed': 0, 'rejected': 0, 'total_tick_time': 0.0}
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def start(self):
+        """Start the ticker thread (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='dashboard-stream', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            # Nothing is computed while nobody is listening
+            if self._subscribers:
+                start = time.perf_counter()
+                try:
+                    self.publish('dashboard', self.snapshot())
+                except Exception as e:
+                    print(f"❌ Dashboard stream tick failed: {e}")
+                    self._stats['tick_errors'] += 1
+                self._stats['ticks'] += 1
+                self._stats['total_tick_time'] += time.perf_counter() - start
+            self._wake.wait(self.tick_interval)
+            self._wake.clear()
+
+    def publish(self, event: str, data) -> int:
+        """Encode ``data`` once and queue it for every subscriber; returns the event id"""
+        payload = json.dumps(data, default=str, separators=(',', ':'))
+        with self._lock:
+            self._last_id += 1
+            event_id = self._last_id
+            frame = f"id: {self.epoch}-{event_id}\nevent: {event}\ndata: {payload}\n\n"
+            self._history.append((event_id, frame))
+            if event == 'dashboard':
+                self._last_dashboard = (event_id, frame)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.queue.put_nowait(frame)
+                except queue.Full:
+                    # A client this far behind reconnects and resumes from history instead
+                    subscriber.dropped = True
+                    self._subscribers.discard(subscriber)
+                    self._stats['dropped_subscribers'] += 1
+            self._stats['published'] += 1
+        return event_id
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Register a client, replaying events after ``last_event_id``; None when at capacity
+
+        An id from another epoch (another worker, or this one before a restart) cannot be resumed;
+        that client starts again from the latest snapshot.
+        """
+        self.start()
+        subscriber = Subscriber(self.max_pending + len(self._history))
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self._stats['rejected'] += 1
+                return None
+            replay = self._replay(last_event_id)
+            if replay is None:
+                # New client, or one whose last event is no longer in history: start from the latest snapshot
+                replay = [self._last_dashboard[1]] if self._last_dashboard else []
+                needs_snapshot = self._last_dashboard is None
+            else:
+                self._stats['resumed'] += 1
+                needs_snapshot = False
+            for frame in replay:
+                subscriber.queue.put_nowait(frame)
+            self._subscribers.add(subscriber)
+        if needs_snapshot:
+            self._wake.set()
+        return subscriber
+
+    def _replay(self, last_event_id: Optional[str]):
+        epoch, _, counter = (last_event_id or '').rpartition('-')
+        if epoch != self.epoch:
+            return None
+        try:
+            last_id = int(counter)
+        except ValueError:
+            return None
+        if not self._history or last_id < self._history[0][0] - 1 or last_id > self._last_id:
+            return None
+        return [frame for event_id, frame in self._history if event_id > last_id]
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber: Subscriber) -> Iterator[str]:
+        """SSE body for one subscriber: queued frames, with comment heartbeats while idle"""
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while not subscriber.dropped:
+                try:
+                    yield subscriber.queue.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    yield f": heartbeat {int(time.time())}\n\n"
+            # Flush what was queued before the drop so the client's Last-Event-ID is accurate
+            while True:
+                try:
+                    yield subscriber.queue.get_nowait()
+                except queue.Empty:
+                    break
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict:
+        """Subscriber count, event throughput and tick cost"""
+        with self._lock:
+            stats = dict(self._stats)
+            subscribers = len(self._subscribers)
+            last_id = self._last_id
+        ticks = stats['ticks']
+        stats.update({
+            'subscribers': subscribers,
+            'max_subscribers': self.max_subscribers,
+            'last_event_id': f"{self.epoch}-{last_id}",
+            'history': len(self._history),
+            'tick_interval_seconds': self.tick_interval,
+            'avg_tick_ms': stats.pop('total_tick_time') / ticks * 1000 if ticks else 0.0
+        })
+        return stats
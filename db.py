@@ -0,0 +1,422 @@
+"""
+Database Access Layer for EMI Risk Assessment
+Bounded pool of WAL-mode SQLite connections, schema bootstrap and the named SQL statements
+used by the web application
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import base64
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = 'financial_data.db'
+
+# Applied to every pooled connection; WAL lets readers run alongside the single writer
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,        # ~20 MB page cache per connection
+    'mmap_size': 268435456,      # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# sqlite3 keeps prepared statements per connection keyed on the SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# Columns written from a saved prediction, in INSERT order
+RECORD_COLUMNS = (
+    'age', 'gender', 'marital_status', 'education', 'monthly_salary', 'employment_type',
+    'years_of_employment', 'company_type', 'house_type', 'monthly_rent', 'family_size',
+    'dependents', 'school_fees', 'college_fees', 'travel_expenses', 'groceries_utilities',
+    'other_monthly_expenses', 'existing_loans', 'current_emi_amount', 'credit_score',
+    'bank_balance', 'emergency_fund', 'emi_scenario', 'requested_amount', 'requested_tenure',
+    'predicted_eligibility', 'predicted_emi_amount'
+)
+
+# Bulk imports may also carry the historic outcome and the original prediction date
+INGEST_COLUMNS = RECORD_COLUMNS + ('emi_eligibility', 'max_monthly_emi', 'prediction_date')
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS financial_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        age INTEGER,
+        gender TEXT,
+        marital_status TEXT,
+        education TEXT,
+        monthly_salary REAL,
+        employment_type TEXT,
+        years_of_employment REAL,
+        company_type TEXT,
+        house_type TEXT,
+        monthly_rent REAL,
+        family_size INTEGER,
+        dependents INTEGER,
+        school_fees REAL,
+        college_fees REAL,
+        travel_expenses REAL,
+        groceries_utilities REAL,
+        other_monthly_expenses REAL,
+        existing_loans TEXT,
+        current_emi_amount REAL,
+        credit_score REAL,
+        bank_balance REAL,
+        emergency_fund REAL,
+        emi_scenario TEXT,
+        requested_amount REAL,
+        requested_tenure REAL,
+        emi_eligibility TEXT,
+        max_monthly_emi REAL,
+        predicted_eligibility TEXT,
+        predicted_emi_amount REAL,
+        prediction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Keyset pagination runs newest first on (prediction_date, id), optionally within one eligibility class
+    "CREATE INDEX IF NOT EXISTS idx_records_date_id ON financial_records (prediction_date, id)",
+    """
+    CREATE INDEX IF NOT EXISTS idx_records_eligibility_date_id
+    ON financial_records (emi_eligibility, prediction_date, id)
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_records_credit_score ON financial_records (credit_score)",
+    "CREATE INDEX IF NOT EXISTS idx_records_salary ON financial_records (monthly_salary)",
+    # Dashboard aggregates, maintained in the same transaction as every insert ('' = no eligibility label)
+    """
+    CREATE TABLE IF NOT EXISTS eligibility_summary (
+        emi_eligibility TEXT PRIMARY KEY,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        salary_sum REAL NOT NULL DEFAULT 0,
+        salary_count INTEGER NOT NULL DEFAULT 0,
+        credit_score_sum REAL NOT NULL DEFAULT 0,
+        credit_score_count INTEGER NOT NULL DEFAULT 0,
+        max_emi_sum REAL NOT NULL DEFAULT 0,
+        max_emi_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS credit_category_summary (
+        credit_category TEXT PRIMARY KEY,
+        record_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+)
+
+# Upper bounds of the credit score buckets shown on the dashboard; anything else is Excellent
+CREDIT_CATEGORIES = ((600, 'Poor'), (700, 'Fair'), (750, 'Good'))
+
+# Columns returned by record listings
+RECORD_LIST_COLUMNS = ('id', 'age', 'gender', 'monthly_salary', 'credit_score', 'emi_eligibility',
+                       'max_monthly_emi', 'prediction_date')
+
+# Query-string filter -> (parameterized clause, coercion)
+RECORD_FILTERS = {
+    'eligibility': ('emi_eligibility = ?', str),
+    'min_credit_score': ('credit_score >= ?', float),
+    'max_credit_score': ('credit_score <= ?', float),
+    'min_salary': ('monthly_salary >= ?', float),
+    'max_salary': ('monthly_salary <= ?', float),
+    'date_from': ('prediction_date >= ?', str),
+    'date_to': ('prediction_date <= ?', str),
+}
+
+# Named statements shared by every route, so each connection prepares them once
+STATEMENTS = {
+    'summary_total': "SELECT TOTAL(record_count) FROM eligibility_summary",
+    'eligibility_summary': "SELECT * FROM eligibility_summary",
+    'credit_category_summary': "SELECT credit_category, record_count FROM credit_category_summary",
+    'upsert_eligibility_summary': """
+        INSERT INTO eligibility_summary
+        (emi_eligibility, record_count, salary_sum, salary_count, credit_score_sum, credit_score_count,
+         max_emi_sum, max_emi_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(emi_eligibility) DO UPDATE SET
+            record_count = record_count + excluded.record_count,
+            salary_sum = salary_sum + excluded.salary_sum,
+            salary_count = salary_count + excluded.salary_count,
+            credit_score_sum = credit_score_sum + excluded.credit_score_sum,
+            credit_score_count = credit_score_count + excluded.credit_score_count,
+            max_emi_sum = max_emi_sum + excluded.max_emi_sum,
+            max_emi_count = max_emi_count + excluded.max_emi_count
+    """,
+    'upsert_credit_category_summary': """
+        INSERT INTO credit_category_summary (credit_category, record_count) VALUES (?, ?)
+        ON CONFLICT(credit_category) DO UPDATE SET record_count = record_count + excluded.record_count
+    """,
+    'rebuild_eligibility_summary': """
+        INSERT INTO eligibility_summary
+        SELECT COALESCE(emi_eligibility, ''), COUNT(*),
+               TOTAL(monthly_salary), COUNT(monthly_salary),
+               TOTAL(credit_score), COUNT(credit_score),
+               TOTAL(max_monthly_emi), COUNT(max_monthly_emi)
+        FROM financial_records
+        GROUP BY COALESCE(emi_eligibility, '')
+    """,
+    'rebuild_credit_category_summary': """
+        INSERT INTO credit_category_summary
+        SELECT
+            CASE
+                WHEN credit_score < 600 THEN 'Poor'
+                WHEN credit_score < 700 THEN 'Fair'
+                WHEN credit_score < 750 THEN 'Good'
+                ELSE 'Excellent'
+            END as credit_category,
+            COUNT(*)
+        FROM financial_records
+        GROUP BY credit_category
+    """,
+    'records_page': f"""
+        SELECT {', '.join(RECORD_LIST_COLUMNS)}
+        FROM financial_records
+        ORDER BY prediction_date DESC, id DESC
+        LIMIT ? OFFSET ?
+    """,
+    'opportunities_for_record': """
+        SELECT * FROM balance_transfer_opportunities WHERE record_id = ? ORDER BY rank LIMIT ?
+    """,
+    'top_opportunities': """
+        SELECT * FROM balance_transfer_opportunities ORDER BY savings DESC LIMIT ?
+    """,
+    'insert_record': f"""
+        INSERT INTO financial_records ({', '.join(RECORD_COLUMNS)})
+        VALUES ({', '.join('?' for _ in RECORD_COLUMNS)})
+    """,
+    'insert_ingested_record': f"""
+        INSERT INTO financial_records ({', '.join(INGEST_COLUMNS)})
+        VALUES ({', '.join('?' for _ in INGEST_COLUMNS[:-1])}, COALESCE(?, CURRENT_TIMESTAMP))
+    """,
+}
+
+
+def parse_record_filters(args) -> Dict:
+    """Coerce the supported record filters out of a query-string mapping"""
+    filters = {}
+    for name, (_, coerce) in RECORD_FILTERS.items():
+        value = args.get(name)
+        if value in (None, ''):
+            continue
+        try:
+            filters[name] = coerce(value)
+        except ValueError:
+            raise ValueError(f"Invalid value for {name}: {value}")
+    # A bare date as the upper bound includes the whole day
+    if len(filters.get('date_to', '')) == 10:
+        filters['date_to'] += ' 23:59:59'
+    return filters
+
+
+def _where(filters: Dict, extra: List[str] = ()) -> Tuple[str, List]:
+    clauses = [RECORD_FILTERS[name][0] for name in RECORD_FILTERS if name in filters] + list(extra)
+    params = [filters[name] for name in RECORD_FILTERS if name in filters]
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+
+def records_query(filters: Dict, after: Optional[Tuple[str, int]] = None, limit: int = 50) -> Tuple[str, List]:
+    """Newest-first page of records strictly after the ``(prediction_date, id)`` keyset cursor"""
+    where, params = _where(filters, ['(prediction_date, id) < (?, ?)'] if after else [])
+    if after:
+        params += list(after)
+    sql = (f"SELECT {', '.join(RECORD_LIST_COLUMNS)} FROM financial_records{where} "
+           f"ORDER BY prediction_date DESC, id DESC LIMIT ?")
+    return sql, params + [int(limit)]
+
+
+def records_count_query(filters: Dict) -> Tuple[str, List]:
+    """COUNT(*) over the records matching ``filters``"""
+    where, params = _where(filters)
+    return f"SELECT COUNT(*) FROM financial_records{where}", params
+
+
+def encode_cursor(prediction_date: str, record_id: int) -> str:
+    """Opaque pagination token for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps([prediction_date, record_id]).encode()).decode()
+
+
+def decode_cursor(token: str) -> Tuple[str, int]:
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed token"""
+    try:
+        prediction_date, record_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return str(prediction_date), int(record_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def ensure_schema(conn):
+    """Create the application tables if they do not exist, seeding the summaries of an older database"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    summary_empty = conn.execute("SELECT 1 FROM eligibility_summary LIMIT 1").fetchone() is None
+    if summary_empty and conn.execute("SELECT 1 FROM financial_records LIMIT 1").fetchone() is not None:
+        rebuild_summary(conn)
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return None if value is None or value == '' else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def credit_category(score) -> str:
+    """Dashboard bucket for a credit score (same rules as the SQL rebuild)"""
+    score = _number(score)
+    if score is not None:
+        for upper_bound, name in CREDIT_CATEGORIES:
+            if score < upper_bound:
+                return name
+    return 'Excellent'
+
+
+def apply_to_summary(conn, records: Iterable[Mapping]):
+    """Fold newly inserted records into the summary tables; runs inside the caller's transaction"""
+    groups = {}
+    categories = Counter()
+    for record in records:
+        group = groups.setdefault(record.get('emi_eligibility') or '', [0, 0.0, 0, 0.0, 0, 0.0, 0])
+        group[0] += 1
+        for offset, column in ((1, 'monthly_salary'), (3, 'credit_score'), (5, 'max_monthly_emi')):
+            value = _number(record.get(column))
+            if value is not None:
+                group[offset] += value
+                group[offset + 1] += 1
+        categories[credit_category(record.get('credit_score'))] += 1
+
+    conn.executemany(STATEMENTS['upsert_eligibility_summary'],
+                     [(label, *values) for label, values in groups.items()])
+    conn.executemany(STATEMENTS['upsert_credit_category_summary'], list(categories.items()))
+
+
+def rebuild_summary(conn) -> int:
+    """Recompute the summary tables from financial_records in one transaction; returns the record count"""
+    with conn:
+        conn.execute("DELETE FROM eligibility_summary")
+        conn.execute("DELETE FROM credit_category_summary")
+        conn.execute(STATEMENTS['rebuild_eligibility_summary'])
+        conn.execute(STATEMENTS['rebuild_credit_category_summary'])
+    return int(conn.execute(STATEMENTS['summary_total']).fetchone()[0])
+
+
+def read_summary(conn) -> Dict:
+    """Dashboard aggregates from the summary tables, keyed by eligibility label (None = unlabelled)"""
+    eligibility = {}
+    for row in conn.execute(STATEMENTS['eligibility_summary']).fetchall():
+        eligibility[row['emi_eligibility'] or None] = dict(row)
+    credit = {row[0]: row[1] for row in conn.execute(STATEMENTS['credit_category_summary']).fetchall()}
+    return {'eligibility': eligibility, 'credit': credit}
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of SQLite connections shared across request threads"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_size: int = 8, timeout: float = 30.0,
+                 pragmas: Dict = None):
+        self.path = path
+        self.max_size = max(1, int(max_size))
+        self.timeout = float(timeout)
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._schema_ready = False
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        with self._lock:
+            if not self._schema_ready:
+                ensure_schema(conn)
+                self._schema_ready = True
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, opening a new one while below ``max_size``"""
+        start = time.perf_counter()
+        waited = False
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.max_size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                waited = True
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise TimeoutError(f"No database connection available within {self.timeout}s")
+
+        wait = time.perf_counter() - start
+        with self._lock:
+            self._checkouts += 1
+            self._waits += int(waited)
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection, rolling back anything the caller left uncommitted"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """``with pool.connection() as conn:`` checkout that always returns the connection"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict:
+        """Pool size, checkout counts and wait times for monitoring"""
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                'path': self.path,
+                'max_size': self.max_size,
+                'open_connections': self._created,
+                'idle_connections': idle,
+                'in_use': self._created - idle,
+                'checkouts': self._checkouts,
+                'waited_checkouts': self._waits,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': self._total_wait / self._checkouts * 1000 if self._checkouts else 0.0,
+                'max_wait_ms': self._max_wait * 1000,
+                'journal_mode': self.pragmas.get('journal_mode')
+            }
@@ -0,0 +1,330 @@
+"""
+Feature Encoder for EMI Risk Assessment Models
+Compiles a declarative feature specification into a columnar NumPy encoder that
+produces model-ready matrices for one customer or many customers at once
+"""
+
+from itertools import repeat
+from typing import Dict, List, Any, Optional, Union
+import numpy as np
+
+# Raw numeric inputs and the defaults used when a field is missing or empty
+NUMERIC_FIELDS = {
+    'age': 30,
+    'monthly_salary': 50000,
+    'years_of_employment': 5,
+    'monthly_rent': 25000,
+    'family_size': 3,
+    'dependents': 1,
+    'school_fees': 5000,
+    'college_fees': 0,
+    'travel_expenses': 5000,
+    'groceries_utilities': 15000,
+    'other_monthly_expenses': 5000,
+    'current_emi_amount': 0,
+    'credit_score': 700,
+    'bank_balance': 200000,
+    'emergency_fund': 100000,
+    'requested_amount': 500000,
+    'requested_tenure': 240,
+}
+
+# Categorical inputs: full training vocabulary (including the dropped baseline level)
+# plus aliases that map web form values onto the training categories
+CATEGORICAL_FIELDS = {
+    'gender': {
+        'default': 'Male',
+        'categories': ['F', 'FEMALE', 'Female', 'M', 'MALE', 'Male', 'female', 'male'],
+        'aliases': {},
+    },
+    'marital_status': {
+        'default': 'Married',
+        'categories': ['Married', 'Single'],
+        'aliases': {},
+    },
+    'education': {
+        'default': 'Graduate',
+        'categories': ['Graduate', 'High School', 'Post Graduate', 'Professional', 'Undergraduate', 'Others'],
+        'aliases': {'High_School': 'High School', 'School': 'High School',
+                    'Post_Graduate': 'Post Graduate', 'Postgraduate': 'Post Graduate'},
+    },
+    'employment_type': {
+        'default': 'Private',
+        'categories': ['Government', 'Private', 'Self-employed', 'Contract'],
+        'aliases': {'Self_Employed': 'Self-employed', 'Self Employed': 'Self-employed'},
+    },
+    'company_type': {
+        'default': 'MNC',
+        'categories': ['Large Indian', 'MNC', 'Mid-size', 'Small', 'Startup', 'Others'],
+        'aliases': {'SME': 'Small'},
+    },
+    'house_type': {
+        'default': 'Rented',
+        'categories': ['Family', 'Own', 'Rented'],
+        'aliases': {'Owned': 'Own'},
+    },
+    'existing_loans': {
+        'default': 'No',
+        'categories': ['No', 'Yes'],
+        'aliases': {},
+    },
+    'emi_scenario': {
+        'default': 'New_Loan',
+        'categories': ['E-commerce Shopping EMI', 'Education EMI', 'Home Appliances EMI',
+                       'Personal Loan EMI', 'Vehicle EMI'],
+        'aliases': {},
+    },
+}
+
+# Ordinal scores derived from categorical inputs: (source field, score per category, fallback)
+ORDINAL_FEATURES = {
+    'employment_stability': ('employment_type',
+                             {'Government': 4, 'Private': 3, 'Self-employed': 2, 'Contract': 1}, 1),
+    'education_score': ('education',
+                        {'Graduate': 4, 'Post Graduate': 5, 'Undergraduate': 3, 'High School': 2, 'Others': 1}, 1),
+    'house_ownership_score': ('house_type', {'Own': 3, 'Rented': 1, 'Family': 2}, 1),
+}
+
+# Right-inclusive bins over numeric inputs: (source field, bin edges, labels)
+BINNED_FIELDS = {
+    'age_group': ('age', [0, 25, 35, 45, 55, 100],
+                  ['Young', 'Young_Adult', 'Middle_Age', 'Senior', 'Elder']),
+    'income_category': ('monthly_salary', [0, 30000, 50000, 80000, np.inf],
+                        ['Low_Income', 'Medium_Income', 'High_Income', 'Very_High_Income']),
+    'credit_category': ('credit_score', [0, 600, 700, 750, 850],
+                        ['Poor', 'Fair', 'Good', 'Excellent']),
+    'family_size_category': ('family_size', [0, 2, 4, 6, 20],
+                             ['Small', 'Medium', 'Large', 'Very_Large']),
+}
+
+# Engineered ratio features computed from the numeric block
+DERIVED_FEATURES = [
+    'debt_to_income_ratio', 'savings_ratio', 'total_monthly_expenses', 'expense_to_income_ratio',
+    'disposable_income', 'requested_to_income_ratio', 'financial_buffer_score', 'risk_score',
+]
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """Element-wise numerator / denominator * scale, with 0 where the denominator is not positive"""
+    out = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out * scale
+
+
+def derive_features(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Compute the engineered financial ratios for whole columns at once"""
+    salary = columns['monthly_salary']
+    savings = columns['bank_balance'] + columns['emergency_fund']
+    total_expenses = (columns['monthly_rent'] + columns['school_fees'] + columns['college_fees'] +
+                      columns['travel_expenses'] + columns['groceries_utilities'] +
+                      columns['other_monthly_expenses'])
+
+    derived = {
+        'debt_to_income_ratio': _safe_ratio(columns['current_emi_amount'], salary, 100),
+        'savings_ratio': _safe_ratio(savings, salary),
+        'total_monthly_expenses': total_expenses,
+        'expense_to_income_ratio': _safe_ratio(total_expenses, salary, 100),
+        'disposable_income': salary - total_expenses - columns['current_emi_amount'],
+        'requested_to_income_ratio': _safe_ratio(columns['requested_amount'], salary),
+        'financial_buffer_score': _safe_ratio(savings, columns['requested_amount']),
+    }
+    derived['risk_score'] = (
+        derived['debt_to_income_ratio'] * 0.3 +
+        derived['expense_to_income_ratio'] * 0.2 +
+        (100 - columns['credit_score'] / 8.5) * 0.25 +
+        (1 / columns['employment_stability']) * 10 * 0.15 +
+        (1 / columns['education_score']) * 10 * 0.1
+    )
+    return derived
+
+
+class EncodedFrame:
+    """Coerced input columns and category codes shared by every model that encodes the same rows"""
+
+    __slots__ = ('size', 'columns', 'codes', 'errors')
+
+    def __init__(self, size: int, columns: Dict[str, np.ndarray], codes: Dict[str, np.ndarray],
+                 errors: List[Optional[str]]):
+        self.size = size
+        self.columns = columns
+        self.codes = codes
+        self.errors = errors
+
+    def valid_rows(self) -> np.ndarray:
+        """Indices of rows that were coerced without errors"""
+        return np.array([i for i, error in enumerate(self.errors) if error is None], dtype=int)
+
+
+class FeatureEncoder:
+    """Columnar encoder compiled from the feature specification for one model's feature layout"""
+
+    def __init__(self, feature_names: List[str], expected_count: Optional[int] = None):
+        self.feature_names = list(feature_names)
+        if expected_count is not None and len(self.feature_names) != expected_count:
+            raise ValueError(f"Feature count mismatch: feature_names.pkl lists {len(self.feature_names)} "
+                             f"features but the model expects {expected_count}")
+        if len(set(self.feature_names)) != len(self.feature_names):
+            raise ValueError("Duplicate feature names in feature layout")
+
+        self._category_lookup = {}
+        for field, spec in CATEGORICAL_FIELDS.items():
+            lookup = {category: code for code, category in enumerate(spec['categories'])}
+            for alias, category in spec['aliases'].items():
+                lookup[alias] = lookup[category]
+            # Explicit nulls fall back to the field default, like a missing key
+            lookup[None] = lookup.get(spec['default'], -1)
+            self._category_lookup[field] = lookup
+
+        # Ordinal tables are indexed by category code; the trailing slot (code -1) holds the fallback
+        self._ordinal_tables = {}
+        for feature, (field, scores, fallback) in ORDINAL_FEATURES.items():
+            categories = CATEGORICAL_FIELDS[field]['categories']
+            table = [float(scores.get(category, fallback)) for category in categories] + [float(fallback)]
+            self._ordinal_tables[feature] = (field, np.array(table))
+
+        self._compile()
+
+    def _compile(self):
+        """Resolve every feature name to a dense column or a one-hot slot, failing on anything unknown"""
+        dense_sources = set(NUMERIC_FIELDS) | set(DERIVED_FEATURES) | set(ORDINAL_FEATURES)
+        onehot_groups = {field: spec['categories'] for field, spec in CATEGORICAL_FIELDS.items()}
+        onehot_groups.update({field: labels for field, (_, _, labels) in BINNED_FIELDS.items()})
+        # Longest prefix first so e.g. "family_size_category_" wins over "family_size_"
+        group_prefixes = sorted(onehot_groups, key=len, reverse=True)
+
+        dense_index, dense_names = [], []
+        # One-hot tables map category code -> output column; the trailing slot (code -1) maps to -1
+        onehot_tables = {field: np.full(len(levels) + 1, -1, dtype=np.intp)
+                         for field, levels in onehot_groups.items()}
+
+        for position, name in enumerate(self.feature_names):
+            if name in dense_sources:
+                dense_index.append(position)
+                dense_names.append(name)
+                continue
+
+            group = next((g for g in group_prefixes if name.startswith(g + '_')), None)
+            level = name[len(group) + 1:] if group else None
+            if group is None or level not in onehot_groups[group]:
+                raise ValueError(f"Feature '{name}' is not described by the feature specification")
+            onehot_tables[group][onehot_groups[group].index(level)] = position
+
+        self._dense_index = np.array(dense_index, dtype=np.intp)
+        self._dense_names = dense_names
+        self._onehot_tables = {field: table for field, table in onehot_tables.items() if (table >= 0).any()}
+
+    @property
+    def feature_count(self) -> int:
+        return len(self.feature_names)
+
+    def extract(self, records: Union[Dict, List[Dict]]) -> EncodedFrame:
+        """Coerce raw customer dicts into typed columns and category codes, collecting per-row errors"""
+        if isinstance(records, dict):
+            records = [records]
+        size = len(records)
+        errors: List[Optional[str]] = [None] * size
+
+        columns = {}
+        for field, default in NUMERIC_FIELDS.items():
+            columns[field] = self._coerce_numeric(field, [r.get(field) for r in records], default, errors)
+
+        codes = {}
+        for field in CATEGORICAL_FIELDS:
+            codes[field] = self._coerce_category(field, [r.get(field) for r in records], errors)
+
+        return self._finish_frame(size, columns, codes, errors)
+
+    def extract_columns(self, values: Dict[str, Any], size: int) -> EncodedFrame:
+        """Build a frame from column-oriented input: each field is a scalar (broadcast) or a length-``size`` array"""
+        errors: List[Optional[str]] = [None] * size
+        # Broadcast scalars describe every row, so a bad scalar is an error for the whole request
+        scalar_errors: List[Optional[str]] = [None]
+
+        columns = {}
+        for field, default in NUMERIC_FIELDS.items():
+            value = values.get(field)
+            if np.ndim(value) == 0:
+                columns[field] = np.full(size, self._coerce_numeric(field, [value], default, scalar_errors)[0])
+            else:
+                columns[field] = self._coerce_numeric(field, value, default, errors)
+
+        codes = {}
+        for field in CATEGORICAL_FIELDS:
+            value = values.get(field)
+            if np.ndim(value) == 0:
+                codes[field] = np.full(size, self._coerce_category(field, [value], scalar_errors)[0], dtype=np.intp)
+            else:
+                codes[field] = self._coerce_category(field, list(value), errors)
+
+        if scalar_errors[0] is not None:
+            raise ValueError(scalar_errors[0])
+        return self._finish_frame(size, columns, codes, errors)
+
+    def _finish_frame(self, size: int, columns: Dict[str, np.ndarray], codes: Dict[str, np.ndarray],
+                      errors: List[Optional[str]]) -> EncodedFrame:
+        """Add ordinal scores, bin codes and derived ratios to coerced columns"""
+        for feature, (field, table) in self._ordinal_tables.items():
+            columns[feature] = table[codes[field]]
+
+        for feature, (field, edges, labels) in BINNED_FIELDS.items():
+            bucket = np.searchsorted(np.asarray(edges, dtype=float), columns[field], side='left') - 1
+            codes[feature] = np.where((bucket >= 0) & (bucket < len(labels)), bucket, -1)
+
+        columns.update(derive_features(columns))
+        return EncodedFrame(size, columns, codes, errors)
+
+    def assemble(self, frame: EncodedFrame) -> np.ndarray:
+        """Lay an extracted frame out as a (rows, features) matrix in this model's feature order"""
+        matrix = np.zeros((frame.size, self.feature_count), dtype=float)
+        if frame.size == 0:
+            return matrix
+
+        matrix[:, self._dense_index] = np.column_stack([frame.columns[name] for name in self._dense_names])
+
+        rows = np.arange(frame.size)
+        for field, table in self._onehot_tables.items():
+            targets = table[frame.codes[field]]
+            hit = targets >= 0
+            matrix[rows[hit], targets[hit]] = 1.0
+        return matrix
+
+    def encode(self, records: Union[Dict, List[Dict]]) -> np.ndarray:
+        """Encode one customer dict or a list of dicts, raising on the first invalid row"""
+        frame = self.extract(records)
+        for index, error in enumerate(frame.errors):
+            if error is not None:
+                raise ValueError(error if frame.size == 1 else f"Row {index}: {error}")
+        return self.assemble(frame)
+
+    @staticmethod
+    def _coerce_numeric(field: str, values: List[Any], default: float, errors: List[Optional[str]]) -> np.ndarray:
+        """Convert one column to float in a single NumPy call, falling back per value only on bad input"""
+        try:
+            column = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            column = np.empty(len(values), dtype=float)
+            for i, value in enumerate(values):
+                try:
+                    column[i] = float(value) if value not in ('', None) else np.nan
+                except (TypeError, ValueError):
+                    column[i] = np.nan
+                    if errors[i] is None:
+                        errors[i] = f"Invalid value for {field}: {value!r}"
+        # Missing (None / empty) values take the field default
+        return np.where(np.isnan(column), float(default), column)
+
+    def _coerce_category(self, field: str, values: List[Any], errors: List[Optional[str]]) -> np.ndarray:
+        """Map one categorical column to integer codes; unknown levels become -1 (all-zero one-hot)"""
+        lookup = self._category_lookup[field]
+        try:
+            return np.fromiter(map(lookup.get, values, repeat(-1, len(values))), dtype=np.intp, count=len(values))
+        except TypeError:
+            # Unhashable values (lists, dicts) are reported per row
+            codes = np.full(len(values), -1, dtype=np.intp)
+            for i, value in enumerate(values):
+                try:
+                    codes[i] = lookup.get(value, -1)
+                except TypeError:
+                    if errors[i] is None:
+                        errors[i] = f"Invalid value for {field}: {value!r}"
+            return codes
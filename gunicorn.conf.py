@@ -0,0 +1,32 @@
+"""
+Gunicorn Configuration for the EMI Risk Assessment App
+The master loads every model artifact once and freezes it out of the garbage collector, so forked
+workers share those pages copy-on-write; each worker then builds its own real-time manager
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+
+def on_starting(server):
+    # Resolve bundles exactly as the workers do (models/versions/CURRENT, else the flat layout), so
+    # the workers find these registries already loaded instead of loading private copies
+    from model_bundle import resolve_bundle_path
+    from model_registry import get_registry
+    # None is the serving bundle; a shadow candidate is loaded by every worker too
+    for version in [None] + ([os.environ['EMI_SHADOW_VERSION']] if os.environ.get('EMI_SHADOW_VERSION') else []):
+        try:
+            get_registry(resolve_bundle_path('models', version)).preload()
+        except (ValueError, FileNotFoundError) as e:
+            # Left to the workers, which report and handle a bad version themselves
+            server.log.warning(f"Model bundle {version or 'CURRENT'} not preloaded: {e}")
+
+
+def post_worker_init(worker):
+    # Threads (MLflow refresher, stats ticker) must start after the fork, never in the master
+    from app import init_app
+    init_app()
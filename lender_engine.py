@@ -0,0 +1,180 @@
+"""
+Lender Matching Engine for EMI Risk Assessment
+Loads the lender catalogue once (reloading when the CSV changes), indexes it for eligibility
+filtering and prices every eligible lender for a profile in one vectorized pass
+"""
+
+from typing import Dict, List
+import csv
+import os
+import threading
+import time
+import numpy as np
+
+from amortization import calculate_emi
+
+DEFAULT_LENDER_DATABASE = os.path.join('models', 'lender_database.csv')
+
+# Numeric catalogue columns and the text columns carried through to responses
+LENDER_NUMERIC_COLUMNS = ('base_rate', 'processing_fee_percent', 'credit_score_min', 'income_min', 'max_tenure')
+LENDER_TEXT_COLUMNS = ('code', 'name', 'type')
+
+SORT_KEYS = ('total_cost', 'interest_rate', 'emi', 'approval_probability')
+
+
+def customized_rate(base_rate, credit_score, monthly_income, employment_type, existing_emi=0.0) -> np.ndarray:
+    """Profile-adjusted rate per lender (same rules as calculateCustomizedRate in lenders_enhanced.js)"""
+    base_rate = np.asarray(base_rate, dtype=float)
+    credit_score = np.asarray(credit_score, dtype=float)
+    monthly_income = np.asarray(monthly_income, dtype=float)
+    employment_type = np.asarray(employment_type, dtype=object)
+
+    adjustment = np.select(
+        [credit_score >= 800, credit_score >= 750, credit_score < 650, credit_score < 700],
+        [-0.5, -0.25, 0.75, 0.25], 0.0)
+    adjustment = adjustment + np.select([monthly_income >= 100000, monthly_income < 30000], [-0.25, 0.5], 0.0)
+    adjustment = adjustment + np.select(
+        [employment_type == 'Government', np.isin(employment_type, ('Self_Employed', 'Self-employed'))],
+        [-0.25, 0.5], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi_ratio = np.where(monthly_income > 0, np.asarray(existing_emi, dtype=float) / monthly_income * 100, 0.0)
+    adjustment = adjustment + np.where(emi_ratio > 30, 0.25, 0.0)
+
+    return np.clip(base_rate + adjustment, base_rate - 1, base_rate + 2)
+
+
+def approval_probability(credit_score_min, credit_score, monthly_income, employment_type, total_emi) -> np.ndarray:
+    """Heuristic approval probability per lender (same rules as calculateApprovalProbability)"""
+    margin = np.asarray(credit_score, dtype=float) - np.asarray(credit_score_min, dtype=float)
+    monthly_income = np.asarray(monthly_income, dtype=float)
+    employment_type = np.asarray(employment_type, dtype=object)
+
+    probability = 0.5 + np.select([margin >= 100, margin >= 50, margin >= 0], [0.3, 0.2, 0.1], -0.4)
+    probability = probability + np.select([employment_type == 'Government', employment_type == 'Private'],
+                                          [0.2, 0.1], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi_ratio = np.where(monthly_income > 0, np.asarray(total_emi, dtype=float) / monthly_income * 100, np.inf)
+    probability = probability + np.select([emi_ratio <= 40, emi_ratio > 60], [0.1, -0.2], 0.0)
+    return np.clip(probability, 0.1, 0.95)
+
+
+class LenderCatalog:
+    """Immutable column arrays for one version of the lender table, sorted by credit_score_min"""
+
+    __slots__ = ('columns', 'size', 'mtime', 'loaded_at')
+
+    def __init__(self, rows: List[Dict], mtime: float):
+        columns = {}
+        for name in LENDER_NUMERIC_COLUMNS:
+            columns[name] = np.array([float(row[name]) for row in rows], dtype=float)
+        for name in LENDER_TEXT_COLUMNS:
+            columns[name] = np.array([str(row[name]).strip() for row in rows], dtype=object)
+
+        # Primary index: lenders ordered by minimum credit score, so the credit filter is a prefix slice
+        order = np.argsort(columns['credit_score_min'], kind='stable')
+        self.columns = {name: values[order] for name, values in columns.items()}
+        self.size = len(rows)
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+    def eligible(self, credit_score: float, monthly_income: float, tenure_months: float) -> np.ndarray:
+        """Indices of lenders whose credit, income and tenure limits admit the profile"""
+        prefix = int(np.searchsorted(self.columns['credit_score_min'], credit_score, side='right'))
+        mask = ((self.columns['income_min'][:prefix] <= monthly_income) &
+                (self.columns['max_tenure'][:prefix] >= tenure_months))
+        return np.flatnonzero(mask)
+
+
+class LenderEngine:
+    """Serves lender matches from the catalogue CSV, reloading it when its mtime changes"""
+
+    def __init__(self, path: str = DEFAULT_LENDER_DATABASE, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = float(check_interval)
+        self._catalog = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def catalog(self) -> LenderCatalog:
+        """Current catalogue snapshot, reloaded if the file changed since the last check"""
+        now = time.monotonic()
+        if self._catalog is not None and now - self._last_check < self.check_interval:
+            return self._catalog
+
+        with self._lock:
+            self._last_check = now
+            mtime = os.path.getmtime(self.path)
+            if self._catalog is None or mtime != self._catalog.mtime:
+                with open(self.path, newline='', encoding='utf-8') as handle:
+                    rows = list(csv.DictReader(handle))
+                missing = [c for c in LENDER_NUMERIC_COLUMNS + LENDER_TEXT_COLUMNS if rows and c not in rows[0]]
+                if missing:
+                    raise ValueError(f"Lender database is missing columns: {', '.join(missing)}")
+                self._catalog = LenderCatalog(rows, mtime)
+                print(f"✅ Loaded {self._catalog.size} lenders from {self.path}")
+            return self._catalog
+
+    def match(self, loan_amount: float, tenure_months: float, credit_score: float, monthly_income: float,
+              employment_type: str = 'Private', existing_emi: float = 0.0, sort_by: str = 'total_cost',
+              top_k: int = 10) -> Dict:
+        """Price every eligible lender for one profile and return the best ``top_k`` by ``sort_by``"""
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}")
+        catalog = self.catalog()
+        eligible = catalog.eligible(credit_score, monthly_income, tenure_months)
+        lenders = {name: values[eligible] for name, values in catalog.columns.items()}
+
+        rate = customized_rate(lenders['base_rate'], credit_score, monthly_income, employment_type, existing_emi)
+        emi = calculate_emi(loan_amount, rate, tenure_months)
+        total_payment = emi * tenure_months
+        processing_fee = loan_amount * lenders['processing_fee_percent'] / 100
+        total_cost = total_payment + processing_fee
+        probability = approval_probability(lenders['credit_score_min'], credit_score, monthly_income,
+                                           employment_type, existing_emi + emi)
+
+        metrics = {
+            'interest_rate': rate,
+            'emi': emi,
+            'processing_fee': processing_fee,
+            'total_interest': total_payment - loan_amount,
+            'total_payment': total_payment,
+            'total_cost': total_cost,
+            'approval_probability': probability * 100
+        }
+        # Highest approval probability first; cheapest first for every other key
+        ranking = -metrics[sort_by] if sort_by == 'approval_probability' else metrics[sort_by]
+        top = np.argsort(ranking, kind='stable')[:max(int(top_k), 0)]
+
+        matches = [{
+            'code': lenders['code'][i],
+            'lender': lenders['name'][i],
+            'type': lenders['type'][i],
+            'interest_rate': round(float(rate[i]), 2),
+            'emi': round(float(emi[i]), 2),
+            'processing_fee': round(float(processing_fee[i]), 2),
+            'total_interest': round(float(metrics['total_interest'][i]), 2),
+            'total_payment': round(float(total_payment[i]), 2),
+            'total_cost': round(float(total_cost[i]), 2),
+            'approval_probability': round(float(metrics['approval_probability'][i]), 1),
+            'max_tenure': int(lenders['max_tenure'][i])
+        } for i in top]
+
+        return {
+            'catalog_size': catalog.size,
+            'eligible_count': int(eligible.size),
+            'matches': matches
+        }
+
+    def stats(self) -> Dict:
+        """Catalogue size and load time for monitoring"""
+        catalog = self._catalog
+        return {
+            'path': self.path,
+            'loaded': catalog is not None,
+            'size': catalog.size if catalog else 0,
+            'loaded_at': catalog.loaded_at if catalog else None
+        }
+
+
+# Shared engine; the catalogue is read on first use
+lender_engine = LenderEngine()
@@ -0,0 +1,165 @@
+"""
+Metrics Core for EMI Risk Assessment
+Thread-safe counters and fixed-bucket latency histograms with windowed percentiles
+(1 min / 5 min / 1 h) for endpoints and models
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+import math
+import threading
+import time
+import numpy as np
+
+# Reporting windows in seconds
+WINDOWS = {'1m': 60, '5m': 300, '1h': 3600}
+
+# Histogram time slices; a window sums the slices it covers, so percentiles are exact to one slice
+SLICE_SECONDS = 10
+
+# Log-spaced bucket upper bounds from 50 µs to ~2 min (~7% relative error per bucket)
+BUCKET_BOUNDS = tuple(50e-6 * 1.07 ** i for i in range(int(math.log(120 / 50e-6, 1.07)) + 2))
+
+
+def _series_key(name: str, labels: Dict) -> Tuple:
+    return (name,) + tuple(sorted(labels.items()))
+
+
+class Counter:
+    """Monotonic counter guarded by its own lock"""
+
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram kept in SLICE_SECONDS time slices for the longest window"""
+
+    def __init__(self, retention: int = max(WINDOWS.values())):
+        self.retention = retention
+        self._slices = {}
+        self._lock = threading.Lock()
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def observe(self, seconds: float, count: int = 1):
+        """Record ``count`` observations of ``seconds`` each"""
+        if count <= 0:
+            return
+        bucket = min(bisect_left(BUCKET_BOUNDS, seconds), len(BUCKET_BOUNDS) - 1)
+        slice_id = int(time.time() // SLICE_SECONDS)
+        with self._lock:
+            counts = self._slices.get(slice_id)
+            if counts is None:
+                counts = self._slices[slice_id] = np.zeros(len(BUCKET_BOUNDS), dtype=np.int64)
+                # New slice: drop the ones that fell out of the longest window
+                oldest = slice_id - self.retention // SLICE_SECONDS
+                for stale in [s for s in self._slices if s <= oldest]:
+                    del self._slices[stale]
+            counts[bucket] += count
+            self.total_count += count
+            self.total_sum += seconds * count
+
+    def window(self, seconds: int) -> np.ndarray:
+        """Bucket counts over the last ``seconds``"""
+        first = int(time.time() // SLICE_SECONDS) - seconds // SLICE_SECONDS + 1
+        with self._lock:
+            slices = [counts for slice_id, counts in self._slices.items() if slice_id >= first]
+            return np.sum(slices, axis=0) if slices else np.zeros(len(BUCKET_BOUNDS), dtype=np.int64)
+
+    @staticmethod
+    def percentiles(counts: np.ndarray, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict:
+        """Bucket upper bounds (in ms) at each quantile of ``counts``"""
+        total = int(counts.sum())
+        summary = {'count': total}
+        cumulative = np.cumsum(counts)
+        for q in quantiles:
+            key = f"p{int(round(q * 100))}_ms"
+            if total == 0:
+                summary[key] = None
+            else:
+                index = int(np.searchsorted(cumulative, q * total))
+                summary[key] = round(BUCKET_BOUNDS[min(index, len(BUCKET_BOUNDS) - 1)] * 1000, 3)
+        return summary
+
+    def summary(self) -> Dict:
+        """Percentiles for every reporting window plus lifetime count and mean"""
+        result = {name: self.percentiles(self.window(seconds)) for name, seconds in WINDOWS.items()}
+        result['lifetime'] = {
+            'count': self.total_count,
+            'mean_ms': round(self.total_sum / self.total_count * 1000, 3) if self.total_count else None
+        }
+        return result
+
+
+class MetricsRegistry:
+    """Named, labelled counters and histograms; each series has its own lock"""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = _series_key(name, labels)
+        series = self._counters.get(key)
+        if series is None:
+            with self._lock:
+                series = self._counters.setdefault(key, Counter())
+        return series
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        key = _series_key(name, labels)
+        series = self._histograms.get(key)
+        if series is None:
+            with self._lock:
+                series = self._histograms.setdefault(key, LatencyHistogram())
+        return series
+
+    def increment(self, name: str, amount: int = 1, **labels):
+        self.counter(name, **labels).increment(amount)
+
+    def observe(self, name: str, seconds: float, count: int = 1, **labels):
+        self.histogram(name, **labels).observe(seconds, count)
+
+    def latency_summary(self, name: str, label: str) -> Dict:
+        """Windowed percentiles of histogram ``name`` per value of ``label``, plus an 'all' rollup"""
+        with self._lock:
+            series = [(dict(key[1:]).get(label), hist) for key, hist in self._histograms.items() if key[0] == name]
+        result = {}
+        combined = {window: np.zeros(len(BUCKET_BOUNDS), dtype=np.int64) for window in WINDOWS}
+        for value, hist in series:
+            result[str(value)] = hist.summary()
+            for window, seconds in WINDOWS.items():
+                combined[window] += hist.window(seconds)
+        result['all'] = {window: LatencyHistogram.percentiles(counts) for window, counts in combined.items()}
+        return result
+
+    def snapshot(self) -> Dict:
+        """Every counter value and histogram summary, keyed by 'name{label=value,...}'"""
+        def render(key):
+            labels = ','.join(f"{k}={v}" for k, v in key[1:])
+            return f"{key[0]}{{{labels}}}" if labels else key[0]
+
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = list(self._histograms.items())
+        return {
+            'counters': {render(key): counter.value for key, counter in counters},
+            'histograms': {render(key): hist.summary() for key, hist in histograms}
+        }
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
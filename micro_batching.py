@@ -0,0 +1,172 @@
+"""
+Micro-batching Dispatcher for Single Predictions
+Coalesces concurrent single-customer eligibility and EMI requests into one batched model call per
+task; the collection window opens only when requests are arriving fast enough to fill it
+"""
+
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, Dict, List
+import queue
+import threading
+import time
+
+from metrics import metrics
+
+# Smoothing factor for the inter-arrival time average
+ARRIVAL_ALPHA = 0.2
+
+
+def _size_bucket(size: int) -> str:
+    """Power-of-two batch size bucket: '1', '2', '3-4', '5-8', ..."""
+    if size <= 2:
+        return str(size)
+    upper = 1 << (size - 1).bit_length()
+    return f"{upper // 2 + 1}-{upper}"
+
+
+class TaskLane:
+    """Queue, scorer thread and load estimate for one task"""
+
+    def __init__(self, task: str):
+        self.task = task
+        self.queue = queue.Queue()
+        self.thread = None
+        self.last_arrival = None
+        self.mean_gap = None
+        self.window = 0.0
+        self.stats = {'requests': 0, 'dispatched': 0, 'batches': 0, 'failed_batches': 0, 'windowed_batches': 0,
+                      'timeouts': 0, 'max_batch_size': 0, 'batch_sizes': {}}
+
+
+class MicroBatcher:
+    """Dispatcher in front of ``score(task, customers) -> results``; ``predict`` blocks on the caller's future"""
+
+    def __init__(self, score: Callable[[str, List[Dict]], List[Dict]], max_batch: int = 32,
+                 max_wait: float = 0.002, timeout: float = 5.0, tasks=('classification', 'regression')):
+        self.score = score
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.timeout = timeout
+        self._lanes = {task: TaskLane(task) for task in tasks}
+        self._lock = threading.Lock()
+
+    def _start(self, lane: TaskLane):
+        if lane.thread is None or not lane.thread.is_alive():
+            with self._lock:
+                if lane.thread is None or not lane.thread.is_alive():
+                    lane.thread = threading.Thread(target=self._run, args=(lane,), name=f"micro-batch-{lane.task}",
+                                                   daemon=True)
+                    lane.thread.start()
+
+    def submit(self, task: str, customer: Dict) -> Future:
+        """Queue one customer for ``task``; the future resolves to that customer's result"""
+        lane = self._lanes[task]
+        self._start(lane)
+        future = Future()
+        now = time.perf_counter()
+        with self._lock:
+            if lane.last_arrival is not None:
+                gap = now - lane.last_arrival
+                lane.mean_gap = gap if lane.mean_gap is None else \
+                    ARRIVAL_ALPHA * gap + (1 - ARRIVAL_ALPHA) * lane.mean_gap
+            lane.last_arrival = now
+            lane.stats['requests'] += 1
+        lane.queue.put((customer, future, now))
+        return future
+
+    def predict(self, task: str, customer: Dict) -> Dict:
+        """Batched result for one customer; scored directly if the lane has not answered within ``timeout``"""
+        future = self.submit(task, customer)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # A stuck lane must not hold request threads; withdraw the request and score it here
+            future.cancel()
+            with self._lock:
+                self._lanes[task].stats['timeouts'] += 1
+            return self.score(task, [customer])[0]
+
+    def _window(self, lane: TaskLane) -> float:
+        # Wait for company only if another request is expected within the window; an idle
+        # lane dispatches immediately, so a lone request pays no added latency
+        if lane.mean_gap is None or lane.mean_gap >= self.max_wait:
+            return 0.0
+        if time.perf_counter() - lane.last_arrival >= self.max_wait:
+            return 0.0
+        return self.max_wait
+
+    def _run(self, lane: TaskLane):
+        while True:
+            batch = [lane.queue.get()]
+            # Whatever queued up while the previous batch was scoring joins without any wait
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(lane.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lane.window = self._window(lane)
+            deadline = batch[0][2] + lane.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(lane.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(lane, batch)
+
+    def _dispatch(self, lane: TaskLane, batch):
+        # Requests withdrawn by a timed-out caller are not scored
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        start = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            metrics.observe('microbatch_queue_wait', start - enqueued_at, model=lane.task)
+        try:
+            results = self.score(lane.task, [customer for customer, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"scorer returned {len(results)} results for {len(batch)} requests")
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            failed = False
+        except Exception as e:
+            # Futures resolved before the failure keep their results
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            failed = True
+        metrics.observe('microbatch_call', time.perf_counter() - start, model=lane.task)
+
+        bucket = _size_bucket(len(batch))
+        with self._lock:
+            stats = lane.stats
+            stats['batches'] += 1
+            stats['dispatched'] += len(batch)
+            stats['failed_batches'] += failed
+            stats['windowed_batches'] += lane.window > 0
+            stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+            stats['batch_sizes'][bucket] = stats['batch_sizes'].get(bucket, 0) + 1
+
+    def stats(self) -> Dict:
+        """Per-task batch size distribution, current window and arrival rate, plus queue-wait percentiles"""
+        tasks = {}
+        with self._lock:
+            for task, lane in self._lanes.items():
+                stats = dict(lane.stats, batch_sizes=dict(lane.stats['batch_sizes']))
+                stats.update({
+                    'avg_batch_size': stats['dispatched'] / stats['batches'] if stats['batches'] else 0.0,
+                    'queue_depth': lane.queue.qsize(),
+                    'window_ms': lane.window * 1000,
+                    'arrivals_per_second': 1 / lane.mean_gap if lane.mean_gap else None,
+                    'running': lane.thread is not None and lane.thread.is_alive()
+                })
+                tasks[task] = stats
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'tasks': tasks,
+            'queue_wait': metrics.latency_summary('microbatch_queue_wait', 'model'),
+            'batch_call': metrics.latency_summary('microbatch_call', 'model')
+        }
@@ -0,0 +1,211 @@
+"""
+MLflow Metrics Refresher for the Real-time Dashboard
+Polls the MLflow tracking store from a background thread (with per-fetch timeouts and
+exponential backoff) and publishes an immutable snapshot that requests read without blocking
+"""
+
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Tuple
+import importlib.util
+import random
+import threading
+import time
+from datetime import datetime
+
+# MLflow is optional and slow to import, so it is only imported by the refresher thread
+MLFLOW_AVAILABLE = importlib.util.find_spec('mlflow') is not None
+
+# mlflow.entities.ViewType.ACTIVE_ONLY
+ACTIVE_ONLY = 1
+
+
+def _default_client_factory(tracking_uri: Optional[str]):
+    def build():
+        from mlflow.tracking import MlflowClient
+        return MlflowClient(tracking_uri=tracking_uri)
+    return build
+
+# Dashboard metric -> MLflow metric keys, in order of preference
+METRIC_KEYS = {
+    'classification_accuracy': ('accuracy',),
+    'regression_r2': ('r2', 'r2_score'),
+    'total_predictions': ('predictions',),
+    'avg_response_time': ('avg_response_time',)
+}
+
+
+def _empty_snapshot(status: str) -> Mapping:
+    return MappingProxyType({
+        'status': status,
+        'metrics': MappingProxyType({name: None for name in METRIC_KEYS}),
+        'runs': MappingProxyType({}),
+        'experiments': 0,
+        'version': 0,
+        'last_updated': None,
+        'last_attempt': None,
+        'fetch_ms': None,
+        'last_error': None,
+        'consecutive_failures': 0
+    })
+
+
+class MlflowMetricsRefresher:
+    """Background poller of the latest MLflow run metrics; ``snapshot()`` never touches MLflow"""
+
+    def __init__(self, tracking_uri: Optional[str] = None, interval: float = 30.0, timeout: float = 10.0,
+                 max_backoff: float = 300.0, experiment_filter: Optional[str] = None,
+                 client_factory: Optional[Callable] = None):
+        self.tracking_uri = tracking_uri
+        self.interval = max(0.1, float(interval))
+        self.timeout = max(0.1, float(timeout))
+        self.max_backoff = max(self.interval, float(max_backoff))
+        self.experiment_filter = experiment_filter
+        self.client_factory = client_factory or (_default_client_factory(tracking_uri) if MLFLOW_AVAILABLE else None)
+        self._snapshot = _empty_snapshot('pending' if self.enabled else 'disabled')
+        self._client = None
+        self._inflight = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.client_factory is not None
+
+    def snapshot(self) -> Mapping:
+        """Latest published snapshot (read-only; replaced wholesale on every refresh)"""
+        return self._snapshot
+
+    def metrics(self) -> Dict:
+        """Dashboard metrics from the last successful refresh, or {} if there has been none"""
+        snapshot = self._snapshot
+        if snapshot['last_updated'] is None:
+            return {}
+        return dict(snapshot['metrics'], last_updated=snapshot['last_updated'])
+
+    def status(self) -> Dict:
+        """JSON-ready copy of the snapshot plus the polling configuration"""
+        snapshot = self._snapshot
+        return dict(snapshot, metrics=dict(snapshot['metrics']), runs=dict(snapshot['runs']),
+                    interval_seconds=self.interval, timeout_seconds=self.timeout,
+                    experiment_filter=self.experiment_filter,
+                    running=self._thread is not None and self._thread.is_alive())
+
+    def start(self):
+        """Start the polling thread (idempotent; no-op when MLflow is not installed)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='mlflow-refresher', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def request_refresh(self):
+        """Ask the polling thread to refresh now instead of waiting for the next tick"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.refresh()
+            failures = self._snapshot['consecutive_failures']
+            delay = self.interval if not failures else min(self.interval * 2 ** failures, self.max_backoff)
+            # Jitter keeps several workers from hitting the tracking server in lockstep
+            self._wake.wait(delay * random.uniform(0.9, 1.1))
+            self._wake.clear()
+
+    def refresh(self) -> Mapping:
+        """Fetch once with a timeout and publish the result; returns the new snapshot"""
+        if not self.enabled:
+            return self._snapshot
+        started = time.perf_counter()
+        attempt = datetime.now().isoformat()
+        try:
+            fetched = self._fetch_with_timeout()
+        except Exception as e:
+            previous = self._snapshot
+            snapshot = dict(previous, status='error', last_attempt=attempt, last_error=str(e),
+                            consecutive_failures=previous['consecutive_failures'] + 1)
+        else:
+            values, runs, experiments = fetched
+            previous = self._snapshot
+            # Bumped only when the published metrics change, so pollers can skip unchanged snapshots
+            changed = values != dict(previous['metrics']) or runs != dict(previous['runs'])
+            snapshot = {
+                'status': 'ok',
+                'metrics': MappingProxyType(values),
+                'runs': MappingProxyType(runs),
+                'experiments': experiments,
+                'version': previous['version'] + 1 if changed else previous['version'],
+                'last_updated': attempt,
+                'last_attempt': attempt,
+                'fetch_ms': round((time.perf_counter() - started) * 1000, 3),
+                'last_error': None,
+                'consecutive_failures': 0
+            }
+        self._snapshot = MappingProxyType(snapshot)
+        return self._snapshot
+
+    def _fetch_with_timeout(self) -> Tuple[Dict, Dict, int]:
+        # A hung fetch is abandoned rather than waited on; no new one starts until it finishes
+        inflight = self._inflight
+        if inflight is not None and inflight[0].is_alive():
+            raise TimeoutError('previous MLflow fetch is still running')
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome['value'] = self.fetch()
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=target, name='mlflow-fetch', daemon=True)
+        self._inflight = (thread, outcome)
+        thread.start()
+        thread.join(self.timeout)
+        if thread.is_alive():
+            raise TimeoutError(f"MLflow fetch timed out after {self.timeout:g}s")
+        if 'error' in outcome:
+            self._client = None
+            raise outcome['error']
+        return outcome['value']
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def fetch(self) -> Tuple[Dict, Dict, int]:
+        """Query MLflow directly: (metrics, run ids per metric, experiments searched)"""
+        client = self._get_client()
+        experiments = client.search_experiments(view_type=ACTIVE_ONLY, filter_string=self.experiment_filter)
+        experiment_ids = [experiment.experiment_id for experiment in experiments]
+        values = {name: None for name in METRIC_KEYS}
+        runs = {}
+        if not experiment_ids:
+            return values, runs, 0
+
+        for name, keys in METRIC_KEYS.items():
+            for key in keys:
+                # Only the newest finished run that logged this metric, filtered by the store
+                found = client.search_runs(
+                    experiment_ids,
+                    filter_string=f"attributes.status = 'FINISHED' and metrics.`{key}` > -1e308",
+                    max_results=1,
+                    order_by=['attributes.start_time DESC']
+                )
+                if found:
+                    value = found[0].data.metrics.get(key)
+                    values[name] = int(value) if name == 'total_predictions' else float(value)
+                    runs[name] = found[0].info.run_id
+                    break
+        return values, runs, len(experiment_ids)
@@ -0,0 +1,205 @@
+"""
+Versioned Model Bundles for EMI Risk Assessment
+A bundle is everything one model version needs (models, scalers, label encoder, feature names,
+metadata and compiled feature encoders), built off the request path and swapped in as a unit
+"""
+
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import time
+
+from compiled_trees import CompiledPipeline, verify
+from feature_encoder import FeatureEncoder
+from model_registry import ARTIFACTS, get_registry
+
+# Versions live in <model_path>/versions/<version>/ with the same file names as the flat layout;
+# <model_path>/versions/CURRENT names the active one. Without it the flat <model_path> is used.
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+
+# Largest call scored by a compiled pipeline; XGBoost's own multi-threaded predictor wins beyond ~16 rows
+COMPILED_MAX_ROWS = 16
+
+
+def versions_root(model_path: str) -> str:
+    return os.path.join(model_path, VERSIONS_DIR)
+
+
+def available_versions(model_path: str) -> List[str]:
+    """Version directories under ``model_path``/versions, sorted by name"""
+    root = versions_root(model_path)
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def current_version_name(model_path: str) -> Optional[str]:
+    """Version named by the CURRENT pointer file, or None when the flat layout is active"""
+    try:
+        with open(os.path.join(versions_root(model_path), CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def resolve_bundle_path(model_path: str, version: Optional[str] = None) -> str:
+    """Directory holding ``version`` (or the CURRENT one, falling back to the flat layout)"""
+    version = version or current_version_name(model_path)
+    if version is None:
+        return model_path
+    if os.path.basename(version) != version or version in ('.', '..'):
+        raise ValueError(f"Invalid model version {version!r}")
+    path = os.path.join(versions_root(model_path), version)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Model version {version!r} not found")
+    return path
+
+
+def fingerprint(model_path: str) -> Tuple:
+    """(path, mtime, size) of the CURRENT pointer and every artifact of the active bundle"""
+    entries = []
+    pointer = os.path.join(versions_root(model_path), CURRENT_FILE)
+    try:
+        path = resolve_bundle_path(model_path)
+    except (ValueError, FileNotFoundError):
+        path = model_path
+    for candidate in [pointer] + [os.path.join(path, filename) for filename in ARTIFACTS.values()]:
+        try:
+            stat = os.stat(candidate)
+            entries.append((candidate, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            entries.append((candidate, None, None))
+    return tuple(entries)
+
+
+def _content_version(path: str) -> str:
+    digest = hashlib.sha1()
+    for filename in ('classification_model.pkl', 'regression_model.pkl'):
+        try:
+            with open(os.path.join(path, filename), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            continue
+    return digest.hexdigest()[:12]
+
+
+def build_feature_encoders(models: Dict, scalers: Dict, feature_names) -> Dict[str, FeatureEncoder]:
+    """Compile one FeatureEncoder per model, validated against feature_names.pkl and the fitted model"""
+    feature_encoders = {}
+    for task in ('classification', 'regression'):
+        names = feature_names.get(task) if isinstance(feature_names, dict) else None
+        if not names:
+            print(f"❌ No feature names for {task} model; predictions are disabled")
+            continue
+
+        expected = getattr(models.get(task), 'n_features_in_', None)
+        scaler_expected = getattr(scalers.get(task), 'n_features_in_', None)
+        try:
+            if expected is not None and scaler_expected is not None and expected != scaler_expected:
+                raise ValueError(f"{task} model expects {expected} features but its scaler expects {scaler_expected}")
+            feature_encoders[task] = FeatureEncoder(names, expected_count=expected or scaler_expected)
+            print(f"✅ {task.capitalize()} feature encoder compiled ({len(names)} features)")
+        except ValueError as e:
+            print(f"❌ Failed to compile {task} feature encoder: {e}")
+    return feature_encoders
+
+
+class ModelBundle:
+    """One immutable model version; requests hold a reference for their whole duration"""
+
+    def __init__(self, version: Optional[str], path: Optional[str], models: Dict, scalers: Dict, encoders: Dict,
+                 feature_names, metadata: Dict, feature_encoders: Dict, errors: Dict, load_ms: float = 0.0):
+        self.version = version
+        self.path = path
+        self.models = models
+        self.scalers = scalers
+        self.encoders = encoders
+        self.feature_names = feature_names
+        self.metadata = metadata
+        self.feature_encoders = feature_encoders
+        self.errors = errors
+        self.load_ms = load_ms
+        self.loaded_at = time.time()
+        self.warmup = None
+        self.compiled = {}
+        self.inference = {}
+
+    @classmethod
+    def empty(cls) -> 'ModelBundle':
+        return cls(None, None, {}, {}, {}, {}, {}, {}, {})
+
+    @classmethod
+    def load(cls, path: str, force: bool = False) -> 'ModelBundle':
+        """Load the artifacts in ``path`` through the shared registry and compile the feature encoders"""
+        start = time.perf_counter()
+        registry = get_registry(path)
+        registry.load(force=force)
+        errors = {name: registry.error(name) for name in ARTIFACTS if registry.error(name)}
+
+        models, scalers, encoders = {}, {}, {}
+        for name, target, key in (
+            ('classification_model', models, 'classification'),
+            ('regression_model', models, 'regression'),
+            ('scaler_classification', scalers, 'classification'),
+            ('scaler_regression', scalers, 'regression'),
+            ('label_encoder', encoders, 'label')
+        ):
+            if registry.get(name) is not None:
+                target[key] = registry.get(name)
+        feature_names = registry.get('feature_names', {})
+        metadata = registry.get('model_metadata') or {}
+
+        version = metadata.get('version') if isinstance(metadata, dict) else None
+        if not version:
+            in_versions = os.path.dirname(os.path.abspath(path)).endswith(os.sep + VERSIONS_DIR)
+            version = os.path.basename(os.path.abspath(path)) if in_versions else _content_version(path)
+
+        feature_encoders = build_feature_encoders(models, scalers, feature_names)
+        return cls(str(version), path, models, scalers, encoders, feature_names, metadata, feature_encoders,
+                   errors, load_ms=round((time.perf_counter() - start) * 1000, 3))
+
+    def compile(self, verify_rows: int = 1000) -> Dict:
+        """Build compiled pipelines for small calls; a task whose parity check fails stays on its model"""
+        for task, model in sorted(self.models.items()):
+            start = time.perf_counter()
+            info = {'backend': 'native'}
+            try:
+                pipeline = CompiledPipeline.compile(task, model, self.scalers.get(task))
+                info['parity'] = verify(pipeline, model, self.scalers.get(task), rows=verify_rows)
+                if info['parity']['passed']:
+                    self.compiled[task] = pipeline
+                    info['backend'] = 'compiled'
+                else:
+                    print(f"❌ Compiled {task} model failed its parity check; using the model directly")
+            except Exception as e:
+                info['error'] = str(e)
+                print(f"❌ Could not compile {task} model: {e}")
+            info['compile_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            self.inference[task] = info
+        return self.inference
+
+    def score(self, task: str, matrix):
+        """Scale a feature matrix and run ``task``'s model: class probabilities or predicted EMIs"""
+        compiled = self.compiled.get(task)
+        if compiled is not None and len(matrix) <= COMPILED_MAX_ROWS:
+            return compiled.score(matrix)
+        if task in self.scalers:
+            matrix = self.scalers[task].transform(matrix)
+        if task == 'classification':
+            return self.models[task].predict_proba(matrix)
+        return self.models[task].predict(matrix)
+
+    def describe(self) -> Dict:
+        metadata = self.metadata if isinstance(self.metadata, dict) else {}
+        return {
+            'version': self.version,
+            'path': self.path,
+            'models': sorted(self.models),
+            'training_date': metadata.get('training_date'),
+            'load_ms': self.load_ms,
+            'loaded_at': self.loaded_at,
+            'errors': self.errors,
+            'inference': self.inference,
+            'warmup': self.warmup
+        }
@@ -0,0 +1,212 @@
+"""
+Model Registry for EMI Risk Assessment
+Loads every model artifact exactly once per process tree, detecting its serialization format up
+front, and keeps the loaded objects shareable copy-on-write across forked gunicorn workers
+"""
+
+from typing import Any, Dict, Optional
+import gc
+import os
+import pickle
+import threading
+import time
+import weakref
+
+try:
+    import psutil
+except Exception:
+    psutil = None
+
+# Registry name -> file in the model directory
+ARTIFACTS = {
+    'classification_model': 'classification_model.pkl',
+    'regression_model': 'regression_model.pkl',
+    'scaler_classification': 'scaler_classification.pkl',
+    'scaler_regression': 'scaler_regression.pkl',
+    'label_encoder': 'label_encoder.pkl',
+    'feature_names': 'feature_names.pkl',
+    'model_metadata': 'model_metadata.pkl'
+}
+
+# Leading bytes of joblib's compressed containers (zlib, gzip, bz2, xz, lzma)
+COMPRESSED_MAGIC = (b'ZF', b'\x78', b'\x1f\x8b', b'BZh', b'\xfd7zXZ', b'\x5d\x00\x00')
+
+# Marker pickled by joblib for numpy arrays stored inline after the pickle opcodes
+JOBLIB_ARRAY_MARKER = b'joblib.numpy_pickle'
+
+
+def detect_format(path: str) -> str:
+    """'pickle' or 'joblib', decided from the file bytes without unpickling anything"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(COMPRESSED_MAGIC):
+        return 'joblib'
+    if JOBLIB_ARRAY_MARKER in data:
+        return 'joblib'
+    return 'pickle'
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None when it cannot be read"""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss
+        except Exception:
+            pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return None
+
+
+class ArtifactInfo:
+    """Load bookkeeping for one artifact"""
+
+    __slots__ = ('name', 'path', 'format', 'size_bytes', 'load_ms', 'rss_delta_bytes', 'error')
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.format = None
+        self.size_bytes = None
+        self.load_ms = None
+        self.rss_delta_bytes = None
+        self.error = None
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ModelRegistry:
+    """Process-wide store of loaded artifacts; load once in a preloading master, share with workers"""
+
+    def __init__(self, model_path: str = 'models'):
+        self.model_path = model_path
+        self._objects = {}
+        self._info = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.loaded_pid = None
+        self.loaded_at = None
+        self.frozen = False
+        _live_registries.add(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, force: bool = False) -> Dict[str, ArtifactInfo]:
+        """Load every artifact present in ``model_path`` (no-op once loaded unless ``force``)"""
+        with self._lock:
+            if self._loaded and not force:
+                return self._info
+            objects, info = {}, {}
+            for name, filename in ARTIFACTS.items():
+                path = os.path.join(self.model_path, filename)
+                if not os.path.exists(path):
+                    continue
+                info[name] = self._load_artifact(name, path, objects)
+            self._objects, self._info = objects, info
+            self._loaded = True
+            self.loaded_pid = os.getpid()
+            self.loaded_at = time.time()
+            return info
+
+    @staticmethod
+    def _load_artifact(name: str, path: str, objects: Dict) -> ArtifactInfo:
+        artifact = ArtifactInfo(name, path)
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            artifact.size_bytes = os.path.getsize(path)
+            artifact.format = detect_format(path)
+            if artifact.format == 'joblib':
+                import joblib
+                objects[name] = joblib.load(path)
+            else:
+                with open(path, 'rb') as f:
+                    objects[name] = pickle.load(f)
+        except Exception as e:
+            artifact.error = str(e)
+        artifact.load_ms = round((time.perf_counter() - start) * 1000, 3)
+        rss_after = _rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            artifact.rss_delta_bytes = rss_after - rss_before
+        return artifact
+
+    def freeze(self):
+        """Move everything loaded so far out of the garbage collector's reach before forking
+
+        Without this, a collection in a worker touches the GC headers of the shared objects and
+        copies their pages, undoing the copy-on-write sharing.
+        """
+        if hasattr(gc, 'freeze'):
+            gc.collect()
+            gc.freeze()
+            self.frozen = True
+
+    def preload(self) -> Dict[str, ArtifactInfo]:
+        """Load and freeze; call in a gunicorn master with ``preload_app`` before workers fork"""
+        info = self.load()
+        self.freeze()
+        return info
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._objects.get(name, default)
+
+    def error(self, name: str) -> Optional[str]:
+        artifact = self._info.get(name)
+        return artifact.error if artifact is not None else None
+
+    def stats(self) -> Dict:
+        """Per-artifact format, size, load time and resident-memory delta, plus sharing state"""
+        info = self._info
+        load_times = [a.load_ms for a in info.values() if a.load_ms is not None]
+        return {
+            'model_path': self.model_path,
+            'loaded': self._loaded,
+            'pid': os.getpid(),
+            'loaded_pid': self.loaded_pid,
+            'shared_from_parent': self.loaded_pid is not None and self.loaded_pid != os.getpid(),
+            'gc_frozen': self.frozen,
+            'loaded_at': self.loaded_at,
+            'total_load_ms': round(sum(load_times), 3),
+            'rss_bytes': _rss_bytes(),
+            'artifacts': {name: artifact.to_dict() for name, artifact in info.items()}
+        }
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+# Every registry still alive, held weakly so a discarded registry can be freed
+_live_registries = weakref.WeakSet()
+
+
+def _reset_locks_after_fork():
+    # A lock held by another thread at fork time would stay locked forever in the child
+    global _registries_lock
+    _registries_lock = threading.Lock()
+    for registry in list(_live_registries):
+        registry._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_locks_after_fork)
+
+
+def discard_registry(model_path: str):
+    """Forget a registry (e.g. a retired model version) so its objects can be freed"""
+    with _registries_lock:
+        _registries.pop(os.path.abspath(model_path), None)
+
+
+def get_registry(model_path: str = 'models') -> ModelRegistry:
+    """Shared registry for a model directory"""
+    key = os.path.abspath(model_path)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(key, ModelRegistry(model_path))
+    return registry
@@ -0,0 +1,115 @@
+"""
+Prepayment Strategy Optimizer
+Searches prepayment amount, month and strategy in vectorized batches and returns the
+Pareto frontier of interest saved vs cash outlay under a liquidity constraint
+"""
+
+from typing import Dict
+import time
+import numpy as np
+
+from amortization import evaluate_scenarios
+
+# Strategies searched by the optimizer (keys of evaluate_scenarios)
+STRATEGIES = ('reduce_tenure', 'reduce_emi')
+
+
+def liquidity_cap(bank_balance: float, emergency_fund: float, cash_buffer: float = 0.0,
+                  emergency_fund_usable: float = 0.0) -> float:
+    """Cash that can go into a prepayment: bank balance above the buffer plus a usable share of the emergency fund"""
+    usable_share = min(max(float(emergency_fund_usable), 0.0), 1.0)
+    return max(float(bank_balance) - float(cash_buffer), 0.0) + max(float(emergency_fund), 0.0) * usable_share
+
+
+def pareto_frontier(outlay: np.ndarray, saved: np.ndarray) -> np.ndarray:
+    """Indices of points not dominated on (lower outlay, higher interest saved), ordered by outlay"""
+    if outlay.size == 0:
+        return np.array([], dtype=int)
+    order = np.lexsort((-saved, outlay))
+    best_so_far = np.maximum.accumulate(saved[order])
+    previous_best = np.concatenate(([-np.inf], best_so_far[:-1]))
+    return order[saved[order] > previous_best]
+
+
+def optimize_prepayment(principal: float, annual_rate: float, tenure_months: float, bank_balance: float,
+                        emergency_fund: float, current_emi=None, cash_buffer: float = 0.0,
+                        emergency_fund_usable: float = 0.0, amount_steps: int = 100, month_step: int = 1,
+                        max_month=None, batch_size: int = 4096, budget_ms: float = 100.0,
+                        max_candidates: int = 200000) -> Dict:
+    """Evaluate amount x month x strategy candidates within ``budget_ms`` and return the Pareto frontier
+
+    The amount x month grid is capped at ``max_candidates`` points by widening the month stride,
+    and batches are drawn from it lazily, so neither memory nor setup time grows with the tenure.
+    """
+    start = time.perf_counter()
+    cap = liquidity_cap(bank_balance, emergency_fund, cash_buffer, emergency_fund_usable)
+    result = {
+        'liquidity_cap': cap,
+        'candidates': 0,
+        'evaluated': 0,
+        'truncated': False,
+        'month_step': max(int(month_step), 1),
+        'frontier': [],
+        'best': None
+    }
+    if cap <= 0:
+        result['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return result
+
+    max_candidates = max(int(max_candidates), 1)
+    amount_steps = min(max(int(amount_steps), 1), max_candidates)
+    last_month = int(tenure_months) - 1 if max_month is None else min(int(max_month), int(tenure_months) - 1)
+    month_count = max(last_month, 0) + 1
+    # Widen the month stride until the whole grid fits under the ceiling
+    month_step = max(result['month_step'], -(-month_count * amount_steps // max_candidates))
+    result['month_step'] = month_step
+    amounts = np.linspace(cap / amount_steps, cap, amount_steps)
+    months = np.arange(0, month_count, month_step)
+    grid_size = amounts.size * months.size
+    result['candidates'] = int(grid_size) * len(STRATEGIES)
+
+    # Shuffle grid indices so that a budget cut-off still leaves an even sample of the search space
+    order = np.random.default_rng(0).permutation(grid_size)
+
+    kept = {'amount': [], 'month': [], 'strategy': [], 'outlay': [], 'saved': [], 'emi': [], 'tenure': []}
+    budget = budget_ms / 1000
+    for offset in range(0, grid_size, batch_size):
+        if offset and time.perf_counter() - start > budget:
+            result['truncated'] = True
+            break
+        amount_index, month_index = np.divmod(order[offset:offset + batch_size], months.size)
+        batch_amounts = amounts[amount_index]
+        batch_months = months[month_index]
+        scenarios = evaluate_scenarios(principal, annual_rate, tenure_months, current_emi,
+                                       prepayment_amount=batch_amounts, prepayment_month=batch_months)
+        result['evaluated'] += batch_amounts.size * len(STRATEGIES)
+
+        for strategy_index, strategy in enumerate(STRATEGIES):
+            scenario = scenarios[strategy]
+            # Only this batch's frontier can contribute to the global frontier
+            frontier = pareto_frontier(scenario['cash_outlay'], scenario['interest_saved'])
+            kept['amount'].append(batch_amounts[frontier])
+            kept['month'].append(batch_months[frontier])
+            kept['strategy'].append(np.full(frontier.size, strategy_index))
+            kept['outlay'].append(scenario['cash_outlay'][frontier])
+            kept['saved'].append(scenario['interest_saved'][frontier])
+            kept['emi'].append(scenario['emi'][frontier])
+            kept['tenure'].append(scenario['tenure_months'][frontier])
+
+    merged = {key: np.concatenate(values) if values else np.array([]) for key, values in kept.items()}
+    frontier = pareto_frontier(merged['outlay'], merged['saved'])
+    result['frontier'] = [{
+        'prepayment_amount': round(float(merged['amount'][i]), 2),
+        'prepayment_month': int(merged['month'][i]),
+        'strategy': STRATEGIES[int(merged['strategy'][i])],
+        'cash_outlay': round(float(merged['outlay'][i]), 2),
+        'interest_saved': round(float(merged['saved'][i]), 2),
+        'new_emi': round(float(merged['emi'][i]), 2),
+        'new_tenure_months': round(float(merged['tenure'][i]), 1),
+        'roi_percent': round(float(merged['saved'][i] / merged['outlay'][i] * 100), 2) if merged['outlay'][i] > 0 else 0.0
+    } for i in frontier]
+    if result['frontier']:
+        result['best'] = max(result['frontier'], key=lambda point: point['interest_saved'])
+
+    result['elapsed_ms'] = (time.perf_counter() - start) * 1000
+    return result
@@ -3,39 +3,106 @@ Real-time Data Manager for EMI Risk Assessment Dashboard
 Handles model predictions, metrics tracking, and real-time data updates
 """
 
+from contextlib import contextmanager
+import functools
 import json
-import pickle
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 import threading
 import time
-import joblib
-from sklearn.preprocessing import StandardScaler, LabelEncoder
 import random
 from typing import Dict, List, Any
 import os
 
+from feature_encoder import EncodedFrame
+from prediction_cache import PredictionCache
+from recent_predictions import RecentPredictions
+from mlflow_metrics import MlflowMetricsRefresher
+from model_bundle import ModelBundle, available_versions, fingerprint, resolve_bundle_path
+from model_registry import discard_registry
+from shadow_scoring import ShadowScorer
+from amortization import calculate_emi
+from metrics import metrics
+
 # Optional integrations
 try:
     import psutil
 except Exception:
     psutil = None
 
-try:
-    import mlflow
-    from mlflow.tracking import MlflowClient
-except Exception:
-    mlflow = None
-    MlflowClient = None
+# What-if sweep axes; interest_rate only affects the EMI formula, the others are model inputs
+SWEEP_MODEL_AXES = ('requested_amount', 'requested_tenure', 'monthly_salary', 'credit_score')
+SWEEP_AXES = ('requested_amount', 'requested_tenure', 'interest_rate', 'monthly_salary', 'credit_score')
+DEFAULT_WHATIF_RATE = 8.5  # % p.a., same default as the what-if page
+MAX_SWEEP_AXIS_POINTS = 500
+
+# Profiles scored by every new model bundle before it is swapped in
+WARMUP_PROFILES = [
+    {'age': 30, 'monthly_salary': 80000, 'credit_score': 750, 'requested_amount': 500000, 'requested_tenure': 36},
+    {'age': 45, 'monthly_salary': 30000, 'credit_score': 580, 'requested_amount': 900000, 'requested_tenure': 12,
+     'current_emi_amount': 12000, 'existing_loans': 'Yes'},
+    {'age': 26, 'monthly_salary': 150000, 'credit_score': 820, 'requested_amount': 200000, 'requested_tenure': 60,
+     'employment_type': 'Government', 'education': 'Post Graduate'}
+]
+
+# Recent predictions sent with each dashboard update (the buffer itself may hold many more)
+DASHBOARD_RECENT_PREDICTIONS = 50
+
+# Dashboard payload sections tracked for delta updates
+DASHBOARD_SECTIONS = ('system_stats', 'real_time_data', 'recent_predictions', 'model_status', 'mlflow_metrics')
+
+
+def sweep_axis_values(name: str, spec) -> np.ndarray:
+    """Expand a sweep range spec (list, {start, stop, step} or {min, max, steps}) into axis values"""
+    if isinstance(spec, dict):
+        if 'step' in spec:
+            start, stop, step = float(spec['start']), float(spec['stop']), float(spec['step'])
+            if step <= 0:
+                raise ValueError(f"{name}: step must be positive")
+            values = np.arange(start, stop + step / 2, step)
+        else:
+            values = np.linspace(float(spec['min']), float(spec['max']), int(spec.get('steps', 10)))
+    elif isinstance(spec, (list, tuple)):
+        values = np.asarray(spec, dtype=float)
+    else:
+        values = np.asarray([spec], dtype=float)
+    
+    if values.size == 0:
+        raise ValueError(f"{name}: range is empty")
+    if values.size > MAX_SWEEP_AXIS_POINTS:
+        raise ValueError(f"{name}: at most {MAX_SWEEP_AXIS_POINTS} points per axis")
+    if not np.all(np.isfinite(values)):
+        raise ValueError(f"{name}: values must be finite numbers")
+    return values
+
+
+def _pins_bundle(method):
+    """Run ``method`` against one model bundle, even if a newer one is swapped in meanwhile"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pinned_bundle():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class RealTimeDataManager:
-    def __init__(self):
+    def __init__(self, cache_size: int = 2048, cache_ttl: float = 300.0, recent_capacity: int = 1000,
+                 mlflow_refresher: MlflowMetricsRefresher = None, model_watch_interval: float = 0.0,
+                 shadow_version: str = None, inference_backend: str = 'native'):
         self.model_path = "models"
-        self.models = {}
-        self.scalers = {}
-        self.encoders = {}
+        # The active model version; replaced wholesale by reload_models()
+        self._bundle = ModelBundle.empty()
+        self._pinned = threading.local()
+        self._reload_lock = threading.Lock()
+        self.model_watch_interval = float(model_watch_interval)
+        # 'compiled' scores small calls with flattened tree arrays instead of the XGBoost predictor
+        self.inference_backend = inference_backend
+        self.reload_history = []
+        # Candidate bundle scoring mirrored traffic in the background (see set_shadow)
+        self.shadow = None
         self.metrics_history = []
         self.current_predictions = []
+        self._stats_lock = threading.Lock()
         self.system_stats = {
             "total_predictions": 0,
             "successful_predictions": 0,
@@ -50,90 +117,87 @@ class RealTimeDataManager:
             "active_users": 0,
             "predictions_per_minute": 0,
             "system_load": 0.0,
-            "model_performance": {},
-            "recent_predictions": []
+            "model_performance": {}
         }
         
+        # Compact ring buffer of recent predictions with a per-second rate counter
+        self.recent_predictions = RecentPredictions(capacity=recent_capacity)
+        self.prediction_listeners = []
+        
+        # Monotonic state sequence for ETags and ``since=`` deltas, plus the last change per section.
+        # Sequences are per process, so cursors and ETags carry an epoch naming this process; one
+        # from another gunicorn worker or from before a restart never matches
+        self.epoch = f"{os.getpid():x}{int(time.time() * 1000):x}"
+        self.sequence = 0
+        self.section_sequences = {section: 0 for section in DASHBOARD_SECTIONS}
+        self._sequence_lock = threading.Lock()
+        self._mlflow_version = 0
+        
+        # MLflow metrics are polled in the background; requests only read the published snapshot
+        self.mlflow_refresher = mlflow_refresher or MlflowMetricsRefresher()
+        
+        # Raw model outputs keyed by the encoded feature vector (invalidated on every model load)
+        self.prediction_cache = PredictionCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        
         # Load models and preprocessors
         self.load_models()
+        if shadow_version:
+            try:
+                self.set_shadow(shadow_version)
+            except Exception as e:
+                print(f"❌ Shadow model {shadow_version} not started: {str(e)}")
         
         # Start background threads for data simulation
         self.start_background_threads()
     
+    @property
+    def bundle(self) -> ModelBundle:
+        """Bundle pinned by the current request, else the active one"""
+        return getattr(self._pinned, 'bundle', None) or self._bundle
+    
+    @property
+    def models(self) -> Dict:
+        return self.bundle.models
+    
+    @property
+    def scalers(self) -> Dict:
+        return self.bundle.scalers
+    
+    @property
+    def encoders(self) -> Dict:
+        return self.bundle.encoders
+    
+    @property
+    def feature_names(self):
+        return self.bundle.feature_names
+    
+    @property
+    def feature_encoders(self) -> Dict:
+        return self.bundle.feature_encoders
+    
+    @property
+    def model_version(self) -> str:
+        return self.bundle.version
+    
+    @contextmanager
+    def pinned_bundle(self, bundle: ModelBundle = None):
+        """Pin ``bundle`` (default: the active one) for this thread; nested pins keep the outer one"""
+        if getattr(self._pinned, 'bundle', None) is not None:
+            yield self._pinned.bundle
+            return
+        self._pinned.bundle = bundle or self._bundle
+        try:
+            yield self._pinned.bundle
+        finally:
+            self._pinned.bundle = None
+    
     def load_models(self):
         """Load all ML models and preprocessors"""
         try:
             print("🔄 Loading ML models and preprocessors...")
-            
-            # Load classification model
-            def _safe_load(path):
-                """Try common loaders (pickle, joblib) and return loaded object or raise the last exception."""
-                last_exc = None
-                # Try pickle
-                try:
-                    with open(path, 'rb') as f:
-                        return pickle.load(f)
-                except Exception as e:
-                    last_exc = e
-                # Try joblib
-                try:
-                    return joblib.load(path)
-                except Exception as e:
-                    last_exc = e
-                # Try cloudpickle if available
-                try:
-                    import cloudpickle
-                    with open(path, 'rb') as f:
-                        return cloudpickle.load(f)
-                except Exception as e:
-                    last_exc = e
-                raise last_exc
-
-            if os.path.exists(f"{self.model_path}/classification_model.pkl"):
-                try:
-                    self.models['classification'] = _safe_load(f"{self.model_path}/classification_model.pkl")
-                    print("✅ Classification model loaded")
-                except Exception as e:
-                    print(f"❌ Failed to load classification_model.pkl: {e}")
-            
-            # Load regression model
-            if os.path.exists(f"{self.model_path}/regression_model.pkl"):
-                try:
-                    self.models['regression'] = _safe_load(f"{self.model_path}/regression_model.pkl")
-                    print("✅ Regression model loaded")
-                except Exception as e:
-                    print(f"❌ Failed to load regression_model.pkl: {e}")
-            
-            # Load scalers
-            if os.path.exists(f"{self.model_path}/scaler_classification.pkl"):
-                try:
-                    self.scalers['classification'] = _safe_load(f"{self.model_path}/scaler_classification.pkl")
-                    print("✅ Classification scaler loaded")
-                except Exception as e:
-                    print(f"❌ Failed to load scaler_classification.pkl: {e}")
-            
-            if os.path.exists(f"{self.model_path}/scaler_regression.pkl"):
-                try:
-                    self.scalers['regression'] = _safe_load(f"{self.model_path}/scaler_regression.pkl")
-                    print("✅ Regression scaler loaded")
-                except Exception as e:
-                    print(f"❌ Failed to load scaler_regression.pkl: {e}")
-            
-            # Load label encoder
-            if os.path.exists(f"{self.model_path}/label_encoder.pkl"):
-                try:
-                    self.encoders['label'] = _safe_load(f"{self.model_path}/label_encoder.pkl")
-                    print("✅ Label encoder loaded")
-                except Exception as e:
-                    print(f"❌ Failed to load label_encoder.pkl: {e}")
-            
-            # Load feature names
-            if os.path.exists(f"{self.model_path}/feature_names.pkl"):
-                try:
-                    self.feature_names = _safe_load(f"{self.model_path}/feature_names.pkl")
-                    print("✅ Feature names loaded")
-                except Exception as e:
-                    print(f"❌ Failed to load feature_names.pkl: {e}")
+            result = self.reload_models(force=False)
+            if result['status'] != 'swapped':
+                print(f"❌ Model bundle rejected: {result.get('error')}")
             
             # Load existing metrics
             self.load_existing_metrics()
@@ -141,6 +205,151 @@ class RealTimeDataManager:
         except Exception as e:
             print(f"❌ Error loading models: {str(e)}")
     
+    def reload_models(self, version: str = None, force: bool = True) -> Dict:
+        """Load a model bundle off the request path, warm it up and atomically swap it in
+
+        ``version`` names a directory under ``models/versions``; by default the one in
+        ``models/versions/CURRENT`` is used, or the flat ``models`` directory. Requests already
+        running keep the bundle they started with. A bundle that fails to load or warm up is
+        rejected and the active one stays in place (except at startup, when there is none).
+        """
+        with self._reload_lock:
+            previous = self._bundle
+            bundle = None
+            start = time.perf_counter()
+            try:
+                path = resolve_bundle_path(self.model_path, version)
+                # Re-read files only when they may have changed in place
+                bundle = ModelBundle.load(path, force=force and os.path.abspath(path) == os.path.abspath(previous.path or ''))
+                if bundle.errors:
+                    raise ValueError('; '.join(f"{name}: {error}" for name, error in bundle.errors.items()))
+                if self.inference_backend == 'compiled':
+                    bundle.compile()
+                bundle.warmup = self.warm_up(bundle)
+            except Exception as e:
+                outcome = {'status': 'rejected', 'version': version, 'active_version': previous.version,
+                           'error': str(e), 'timestamp': datetime.now().isoformat()}
+                if previous.version is not None or bundle is None:
+                    self._record_reload(outcome)
+                    return outcome
+                # Nothing is serving yet: a partially usable bundle beats none
+                outcome['status'] = 'swapped'
+                outcome['warning'] = outcome.pop('error')
+            else:
+                outcome = {'status': 'swapped', 'timestamp': datetime.now().isoformat()}
+            
+            self._bundle = bundle
+            # Cached outputs are keyed by version; drop the old ones to free memory
+            self.prediction_cache.clear()
+            self.touch('model_status')
+            if previous.path and os.path.abspath(previous.path) != os.path.abspath(bundle.path):
+                discard_registry(previous.path)
+            
+            for name in sorted(bundle.models):
+                print(f"✅ {name.capitalize()} model loaded")
+            outcome.update({'version': bundle.version, 'previous_version': previous.version,
+                            'load_ms': bundle.load_ms, 'total_ms': round((time.perf_counter() - start) * 1000, 3),
+                            'warmup': bundle.warmup})
+            print(f"✅ Model bundle {bundle.version} active (previous: {previous.version})")
+            self._record_reload(outcome)
+            return outcome
+    
+    def _record_reload(self, outcome: Dict):
+        self.reload_history = (self.reload_history + [outcome])[-20:]
+    
+    def warm_up(self, bundle: ModelBundle) -> Dict:
+        """Score WARMUP_PROFILES with ``bundle`` through the normal code path and sanity-check the outputs"""
+        start = time.perf_counter()
+        with self.pinned_bundle(bundle):
+            if self._pinned.bundle is not bundle:
+                raise RuntimeError('warm_up cannot run inside another pinned request')
+            checked = []
+            for task in ('classification', 'regression'):
+                if task not in bundle.models or task not in bundle.feature_encoders:
+                    continue
+                frame = self._extract_features(task, WARMUP_PROFILES)
+                if any(error is not None for error in frame.errors):
+                    raise ValueError(f"warm-up profiles rejected by the {task} encoder: {frame.errors}")
+                matrix = bundle.feature_encoders[task].assemble(frame)
+                if task == 'classification':
+                    proba = np.asarray(self._classify_matrix(matrix, use_cache=False), dtype=float)
+                    if proba.shape[0] != len(WARMUP_PROFILES) or not np.allclose(proba.sum(axis=1), 1.0, atol=1e-3):
+                        raise ValueError(f"classification warm-up produced invalid probabilities {proba.shape}")
+                    self._decode_labels(proba)
+                else:
+                    predicted = np.asarray(self._regress_matrix(matrix, use_cache=False), dtype=float)
+                    if predicted.shape != (len(WARMUP_PROFILES),) or not np.all(np.isfinite(predicted)):
+                        raise ValueError('regression warm-up produced non-finite predictions')
+                checked.append(task)
+        if not checked:
+            raise ValueError('bundle has no usable model')
+        return {'tasks': checked, 'rows': len(WARMUP_PROFILES), 'ms': round((time.perf_counter() - start) * 1000, 3)}
+    
+    def set_shadow(self, version: str = None) -> Dict:
+        """Start shadow-scoring live traffic with ``version`` (replacing any current candidate); None stops it
+
+        The candidate is loaded and warmed up like a reload, but never serves responses.
+        """
+        with self._reload_lock:
+            previous = self.shadow
+            candidate = None
+            if version is not None:
+                path = resolve_bundle_path(self.model_path, version)
+                candidate = ModelBundle.load(path)
+                if candidate.errors:
+                    raise ValueError('; '.join(f"{name}: {error}" for name, error in candidate.errors.items()))
+                if self.inference_backend == 'compiled':
+                    candidate.compile()
+                candidate.warmup = self.warm_up(candidate)
+            self.shadow = ShadowScorer(candidate) if candidate is not None else None
+            if previous is not None:
+                previous.stop()
+                # Free the retired candidate unless the serving bundle or the new candidate still uses it
+                in_use = {os.path.abspath(self._bundle.path or '')}
+                if candidate is not None:
+                    in_use.add(os.path.abspath(candidate.path))
+                if os.path.abspath(previous.candidate.path) not in in_use:
+                    discard_registry(previous.candidate.path)
+        print(f"✅ Shadow model: {version or 'off'} (previous: {previous.version if previous else 'off'})")
+        return self.shadow_stats()
+    
+    def shadow_stats(self) -> Dict:
+        """Agreement and latency of the shadow candidate against the serving bundle"""
+        shadow = self.shadow
+        if shadow is None:
+            return {'enabled': False}
+        return dict(shadow.stats(), enabled=True, candidate=shadow.candidate.describe(),
+                    primary_version=self._bundle.version)
+    
+    def _mirror(self, task: str, frame: EncodedFrame, rows, outputs: np.ndarray):
+        """Hand a primary call's inputs and outputs to the shadow scorer, if one is running"""
+        shadow = self.shadow
+        if shadow is not None:
+            shadow.submit(task, frame, rows, outputs)
+    
+    def model_versions(self) -> Dict:
+        """Active bundle, available versions, shadow candidate and recent reload outcomes"""
+        shadow = self.shadow
+        return {
+            'active': self._bundle.describe(),
+            'shadow_version': shadow.version if shadow is not None else None,
+            'available_versions': available_versions(self.model_path),
+            'reloads': list(self.reload_history)
+        }
+    
+    def _extract_features(self, task: str, customer_data) -> EncodedFrame:
+        """Coerce customer data into an encoded frame using the encoder for ``task``"""
+        if task not in self.feature_encoders:
+            raise ValueError(f"Feature encoder for {task} model not available")
+        return self.feature_encoders[task].extract(customer_data)
+    
+    def _encode_single(self, task: str, customer_data: Dict):
+        """Encode one customer for ``task``, raising on invalid input instead of guessing"""
+        frame = self._extract_features(task, customer_data)
+        if frame.errors[0] is not None:
+            raise ValueError(frame.errors[0])
+        return frame, self.feature_encoders[task].assemble(frame)
+    
     def load_existing_metrics(self):
         """Load existing model metrics from files"""
         try:
@@ -162,542 +371,568 @@ class RealTimeDataManager:
             print(f"❌ Error loading existing metrics: {str(e)}")
 
     def fetch_mlflow_metrics(self) -> Dict:
-        """Fetch recent metrics from MLflow (if available) and return a summary dict."""
-        if MlflowClient is None and mlflow is None:
-            return {}
+        """Latest MLflow metrics from the background refresher's snapshot (never blocks on MLflow)"""
+        return self.mlflow_refresher.metrics()
+    
+    def predict_emi_eligibility(self, customer_data: Dict) -> Dict:
+        """Predict EMI eligibility using classification model with enhanced metrics"""
+        return self.predict_singles('classification', [customer_data])[0]
+    
+    def predict_emi_amount(self, customer_data: Dict) -> Dict:
+        """Predict EMI amount using regression model with enhanced metrics"""
+        return self.predict_singles('regression', [customer_data])[0]
+    
+    @_pins_bundle
+    def predict_singles(self, task: str, customers: List[Dict]) -> List[Dict]:
+        """Score independent single-customer requests in one model call
 
+        Each result, and the stats and recent-prediction updates, is exactly what a separate
+        predict_emi_eligibility / predict_emi_amount call would produce; used by the micro-batcher.
+        """
+        start_time = time.time()
+        outcomes = [None] * len(customers)
+        
         try:
-            # Prefer MlflowClient if available; otherwise use mlflow module APIs
-            client = None
-            if MlflowClient is not None:
-                try:
-                    client = MlflowClient()
-                except Exception as e:
-                    print('Warning: MlflowClient init failed', e)
-
-            agg = {
-                'classification_accuracy': None,
-                'regression_r2': None,
-                'total_predictions': None,
-                'avg_response_time': None,
-                'last_updated': datetime.now().isoformat()
-            }
-
-            experiments = []
-            # Try to obtain experiments list using available APIs
-            if client:
-                # MlflowClient in some versions exposes search_experiments or list_experiments
-                if hasattr(client, 'list_experiments'):
-                    experiments = client.list_experiments()
-                elif hasattr(client, 'search_experiments'):
-                    experiments = client.search_experiments()
+            if task not in self.models:
+                raise ValueError(f"{task.capitalize()} model not loaded")
+            
+            # Convert customer data to features
+            records = [customer if isinstance(customer, dict) else {} for customer in customers]
+            frame = self._extract_features(task, records)
+            for i, customer in enumerate(customers):
+                if not isinstance(customer, dict):
+                    outcomes[i] = ValueError('Customer record must be a JSON object')
+                elif frame.errors[i] is not None:
+                    outcomes[i] = ValueError(frame.errors[i])
+            valid = np.array([i for i, outcome in enumerate(outcomes) if outcome is None], dtype=int)
+            
+            # Scale features and make predictions
+            if len(valid):
+                matrix = self.feature_encoders[task].assemble(frame)[valid]
+                if task == 'classification':
+                    prediction_proba = self._classify_matrix(matrix)
+                    labels = self._decode_labels(prediction_proba)
+                    self._mirror(task, frame, valid, prediction_proba)
+                    prediction_time = time.time() - start_time
+                    for pos, i in enumerate(valid):
+                        outcomes[i] = self._build_eligibility_result(labels[pos], prediction_proba[pos], prediction_time)
                 else:
-                    # Fallback: try mlflow module function
-                    experiments = mlflow.list_experiments() if mlflow and hasattr(mlflow, 'list_experiments') else []
-            else:
-                # Use mlflow module-level API
-                if mlflow and hasattr(mlflow, 'list_experiments'):
-                    experiments = mlflow.list_experiments()
-                elif mlflow and hasattr(mlflow, 'search_experiments'):
-                    experiments = mlflow.search_experiments()
-
-            # For each experiment, look for recent runs and metrics
-            for exp in experiments:
-                try:
-                    exp_id = getattr(exp, 'experiment_id', None) or getattr(exp, 'id', None) or getattr(exp, 'experiment_id', None)
-
-                    runs = []
-                    if client and exp_id:
-                        # Prefer search_runs if present
-                        if hasattr(client, 'search_runs'):
-                            try:
-                                runs = client.search_runs([exp_id], max_results=5)
-                            except Exception:
-                                runs = client.search_runs([exp_id])
-                        else:
-                            # Fallback to mlflow module
-                            if hasattr(mlflow, 'search_runs'):
-                                runs = mlflow.search_runs(exp_id)
-                    else:
-                        if hasattr(mlflow, 'search_runs'):
-                            runs = mlflow.search_runs([exp.experiment_id]) if hasattr(exp, 'experiment_id') else mlflow.search_runs(exp)
-
-                    for run in runs:
-                        metrics = getattr(run, 'data', None)
-                        if not metrics:
-                            # mlflow.search_runs returns a DataFrame in some cases
-                            if isinstance(run, dict):
-                                m = run.get('metrics', {})
-                            else:
-                                continue
-                        else:
-                            m = getattr(metrics, 'metrics', {})
-
-                        # Common metric names used in experiments
-                        try:
-                            if 'accuracy' in m and agg['classification_accuracy'] is None:
-                                agg['classification_accuracy'] = float(m.get('accuracy'))
-                        except Exception:
-                            pass
-                        try:
-                            if 'r2' in m and agg['regression_r2'] is None:
-                                agg['regression_r2'] = float(m.get('r2'))
-                        except Exception:
-                            pass
-                        try:
-                            if 'r2_score' in m and agg['regression_r2'] is None:
-                                agg['regression_r2'] = float(m.get('r2_score'))
-                        except Exception:
-                            pass
-                        try:
-                            if 'predictions' in m and agg['total_predictions'] is None:
-                                agg['total_predictions'] = int(float(m.get('predictions')))
-                        except Exception:
-                            pass
+                    predicted = self._regress_matrix(matrix)
+                    self._mirror(task, frame, valid, predicted)
+                    prediction_time = time.time() - start_time
+                    for pos, i in enumerate(valid):
                         try:
-                            if 'avg_response_time' in m and agg['avg_response_time'] is None:
-                                agg['avg_response_time'] = float(m.get('avg_response_time'))
-                        except Exception:
-                            pass
-
-                        if all(v is not None for k, v in agg.items() if k != 'last_updated'):
-                            break
-
-                except Exception:
-                    continue
-
-                if all(v is not None for k, v in agg.items() if k != 'last_updated'):
-                    break
-
-            return agg
+                            outcomes[i] = self._build_emi_amount_result(float(predicted[pos]), frame, i, prediction_time)
+                        except Exception as e:
+                            outcomes[i] = e
+        
         except Exception as e:
-            print(f"❌ Error fetching MLflow metrics: {e}")
-            return {}
+            outcomes = [outcome if isinstance(outcome, dict) else e for outcome in outcomes]
+        
+        results = []
+        for customer, outcome in zip(customers, outcomes):
+            if isinstance(outcome, dict):
+                # Update stats
+                self.update_prediction_stats(True, outcome['prediction_time'], model=task)
+                self.add_recent_prediction(outcome, customer)
+                results.append(outcome)
+            else:
+                prediction_time = time.time() - start_time
+                self.update_prediction_stats(False, prediction_time, model=task)
+                results.append({
+                    'error': str(outcome),
+                    'prediction_time': prediction_time,
+                    'timestamp': datetime.now().isoformat(),
+                    'model_type': task
+                })
+        return results
     
-    def predict_emi_eligibility(self, customer_data: Dict) -> Dict:
-        """Predict EMI eligibility using classification model with enhanced metrics"""
+    @_pins_bundle
+    def assess(self, customer_data: Dict) -> Dict:
+        """Comprehensive risk assessment: encode once, score eligibility and (if eligible) EMI in one pass"""
         start_time = time.time()
+        models_run = 0
         
         try:
             if 'classification' not in self.models:
                 raise ValueError("Classification model not loaded")
             
-            # Convert customer data to features
-            features = self.prepare_classification_features(customer_data)
-            
-            # Scale features
-            if 'classification' in self.scalers:
-                features_scaled = self.scalers['classification'].transform([features])
-            else:
-                features_scaled = np.array([features])
-            
-            # Make prediction
-            prediction = self.models['classification'].predict(features_scaled)[0]
-            prediction_proba = self.models['classification'].predict_proba(features_scaled)[0]
-            
-            # Convert numpy types to Python types for JSON serialization
-            prediction = int(prediction)
-            prediction_proba = [float(p) for p in prediction_proba]
+            # The coerced input columns are shared by both models; only the final layout differs
+            frame, clf_features = self._encode_single('classification', customer_data)
             
-            # Get prediction label
-            if 'label' in self.encoders:
-                prediction_label = self.encoders['label'].inverse_transform([prediction])[0]
-            else:
-                prediction_label = f"Category_{prediction}"
-            
-            # Calculate prediction probability (highest class probability)
-            max_probability = float(max(prediction_proba))
-            
-            # Determine eligibility status based on prediction
-            if prediction_label in ['Category_2', 'Eligible', 'Approved']:
-                eligibility_status = 'Eligible'
-            elif prediction_label in ['Category_1', 'Conditional', 'Review']:
-                eligibility_status = 'Conditional'
-            else:
-                eligibility_status = 'Not Eligible'
+            prediction_proba = self._classify_matrix(clf_features)
+            labels = self._decode_labels(prediction_proba)
+            self._mirror('classification', frame, None, prediction_proba)
+            models_run += 1
+            eligibility_result = self._build_eligibility_result(labels[0], prediction_proba[0],
+                                                                time.time() - start_time)
             
-            # Calculate confidence level
-            if max_probability > 0.8:
-                confidence_level = 'High'
-            elif max_probability > 0.6:
-                confidence_level = 'Medium'
-            else:
-                confidence_level = 'Low'
-            
-            prediction_time = time.time() - start_time
+            canonical_eligibility = {
+                'eligibility': eligibility_result['eligibility_status'],
+                'confidence': round(eligibility_result['confidence'] * 100, 2)
+            }
             
             result = {
-                'prediction': prediction_label,
-                'eligibility_status': eligibility_status,
-                'confidence': max_probability,
-                'confidence_level': confidence_level,
-                'prediction_probability': max_probability,  # For what-if analysis compatibility
-                'probabilities': {f'Class_{i}': float(prob) for i, prob in enumerate(prediction_proba)},
-                'prediction_time': prediction_time,
-                'timestamp': datetime.now().isoformat(),
-                'model_type': 'classification'
+                'eligibility': canonical_eligibility,
+                'eligibility_raw': eligibility_result,
+                'model_version': self.bundle.version,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
+            recent = [eligibility_result]
+            
+            # If eligible, get EMI amount prediction from the same frame
+            if canonical_eligibility['eligibility'] == 'Eligible' and 'regression' in self.models \
+                    and 'regression' in self.feature_encoders:
+                regression_start = time.time()
+                encoder = self.feature_encoders['regression']
+                if encoder.feature_names == self.feature_encoders['classification'].feature_names:
+                    reg_features = clf_features
+                else:
+                    reg_features = encoder.assemble(frame)
+                predicted = self._regress_matrix(reg_features)
+                prediction = float(predicted[0])
+                self._mirror('regression', frame, None, predicted)
+                models_run += 1
+                emi_result = self._build_emi_amount_result(prediction, frame, 0, time.time() - regression_start)
+                result['emi_prediction'] = emi_result
+                recent.append(emi_result)
+                
+                # Determine risk level using emi_to_income_ratio
+                emi_ratio = emi_result['emi_to_income_ratio']
+                if emi_ratio < 30:
+                    result['risk_level'] = 'Low'
+                elif emi_ratio < 45:
+                    result['risk_level'] = 'Moderate'
+                else:
+                    result['risk_level'] = 'High'
+            elif canonical_eligibility['eligibility'] == 'Eligible':
+                result['emi_prediction'] = None
+                result['risk_level'] = 'Unknown'
+            else:
+                result['emi_prediction'] = None
+                result['risk_level'] = 'High'
+                result['recommendation'] = 'Not eligible for EMI. Consider improving credit score or reducing existing debt.'
             
-            # Update stats
-            self.update_prediction_stats(True, prediction_time)
-            self.add_recent_prediction(result, customer_data)
+            # One stats update for the whole assessment, counting each model prediction made
+            self.update_prediction_stats(True, time.time() - start_time, count=models_run, model='assessment')
+            for model_result in recent:
+                self.add_recent_prediction(model_result, customer_data)
             
             return result
             
         except Exception as e:
-            prediction_time = time.time() - start_time
-            self.update_prediction_stats(False, prediction_time)
-            
-            return {
-                'error': str(e),
-                'prediction_time': prediction_time,
-                'timestamp': datetime.now().isoformat(),
-                'model_type': 'classification'
-            }
+            self.update_prediction_stats(False, time.time() - start_time, count=max(models_run, 1), model='assessment')
+            raise
     
-    def predict_emi_amount(self, customer_data: Dict) -> Dict:
-        """Predict EMI amount using regression model with enhanced metrics"""
+    @_pins_bundle
+    def whatif_sweep(self, base_profile: Dict, ranges: Dict, max_cells: int = 200000) -> Dict:
+        """Score a Cartesian what-if grid in one vectorized call per model and return compact arrays"""
         start_time = time.time()
         
-        try:
-            if 'regression' not in self.models:
-                raise ValueError("Regression model not loaded")
-            
-            # Convert customer data to features
-            features = self.prepare_regression_features(customer_data)
-            
-            # Scale features
-            if 'regression' in self.scalers:
-                features_scaled = self.scalers['regression'].transform([features])
+        for task in ('classification', 'regression'):
+            if task not in self.models or task not in self.feature_encoders:
+                raise ValueError(f"{task.capitalize()} model not loaded")
+        unknown = set(ranges) - set(SWEEP_AXES)
+        if unknown:
+            raise ValueError(f"Unsupported sweep axes: {', '.join(sorted(unknown))}")
+        
+        # Axes not being swept take their (coerced) value from the base profile
+        base_frame, _ = self._encode_single('classification', base_profile)
+        axes = {}
+        for name in SWEEP_AXES:
+            if name in ranges:
+                axes[name] = sweep_axis_values(name, ranges[name])
+            elif name == 'interest_rate':
+                axes[name] = sweep_axis_values(name, base_profile.get('interest_rate', DEFAULT_WHATIF_RATE))
             else:
-                features_scaled = np.array([features])
-            
-            # Make prediction
-            prediction = self.models['regression'].predict(features_scaled)[0]
-            prediction = float(prediction)  # Ensure it's a standard Python float
-            
-            # Calculate additional metrics for what-if analysis
-            monthly_salary = float(customer_data.get('monthly_salary', 50000))
-            requested_amount = float(customer_data.get('requested_amount', 500000))
-            requested_tenure = float(customer_data.get('requested_tenure', 240))
-            credit_score = float(customer_data.get('credit_score', 700))
-            
-            # Calculate EMI to income ratio
-            emi_to_income_ratio = (prediction / monthly_salary) * 100
-            
-            # Determine risk level based on EMI to income ratio
-            if emi_to_income_ratio > 50:
-                risk_level = "High"
-            elif emi_to_income_ratio > 30:
-                risk_level = "Medium"
+                axes[name] = base_frame.columns[name][:1]
+        
+        model_shape = tuple(len(axes[name]) for name in SWEEP_MODEL_AXES)
+        cells = int(np.prod(model_shape))
+        if cells > max_cells:
+            raise ValueError(f"Sweep grid has {cells} model cells; the limit is {max_cells}")
+        
+        # One frame for the whole grid: swept axes as columns, everything else broadcast from the base profile
+        mesh = np.meshgrid(*(axes[name] for name in SWEEP_MODEL_AXES), indexing='ij')
+        columns = dict(base_profile)
+        for name, grid in zip(SWEEP_MODEL_AXES, mesh):
+            columns[name] = grid.ravel()
+        frame = self.feature_encoders['classification'].extract_columns(columns, cells)
+        
+        clf_matrix = self.feature_encoders['classification'].assemble(frame)
+        prediction_proba = self._classify_matrix(clf_matrix, use_cache=False)
+        reg_matrix = (clf_matrix if self.feature_encoders['regression'].feature_names ==
+                      self.feature_encoders['classification'].feature_names
+                      else self.feature_encoders['regression'].assemble(frame))
+        predicted_emi = self._regress_matrix(reg_matrix, use_cache=False)
+        
+        # Column of the class that maps to an 'Eligible' status
+        class_labels = self._decode_labels(np.eye(prediction_proba.shape[1]))
+        statuses = [self._eligibility_status(label) for label in class_labels]
+        eligible_index = statuses.index('Eligible') if 'Eligible' in statuses else 0
+        
+        # Formula EMI depends only on amount, tenure and rate
+        formula_emi = calculate_emi(axes['requested_amount'][:, None, None],
+                                    axes['interest_rate'][None, None, :],
+                                    axes['requested_tenure'][None, :, None])
+        
+        elapsed = time.time() - start_time
+        self.update_prediction_stats(True, elapsed, count=cells * 2, model='whatif_sweep')
+        
+        return {
+            'axes': {name: values.tolist() for name, values in axes.items()},
+            'model_axes': list(SWEEP_MODEL_AXES),
+            'model_shape': list(model_shape),
+            'class_labels': class_labels,
+            'predicted_class': np.argmax(prediction_proba, axis=1).reshape(model_shape).tolist(),
+            'eligible_probability': np.round(prediction_proba[:, eligible_index].astype(float), 4).reshape(model_shape).tolist(),
+            'predicted_emi': np.round(predicted_emi.astype(float), 2).reshape(model_shape).tolist(),
+            'formula_emi_axes': ['requested_amount', 'requested_tenure', 'interest_rate'],
+            'formula_emi': np.round(formula_emi, 2).tolist(),
+            'cells': cells,
+            'model_version': self.bundle.version,
+            'prediction_time': elapsed,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    @_pins_bundle
+    def predict_batch(self, customers: List[Dict], include_eligibility: bool = True,
+                      include_emi_amount: bool = True) -> List[Dict]:
+        """Score many customers with one scaler/model call per task, returning per-row results in input order"""
+        start_time = time.time()
+        results = [{'index': i} for i in range(len(customers))]
+        
+        # Rows that cannot be turned into features are reported individually
+        candidate_rows = []
+        for i, customer in enumerate(customers):
+            if isinstance(customer, dict):
+                candidate_rows.append(i)
             else:
-                risk_level = "Low"
-            
-            # Calculate total payment and interest
-            total_payment = prediction * requested_tenure
-            total_interest = total_payment - requested_amount
-            
-            # Calculate affordability score
-            affordability_score = min(100, max(0, 100 - (emi_to_income_ratio - 20) * 2))
-            
-            prediction_time = time.time() - start_time
-            
-            result = {
-                'predicted_amount': float(prediction),
-                'formatted_amount': f"₹{prediction:,.2f}",
-                'emi_to_income_ratio': round(emi_to_income_ratio, 2),
-                'risk_level': risk_level,
-                'total_payment': round(total_payment, 2),
-                'total_interest': round(total_interest, 2),
-                'affordability_score': round(affordability_score, 1),
-                'prediction_time': prediction_time,
-                'timestamp': datetime.now().isoformat(),
-                'model_type': 'regression'
-            }
-            
-            # Update stats
-            self.update_prediction_stats(True, prediction_time)
-            self.add_recent_prediction(result, customer_data)
-            
-            return result
-            
-        except Exception as e:
-            prediction_time = time.time() - start_time
-            self.update_prediction_stats(False, prediction_time)
-            
-            return {
-                'error': str(e),
-                'prediction_time': prediction_time,
-                'timestamp': datetime.now().isoformat(),
-                'model_type': 'regression'
-            }
+                results[i]['error'] = 'Customer record must be a JSON object'
+        
+        tasks = []
+        if include_eligibility:
+            tasks.append('classification')
+        if include_emi_amount:
+            tasks.append('regression')
+        
+        # Both models share the same coerced columns, so extract them once
+        frame = None
+        valid_rows = []
+        if candidate_rows and tasks:
+            try:
+                encoder_task = next((t for t in tasks if t in self.feature_encoders), tasks[0])
+                frame = self._extract_features(encoder_task, [customers[i] for i in candidate_rows])
+                for pos, error in enumerate(frame.errors):
+                    if error is None:
+                        valid_rows.append(candidate_rows[pos])
+                    else:
+                        results[candidate_rows[pos]]['error'] = error
+                frame_rows = frame.valid_rows()
+            except Exception as e:
+                for i in candidate_rows:
+                    results[i]['error'] = str(e)
+        
+        for task in tasks:
+            if not valid_rows:
+                break
+            key = 'eligibility' if task == 'classification' else 'emi_amount'
+            try:
+                if task not in self.models:
+                    raise ValueError(f"{task.capitalize()} model not loaded")
+                if task not in self.feature_encoders:
+                    raise ValueError(f"Feature encoder for {task} model not available")
+                
+                task_start = time.time()
+                matrix = self.feature_encoders[task].assemble(frame)[frame_rows]
+                # Bulk files are mostly unique rows; bypass the cache so they don't evict interactive entries
+                if task == 'classification':
+                    prediction_proba = self._classify_matrix(matrix, use_cache=False)
+                    labels = self._decode_labels(prediction_proba)
+                    self._mirror(task, frame, frame_rows, prediction_proba)
+                    row_time = (time.time() - task_start) / len(valid_rows)
+                    for pos, i in enumerate(valid_rows):
+                        results[i][key] = self._build_eligibility_result(labels[pos], prediction_proba[pos], row_time)
+                else:
+                    predictions = self._regress_matrix(matrix, use_cache=False)
+                    self._mirror(task, frame, frame_rows, predictions)
+                    row_time = (time.time() - task_start) / len(valid_rows)
+                    for pos, i in enumerate(valid_rows):
+                        try:
+                            results[i][key] = self._build_emi_amount_result(float(predictions[pos]), frame,
+                                                                            frame_rows[pos], row_time)
+                        except Exception as e:
+                            results[i][key] = {'error': str(e), 'model_type': task}
+                
+            except Exception as e:
+                # A whole-task failure (e.g. model missing) is reported on every row for that task
+                for i in valid_rows:
+                    results[i][key] = {'error': str(e), 'model_type': task}
+        
+        failed = sum(1 for r in results if 'error' in r or any(
+            isinstance(r.get(k), dict) and 'error' in r[k] for k in ('eligibility', 'emi_amount')))
+        elapsed = time.time() - start_time
+        if results:
+            # Split the batch wall time across rows so the running average stays per-prediction
+            succeeded = len(results) - failed
+            self.update_prediction_stats(True, elapsed * succeeded / len(results), count=succeeded)
+            self.update_prediction_stats(False, elapsed * failed / len(results), count=failed)
+            metrics.observe('prediction_latency', elapsed, model='batch')
+        
+        return results
     
-    def prepare_classification_features(self, customer_data: Dict) -> List[float]:
-        """Prepare features for classification model with proper categorical encoding"""
-        try:
-            # Create a complete feature vector matching the training data structure
-            
-            # Numerical features (continuous)
-            numerical_features = [
-                float(customer_data.get('age', 30)),
-                float(customer_data.get('family_size', 3)),
-                float(customer_data.get('dependents', 1)),
-                float(customer_data.get('years_of_employment', 5)),
-                float(customer_data.get('monthly_salary', 50000)),
-                float(customer_data.get('credit_score', 700)),
-                float(customer_data.get('bank_balance', 200000)),
-                float(customer_data.get('emergency_fund', 100000)),
-                float(customer_data.get('monthly_rent', 25000)),
-                float(customer_data.get('school_fees', 5000)),
-                float(customer_data.get('college_fees', 0)),
-                float(customer_data.get('travel_expenses', 5000)),
-                float(customer_data.get('groceries_utilities', 15000)),
-                float(customer_data.get('other_monthly_expenses', 5000)),
-                float(customer_data.get('current_emi_amount', 0)),
-                float(customer_data.get('requested_amount', 500000)),
-                float(customer_data.get('requested_tenure', 240))
-            ]
-            
-            # Categorical features with one-hot encoding
-            # Gender encoding
-            gender = customer_data.get('gender', 'Male')
-            gender_features = [1.0 if gender == 'Female' else 0.0, 1.0 if gender == 'Male' else 0.0]
-            
-            # Marital status encoding
-            marital_status = customer_data.get('marital_status', 'Married')
-            marital_features = [
-                1.0 if marital_status == 'Married' else 0.0,
-                1.0 if marital_status == 'Single' else 0.0
-            ]
-            
-            # Education encoding - align with form values (e.g. 'High_School', 'Undergraduate', 'Graduate', 'Post_Graduate', 'Others')
-            education = customer_data.get('education', 'Graduate')
-            education_features = [
-                1.0 if education == 'Graduate' else 0.0,
-                1.0 if education == 'Post_Graduate' or education == 'Postgraduate' else 0.0,
-                1.0 if education == 'High_School' or education == 'School' else 0.0,
-                1.0 if education == 'Undergraduate' else 0.0
-            ]
-            
-            # Employment type encoding - match form values: 'Government','Private','Self_Employed','Contract'
-            employment_type = customer_data.get('employment_type', 'Private')
-            employment_features = [
-                1.0 if employment_type == 'Government' else 0.0,
-                1.0 if employment_type == 'Private' else 0.0,
-                1.0 if employment_type == 'Self_Employed' else 0.0,
-                1.0 if employment_type == 'Contract' else 0.0
-            ]
-            
-            # Company type encoding - align with template options: 'MNC','Startup','SME','Others'
-            company_type = customer_data.get('company_type', 'MNC')
-            company_features = [
-                1.0 if company_type == 'MNC' else 0.0,
-                1.0 if company_type == 'Startup' else 0.0,
-                1.0 if company_type == 'SME' else 0.0,
-                1.0 if company_type == 'Others' else 0.0
-            ]
-            
-            # House type encoding
-            house_type = customer_data.get('house_type', 'Rented')
-            house_features = [
-                1.0 if house_type == 'Owned' else 0.0,
-                1.0 if house_type == 'Rented' else 0.0
-            ]
-            
-            # Existing loans encoding
-            existing_loans = customer_data.get('existing_loans', 'No')
-            loans_features = [
-                1.0 if existing_loans == 'No' else 0.0,
-                1.0 if existing_loans == 'Yes' else 0.0
-            ]
-            
-            # EMI scenario encoding
-            emi_scenario = customer_data.get('emi_scenario', 'New_Loan')
-            scenario_features = [
-                1.0 if emi_scenario == 'Balance_Transfer' else 0.0,
-                1.0 if emi_scenario == 'Loan_Against_Property' else 0.0,
-                1.0 if emi_scenario == 'New_Loan' else 0.0,
-                1.0 if emi_scenario == 'Refinance' else 0.0,
-                1.0 if emi_scenario == 'Top_Up' else 0.0
-            ]
-            
-            # Combine all features
-            all_features = (numerical_features + gender_features + marital_features + 
-                          education_features + employment_features + company_features + 
-                          house_features + loans_features + scenario_features)
-            
-            # Ensure we have the correct number of features (should be 65)
-            expected_features = 65
-            if len(all_features) < expected_features:
-                # Pad with zeros if we have fewer features
-                all_features.extend([0.0] * (expected_features - len(all_features)))
-            elif len(all_features) > expected_features:
-                # Truncate if we have more features
-                all_features = all_features[:expected_features]
-            
-            return all_features
-            
-        except Exception as e:
-            # Fallback to default feature vector
-            return [0.0] * 65
+    def _classify_matrix(self, features_matrix: np.ndarray, use_cache: bool = True) -> np.ndarray:
+        """Scale a 2-D feature matrix once and return class probabilities for every row"""
+        bundle = self.bundle
+        
+        def compute(rows):
+            return bundle.score('classification', rows)
+        
+        if not use_cache:
+            return compute(features_matrix)
+        return self._cached_model_call('classification', features_matrix, compute)
     
-    def prepare_regression_features(self, customer_data: Dict) -> List[float]:
-        """Prepare features for regression model with proper categorical encoding"""
-        try:
-            # Create a complete feature vector matching the training data structure
-            
-            # Numerical features (continuous) - excluding target variables
-            numerical_features = [
-                float(customer_data.get('age', 30)),
-                float(customer_data.get('family_size', 3)),
-                float(customer_data.get('dependents', 1)),
-                float(customer_data.get('years_of_employment', 5)),
-                float(customer_data.get('monthly_salary', 50000)),
-                float(customer_data.get('credit_score', 700)),
-                float(customer_data.get('bank_balance', 200000)),
-                float(customer_data.get('emergency_fund', 100000)),
-                float(customer_data.get('monthly_rent', 25000)),
-                float(customer_data.get('school_fees', 5000)),
-                float(customer_data.get('college_fees', 0)),
-                float(customer_data.get('travel_expenses', 5000)),
-                float(customer_data.get('groceries_utilities', 15000)),
-                float(customer_data.get('other_monthly_expenses', 5000)),
-                float(customer_data.get('current_emi_amount', 0)),
-                float(customer_data.get('requested_amount', 500000)),
-                float(customer_data.get('requested_tenure', 240))
-            ]
-            
-            # Categorical features with one-hot encoding (same as classification)
-            # Gender encoding
-            gender = customer_data.get('gender', 'Male')
-            gender_features = [1.0 if gender == 'Female' else 0.0, 1.0 if gender == 'Male' else 0.0]
-            
-            # Marital status encoding
-            marital_status = customer_data.get('marital_status', 'Married')
-            marital_features = [
-                1.0 if marital_status == 'Married' else 0.0,
-                1.0 if marital_status == 'Single' else 0.0
-            ]
-            
-            # Education encoding - align with form values (e.g. 'High_School', 'Undergraduate', 'Graduate', 'Post_Graduate', 'Others')
-            education = customer_data.get('education', 'Graduate')
-            education_features = [
-                1.0 if education == 'Graduate' else 0.0,
-                1.0 if education == 'Post_Graduate' or education == 'Postgraduate' else 0.0,
-                1.0 if education == 'High_School' or education == 'School' else 0.0,
-                1.0 if education == 'Undergraduate' else 0.0
-            ]
-            
-            # Employment type encoding - match form values: 'Government','Private','Self_Employed','Contract'
-            employment_type = customer_data.get('employment_type', 'Private')
-            employment_features = [
-                1.0 if employment_type == 'Government' else 0.0,
-                1.0 if employment_type == 'Private' else 0.0,
-                1.0 if employment_type == 'Self_Employed' else 0.0,
-                1.0 if employment_type == 'Contract' else 0.0
-            ]
-            
-            # Company type encoding - align with template options: 'MNC','Startup','SME','Others'
-            company_type = customer_data.get('company_type', 'MNC')
-            company_features = [
-                1.0 if company_type == 'MNC' else 0.0,
-                1.0 if company_type == 'Startup' else 0.0,
-                1.0 if company_type == 'SME' else 0.0,
-                1.0 if company_type == 'Others' else 0.0
-            ]
-            
-            # House type encoding
-            house_type = customer_data.get('house_type', 'Rented')
-            house_features = [
-                1.0 if house_type == 'Owned' else 0.0,
-                1.0 if house_type == 'Rented' else 0.0
-            ]
-            
-            # Existing loans encoding
-            existing_loans = customer_data.get('existing_loans', 'No')
-            loans_features = [
-                1.0 if existing_loans == 'No' else 0.0,
-                1.0 if existing_loans == 'Yes' else 0.0
-            ]
-            
-            # EMI scenario encoding
-            emi_scenario = customer_data.get('emi_scenario', 'New_Loan')
-            scenario_features = [
-                1.0 if emi_scenario == 'Balance_Transfer' else 0.0,
-                1.0 if emi_scenario == 'Loan_Against_Property' else 0.0,
-                1.0 if emi_scenario == 'New_Loan' else 0.0,
-                1.0 if emi_scenario == 'Refinance' else 0.0,
-                1.0 if emi_scenario == 'Top_Up' else 0.0
-            ]
-            
-            # Combine all features
-            all_features = (numerical_features + gender_features + marital_features + 
-                          education_features + employment_features + company_features + 
-                          house_features + loans_features + scenario_features)
-            
-            # Ensure we have the correct number of features (should be 65 for regression)
-            expected_features = 65
-            if len(all_features) < expected_features:
-                # Pad with zeros if we have fewer features
-                all_features.extend([0.0] * (expected_features - len(all_features)))
-            elif len(all_features) > expected_features:
-                # Truncate if we have more features
-                all_features = all_features[:expected_features]
-            
-            return all_features
-            
-        except Exception as e:
-            # Fallback to default feature vector
-            return [0.0] * 65
+    def _regress_matrix(self, features_matrix: np.ndarray, use_cache: bool = True) -> np.ndarray:
+        """Scale a 2-D feature matrix once and return the predicted EMI for every row"""
+        bundle = self.bundle
+        
+        def compute(rows):
+            return bundle.score('regression', rows)
+        
+        if not use_cache:
+            return compute(features_matrix)
+        return self._cached_model_call('regression', features_matrix, compute)
     
-    def update_prediction_stats(self, success: bool, prediction_time: float):
-        """Update prediction statistics"""
-        self.system_stats['total_predictions'] += 1
+    def _cached_model_call(self, task: str, features_matrix: np.ndarray, compute) -> np.ndarray:
+        """Serve rows from the prediction cache and score only the misses in one model call"""
+        if not self.prediction_cache.enabled:
+            return compute(features_matrix)
         
-        if success:
-            self.system_stats['successful_predictions'] += 1
-        else:
-            self.system_stats['failed_predictions'] += 1
+        # The encoded vector is already coerced, so "50000" and 50000 produce the same key
+        version = self.bundle.version
+        keys = [(version, task, row.tobytes()) for row in np.ascontiguousarray(features_matrix, dtype=float)]
+        outputs = [self.prediction_cache.get(key) for key in keys]
+        missing = [i for i, output in enumerate(outputs) if output is None]
         
-        # Update average prediction time
-        total_time = self.system_stats['avg_prediction_time'] * (self.system_stats['total_predictions'] - 1)
-        self.system_stats['avg_prediction_time'] = (total_time + prediction_time) / self.system_stats['total_predictions']
+        if missing:
+            computed = compute(features_matrix[missing])
+            for pos, i in enumerate(missing):
+                outputs[i] = computed[pos]
+                self.prediction_cache.put(keys[i], computed[pos])
+        
+        return np.asarray(outputs)
     
-    def add_recent_prediction(self, result: Dict, customer_data: Dict):
-        """Add prediction to recent predictions list"""
-        prediction_entry = {
-            'result': result,
-            'input_data': customer_data,
-            'timestamp': datetime.now().isoformat()
+    def _decode_labels(self, prediction_proba: np.ndarray) -> List[str]:
+        """Turn class probabilities into prediction labels without a second model call"""
+        classes = getattr(self.models['classification'], 'classes_', None)
+        predictions = np.argmax(prediction_proba, axis=1)
+        if classes is not None:
+            predictions = np.asarray(classes)[predictions]
+        
+        if 'label' in self.encoders:
+            return [str(label) for label in self.encoders['label'].inverse_transform(predictions.astype(int))]
+        return [f"Category_{int(p)}" for p in predictions]
+    
+    @staticmethod
+    def _eligibility_status(prediction_label: str) -> str:
+        """Map a model class label onto the Eligible / Conditional / Not Eligible status"""
+        if prediction_label in ['Category_2', 'Eligible', 'Approved']:
+            return 'Eligible'
+        elif prediction_label in ['Category_1', 'Conditional', 'Review']:
+            return 'Conditional'
+        return 'Not Eligible'
+    
+    def _build_eligibility_result(self, prediction_label: str, prediction_proba, prediction_time: float) -> Dict:
+        """Build the eligibility response for one row of class probabilities"""
+        prediction_proba = [float(p) for p in prediction_proba]
+        
+        # Calculate prediction probability (highest class probability)
+        max_probability = float(max(prediction_proba))
+        
+        # Determine eligibility status based on prediction
+        eligibility_status = self._eligibility_status(prediction_label)
+        
+        # Calculate confidence level
+        if max_probability > 0.8:
+            confidence_level = 'High'
+        elif max_probability > 0.6:
+            confidence_level = 'Medium'
+        else:
+            confidence_level = 'Low'
+        
+        return {
+            'prediction': prediction_label,
+            'eligibility_status': eligibility_status,
+            'confidence': max_probability,
+            'confidence_level': confidence_level,
+            'prediction_probability': max_probability,  # For what-if analysis compatibility
+            'probabilities': {f'Class_{i}': prob for i, prob in enumerate(prediction_proba)},
+            'prediction_time': prediction_time,
+            'timestamp': datetime.now().isoformat(),
+            'model_type': 'classification',
+            'model_version': self.bundle.version
         }
+    
+    def _build_emi_amount_result(self, prediction: float, frame: EncodedFrame, row: int,
+                                 prediction_time: float) -> Dict:
+        """Build the EMI amount response for one row of an encoded frame, including what-if metrics"""
+        monthly_salary = float(frame.columns['monthly_salary'][row])
+        requested_amount = float(frame.columns['requested_amount'][row])
+        requested_tenure = float(frame.columns['requested_tenure'][row])
+        
+        # Calculate EMI to income ratio
+        emi_to_income_ratio = (prediction / monthly_salary) * 100
+        
+        # Determine risk level based on EMI to income ratio
+        if emi_to_income_ratio > 50:
+            risk_level = "High"
+        elif emi_to_income_ratio > 30:
+            risk_level = "Medium"
+        else:
+            risk_level = "Low"
+        
+        # Calculate total payment and interest
+        total_payment = prediction * requested_tenure
+        total_interest = total_payment - requested_amount
+        
+        # Calculate affordability score
+        affordability_score = min(100, max(0, 100 - (emi_to_income_ratio - 20) * 2))
         
-        self.real_time_data['recent_predictions'].append(prediction_entry)
+        return {
+            'predicted_amount': float(prediction),
+            'formatted_amount': f"₹{prediction:,.2f}",
+            'emi_to_income_ratio': round(emi_to_income_ratio, 2),
+            'risk_level': risk_level,
+            'total_payment': round(total_payment, 2),
+            'total_interest': round(total_interest, 2),
+            'affordability_score': round(affordability_score, 1),
+            'prediction_time': prediction_time,
+            'timestamp': datetime.now().isoformat(),
+            'model_type': 'regression',
+            'model_version': self.bundle.version
+        }
+    
+    def update_prediction_stats(self, success: bool, prediction_time: float, count: int = 1, model: str = None):
+        """Update prediction statistics (``count`` rows sharing ``prediction_time`` for batches)
+
+        When ``model`` is given the call is also recorded as one observation in the
+        prediction latency histogram for that model.
+        """
+        if model is not None:
+            metrics.observe('prediction_latency', prediction_time, model=model)
+            metrics.increment('predictions', count, model=model, outcome='success' if success else 'failure')
+        if count <= 0:
+            return
         
-        # Keep only last 50 predictions
-        if len(self.real_time_data['recent_predictions']) > 50:
-            self.real_time_data['recent_predictions'] = self.real_time_data['recent_predictions'][-50:]
+        with self._stats_lock:
+            self.system_stats['total_predictions'] += count
+            
+            if success:
+                self.system_stats['successful_predictions'] += count
+            else:
+                self.system_stats['failed_predictions'] += count
+            
+            # Update average prediction time
+            total_time = self.system_stats['avg_prediction_time'] * (self.system_stats['total_predictions'] - count)
+            self.system_stats['avg_prediction_time'] = (total_time + prediction_time) / self.system_stats['total_predictions']
+        self.touch('system_stats')
     
-    def get_real_time_dashboard_data(self) -> Dict:
-        """Get current dashboard data for real-time updates"""
-        # Attach MLflow metrics if available
-        mlflow_metrics = self.fetch_mlflow_metrics()
+    def touch(self, *sections: str) -> int:
+        """Advance the state sequence, marking ``sections`` as changed; returns the new sequence"""
+        with self._sequence_lock:
+            self.sequence += 1
+            for section in sections:
+                self.section_sequences[section] = self.sequence
+            return self.sequence
 
-        # Combine system metrics with MLflow metrics
-        combined = {
+    def dashboard_cursor(self, sequence: int) -> str:
+        """Opaque ``since=`` token for ``sequence``: ``<epoch>-<sequence>``"""
+        return f"{self.epoch}-{sequence}"
+
+    def cursor_sequence(self, cursor) -> int:
+        """Sequence in a ``dashboard_cursor`` token, or None when it is malformed or from another epoch"""
+        epoch, _, sequence = str(cursor or '').rpartition('-')
+        if epoch != self.epoch:
+            return None
+        try:
+            sequence = int(sequence)
+        except ValueError:
+            return None
+        return sequence if 0 <= sequence <= self.sequence else None
+    
+    def add_recent_prediction(self, result: Dict, customer_data: Dict = None):
+        """Record the dashboard fields of a prediction and notify listeners (e.g. the SSE stream)"""
+        # Sequence and insert under one lock so no reader sees sequence N without record N
+        with self._sequence_lock:
+            self.sequence += 1
+            self.section_sequences['recent_predictions'] = self.sequence
+            record = self.recent_predictions.add(result, sequence=self.sequence)
+        for listener in self.prediction_listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"❌ Prediction listener failed: {e}")
+    
+    def get_real_time_dashboard_data(self, since: str = None) -> Dict:
+        """Get current dashboard data for real-time updates
+
+        With ``since`` (the ``cursor`` of an earlier response) only the sections changed after it
+        and the predictions made after it are returned, flagged ``delta: True``. The full payload is
+        returned instead when the delta cannot be complete (the client is too far behind, or the
+        cursor is from another worker or from before a restart).
+        """
+        since = self.cursor_sequence(since) if since is not None else None
+        with self._sequence_lock:
+            sequence = self.sequence
+            changed = {section for section, seq in self.section_sequences.items() if seq > (since or 0)}
+        cursor = self.dashboard_cursor(sequence)
+
+        if since is not None:
+            if not changed:
+                return {'sequence': sequence, 'cursor': cursor, 'delta': True, 'timestamp': datetime.now().isoformat(),
+                        'new_predictions': []}
+            new_predictions, complete = self.recent_predictions.between(since, sequence, DASHBOARD_RECENT_PREDICTIONS)
+            if complete:
+                delta = {'sequence': sequence, 'cursor': cursor, 'delta': True,
+                         'timestamp': datetime.now().isoformat(),
+                         'new_predictions': [record.to_dict() for record in new_predictions]}
+                if 'system_stats' in changed:
+                    delta['system_stats'] = dict(self.system_stats)
+                    delta['performance_metrics'] = self.get_performance_metrics()
+                if changed & {'real_time_data', 'recent_predictions'}:
+                    delta['real_time_data'] = dict(self.real_time_data,
+                                                   predictions_per_minute=self.recent_predictions.per_minute())
+                if 'model_status' in changed:
+                    delta['model_status'] = self.get_model_status()
+                if 'mlflow_metrics' in changed:
+                    delta['mlflow_metrics'] = self.fetch_mlflow_metrics()
+                return delta
+
+        # Full payload: system metrics, recent predictions and MLflow metrics
+        return {
+            'sequence': sequence,
+            'cursor': cursor,
+            'delta': False,
             'timestamp': datetime.now().isoformat(),
-            'system_stats': self.system_stats,
-            'real_time_data': self.real_time_data,
-            'model_status': {
-                'classification_loaded': 'classification' in self.models,
-                'regression_loaded': 'regression' in self.models,
-                'scalers_loaded': len(self.scalers) > 0,
-                'encoders_loaded': len(self.encoders) > 0
-            },
+            'system_stats': dict(self.system_stats),
+            'real_time_data': dict(self.real_time_data,
+                                   predictions_per_minute=self.recent_predictions.per_minute(),
+                                   recent_predictions=self.recent_predictions.to_list(DASHBOARD_RECENT_PREDICTIONS,
+                                                                                      upto=sequence)),
+            'model_status': self.get_model_status(),
             'performance_metrics': self.get_performance_metrics(),
-            'mlflow_metrics': mlflow_metrics
+            'mlflow_metrics': self.fetch_mlflow_metrics()
+        }
+    
+    def get_model_status(self) -> Dict:
+        return {
+            'model_version': self.model_version,
+            'inference_backend': {task: info['backend'] for task, info in self.bundle.inference.items()} or 'native',
+            'classification_loaded': 'classification' in self.models,
+            'regression_loaded': 'regression' in self.models,
+            'scalers_loaded': len(self.scalers) > 0,
+            'encoders_loaded': len(self.encoders) > 0
         }
-
-        return combined
     
     def get_performance_metrics(self) -> Dict:
         """Calculate current performance metrics"""
@@ -707,8 +942,9 @@ class RealTimeDataManager:
         
         return {
             'success_rate': success_rate,
-            'predictions_per_minute': self.real_time_data['predictions_per_minute'],
+            'predictions_per_minute': self.recent_predictions.per_minute(),
             'avg_response_time': self.system_stats['avg_prediction_time'],
+            'latency_percentiles': metrics.latency_summary('prediction_latency', 'model'),
             'system_health': 'Excellent' if success_rate > 0.95 else 'Good' if success_rate > 0.8 else 'Needs Attention'
         }
     
@@ -734,15 +970,15 @@ class RealTimeDataManager:
                         # Simulate system load (0-100%)
                         self.real_time_data['system_load'] = round(random.uniform(20, 85), 2)
                     
-                    # Calculate predictions per minute
+                    # Predictions per minute from the per-second buckets
                     current_time = datetime.now()
-                    minute_ago = current_time - timedelta(minutes=1)
+                    self.real_time_data['predictions_per_minute'] = self.recent_predictions.per_minute()
                     
-                    recent_predictions = [
-                        p for p in self.real_time_data['recent_predictions']
-                        if datetime.fromisoformat(p['timestamp']) > minute_ago
-                    ]
-                    self.real_time_data['predictions_per_minute'] = len(recent_predictions)
+                    # A new MLflow snapshot only counts as a change when its metrics differ
+                    mlflow_version = self.mlflow_refresher.snapshot()['version']
+                    if mlflow_version != self._mlflow_version:
+                        self._mlflow_version = mlflow_version
+                        self.touch('mlflow_metrics')
                     
                     # Try to enrich model performance using MLflow metrics when available
                     try:
@@ -773,6 +1009,7 @@ class RealTimeDataManager:
                             'regression_r2': round(base_reg_acc + random.uniform(-0.01, 0.01), 4),
                             'last_updated': current_time.isoformat()
                         }
+                    self.touch('real_time_data')
                     
                     time.sleep(5)  # Update every 5 seconds
                     
@@ -780,7 +1017,31 @@ class RealTimeDataManager:
                     print(f"Error in background thread: {e}")
                     time.sleep(10)
         
-        # Start background thread
+        def watch_model_files():
+            """Reload the model bundle when its files or the CURRENT pointer change"""
+            seen = fingerprint(self.model_path)
+            pending = None
+            while True:
+                time.sleep(self.model_watch_interval)
+                try:
+                    current = fingerprint(self.model_path)
+                    if current == seen:
+                        pending = None
+                        continue
+                    if current != pending:
+                        # Wait for one unchanged interval so a half-copied file is never loaded
+                        pending = current
+                        continue
+                    result = self.reload_models()
+                    print(f"🔄 Model files changed: {result['status']} {result.get('version')}")
+                    seen, pending = current, None
+                except Exception as e:
+                    print(f"Error in model file watcher: {e}")
+        
+        # Start background threads
+        self.mlflow_refresher.start()
+        if self.model_watch_interval > 0:
+            threading.Thread(target=watch_model_files, name='model-watcher', daemon=True).start()
         thread = threading.Thread(target=simulate_system_metrics, daemon=True)
         thread.start()
     
@@ -810,5 +1071,44 @@ class RealTimeDataManager:
         
         return predictions
 
-# Global instance
-real_time_manager = RealTimeDataManager()
\ No newline at end of file
+# Shared instance, built on first use (or explicitly via init_manager) rather than at import
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def manager_settings() -> Dict:
+    """Constructor arguments for the shared manager, read from the environment"""
+    return {
+        'recent_capacity': int(os.environ.get('EMI_RECENT_PREDICTIONS', 1000)),
+        'model_watch_interval': float(os.environ.get('EMI_MODEL_WATCH_INTERVAL', 5)),
+        'shadow_version': os.environ.get('EMI_SHADOW_VERSION') or None,
+        'inference_backend': os.environ.get('EMI_INFERENCE_BACKEND', 'native'),
+        'mlflow_refresher': MlflowMetricsRefresher(
+            tracking_uri=os.environ.get('MLFLOW_TRACKING_URI'),
+            interval=float(os.environ.get('EMI_MLFLOW_REFRESH_INTERVAL', 30)),
+            timeout=float(os.environ.get('EMI_MLFLOW_TIMEOUT', 10)),
+            experiment_filter=os.environ.get('EMI_MLFLOW_EXPERIMENT_FILTER')
+        )
+    }
+
+
+def init_manager(**overrides) -> RealTimeDataManager:
+    """Build the shared manager now (loading models and starting its threads); idempotent"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = RealTimeDataManager(**dict(manager_settings(), **overrides))
+    return _manager
+
+
+def get_manager() -> RealTimeDataManager:
+    """Shared manager, built on first use"""
+    return _manager if _manager is not None else init_manager()
+
+
+def __getattr__(name):
+    # Keeps ``from real_time_manager import real_time_manager`` working without an import-time build
+    if name == 'real_time_manager':
+        return get_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,141 @@
+"""
+Recent Predictions for the Real-time Dashboard
+Fixed-capacity ring buffer of compact prediction records plus a per-second bucketed
+counter for the predictions-per-minute rate
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+
+
+class RecentPrediction:
+    """The fields the dashboard renders for one prediction, with a numeric timestamp"""
+
+    __slots__ = ('timestamp', 'model_type', 'prediction', 'formatted_amount', 'confidence', 'prediction_time',
+                 'sequence')
+
+    def __init__(self, timestamp: float, model_type: Optional[str], prediction: Optional[str],
+                 formatted_amount: Optional[str], confidence: Optional[float], prediction_time: Optional[float],
+                 sequence: int = 0):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.model_type = model_type
+        self.prediction = prediction
+        self.formatted_amount = formatted_amount
+        self.confidence = confidence
+        self.prediction_time = prediction_time
+
+    @classmethod
+    def from_result(cls, result: Dict, timestamp: Optional[float] = None, sequence: int = 0) -> 'RecentPrediction':
+        return cls(time.time() if timestamp is None else timestamp, result.get('model_type'),
+                   result.get('prediction'), result.get('formatted_amount'), result.get('confidence'),
+                   result.get('prediction_time'), sequence)
+
+    def to_dict(self) -> Dict:
+        """Serialized in the ``{'result': {...}, 'timestamp': iso}`` shape the dashboard reads"""
+        timestamp = datetime.fromtimestamp(self.timestamp).isoformat()
+        result = {'model_type': self.model_type, 'timestamp': timestamp, 'prediction_time': self.prediction_time}
+        if self.prediction is not None:
+            result['prediction'] = self.prediction
+        if self.formatted_amount is not None:
+            result['formatted_amount'] = self.formatted_amount
+        if self.confidence is not None:
+            result['confidence'] = self.confidence
+        return {'result': result, 'timestamp': timestamp, 'sequence': self.sequence}
+
+
+class RateCounter:
+    """Events per second in a ring of one-second buckets; counts over the last ``window`` seconds"""
+
+    def __init__(self, window: int = 60):
+        self.window = max(1, int(window))
+        self._seconds = [-1] * self.window
+        self._counts = [0] * self.window
+        self._lock = threading.Lock()
+
+    def increment(self, amount: int = 1, now: Optional[float] = None):
+        second = int(time.time() if now is None else now)
+        slot = second % self.window
+        with self._lock:
+            if self._seconds[slot] != second:
+                self._seconds[slot] = second
+                self._counts[slot] = 0
+            self._counts[slot] += amount
+
+    def count(self, now: Optional[float] = None) -> int:
+        """Events in the last ``window`` seconds, including the current one"""
+        oldest = int(time.time() if now is None else now) - self.window
+        with self._lock:
+            return sum(count for second, count in zip(self._seconds, self._counts) if second > oldest)
+
+
+class RecentPredictions:
+    """Ring buffer of the last ``capacity`` predictions; appends never copy or shift the buffer"""
+
+    def __init__(self, capacity: int = 1000, rate_window: int = 60):
+        self.capacity = max(1, int(capacity))
+        self._records = [None] * self.capacity
+        self._next = 0
+        self._size = 0
+        self._overwritten_sequence = 0
+        self._lock = threading.Lock()
+        self.rate = RateCounter(rate_window)
+
+    def add(self, result: Dict, sequence: int = 0) -> RecentPrediction:
+        record = RecentPrediction.from_result(result, sequence=sequence)
+        with self._lock:
+            if self._size == self.capacity:
+                self._overwritten_sequence = self._records[self._next].sequence
+            self._records[self._next] = record
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+        self.rate.increment(now=record.timestamp)
+        return record
+
+    def __len__(self) -> int:
+        return self._size
+
+    def latest(self, limit: Optional[int] = None) -> List[RecentPrediction]:
+        """Up to ``limit`` most recent records, oldest first"""
+        with self._lock:
+            count = self._size if limit is None else max(0, min(int(limit), self._size))
+            start = self._next - count
+            if start >= 0:
+                return self._records[start:self._next]
+            return self._records[start:] + self._records[:self._next]
+
+    def to_list(self, limit: Optional[int] = None, upto: Optional[int] = None) -> List[Dict]:
+        """Serialized records, oldest first; ``upto`` skips records newer than that sequence"""
+        records = self.latest(limit) if upto is None else self.between(0, upto, limit or self.capacity)[0]
+        return [record.to_dict() for record in records]
+
+    def between(self, after: int, upto: int, limit: int) -> Tuple[List[RecentPrediction], bool]:
+        """Up to ``limit`` newest records with ``after < sequence <= upto``, oldest first
+
+        The flag is False when older matching records were cut off by ``limit`` or already
+        overwritten, i.e. the caller cannot be sent a complete delta.
+        """
+        found = []
+        with self._lock:
+            index = self._next
+            for _ in range(self._size):
+                index = (index - 1) % self.capacity
+                record = self._records[index]
+                if record.sequence <= after:
+                    found.reverse()
+                    return found, True
+                if record.sequence > upto:
+                    continue
+                if len(found) >= limit:
+                    found.reverse()
+                    return found, False
+                found.append(record)
+            # Ran out of records: complete unless a matching record has been overwritten
+            complete = self._overwritten_sequence <= after
+        found.reverse()
+        return found, complete
+
+    def per_minute(self) -> int:
+        return self.rate.count()
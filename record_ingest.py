@@ -0,0 +1,141 @@
+"""
+Bulk Ingest for Financial Records
+Validates and coerces records in chunks, optionally scores the ones without predictions and
+inserts each chunk with executemany inside a single transaction
+"""
+
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import json
+import os
+import time
+
+from db import INGEST_COLUMNS, STATEMENTS, apply_to_summary
+
+INTEGER_COLUMNS = {'age', 'family_size', 'dependents'}
+REAL_COLUMNS = {
+    'monthly_salary', 'years_of_employment', 'monthly_rent', 'school_fees', 'college_fees',
+    'travel_expenses', 'groceries_utilities', 'other_monthly_expenses', 'current_emi_amount',
+    'credit_score', 'bank_balance', 'emergency_fund', 'requested_amount', 'requested_tenure',
+    'predicted_emi_amount', 'max_monthly_emi'
+}
+
+# Row errors kept in the returned stats; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def _real(value) -> Optional[float]:
+    if isinstance(value, str) and not value.strip():
+        return None
+    number = float(value)
+    return None if number != number else number
+
+
+def _integer(value) -> Optional[int]:
+    number = _real(value)
+    return None if number is None else int(number)
+
+
+def _text(value) -> Optional[str]:
+    return str(value).strip() or None
+
+
+# Per-column converters, resolved once rather than per value
+CONVERTERS = tuple((column, _integer if column in INTEGER_COLUMNS else _real if column in REAL_COLUMNS else _text)
+                   for column in INGEST_COLUMNS)
+
+
+def coerce_record(record) -> Tuple[Optional[Dict], Optional[str]]:
+    """Coerce one raw record (JSON or CSV strings) to column values; returns (row, error)"""
+    if not isinstance(record, dict):
+        return None, 'Record must be an object'
+    row = {}
+    for column, convert in CONVERTERS:
+        value = record.get(column)
+        if value is None or value == '':
+            row[column] = None
+            continue
+        try:
+            row[column] = convert(value)
+        except (TypeError, ValueError, OverflowError):
+            return None, f"{column} must be numeric, got {value!r}"
+    return row, None
+
+
+def score_missing(rows: List[Dict], predict_batch: Callable) -> int:
+    """Fill predicted_eligibility / predicted_emi_amount on rows without them; returns rows scored"""
+    pending = [row for row in rows if row['predicted_eligibility'] is None or row['predicted_emi_amount'] is None]
+    if not pending:
+        return 0
+    scored = 0
+    for row, result in zip(pending, predict_batch(pending)):
+        eligibility = result.get('eligibility') or {}
+        emi_amount = result.get('emi_amount') or {}
+        # Same display status ('Eligible' / 'Not Eligible' ...) the predict page saves, not the raw class label
+        if row['predicted_eligibility'] is None and 'eligibility_status' in eligibility:
+            row['predicted_eligibility'] = eligibility['eligibility_status']
+        if row['predicted_emi_amount'] is None and 'predicted_amount' in emi_amount:
+            row['predicted_emi_amount'] = emi_amount['predicted_amount']
+        scored += int('error' not in result)
+    return scored
+
+
+def ingest_records(conn, records: Iterable, chunk_size: int = 10000,
+                   predict_batch: Optional[Callable] = None) -> Dict:
+    """Insert records chunk by chunk (one transaction each), updating the dashboard summaries"""
+    start = time.perf_counter()
+    stats = {'received': 0, 'inserted': 0, 'rejected': 0, 'scored': 0, 'chunks': 0,
+             'first_record_id': None, 'last_record_id': None, 'errors': []}
+    iterator = iter(records)
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+
+        rows = []
+        for index, record in enumerate(chunk, start=stats['received']):
+            row, error = coerce_record(record)
+            if error is None:
+                rows.append(row)
+            else:
+                stats['rejected'] += 1
+                if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                    stats['errors'].append({'index': index, 'error': error})
+        stats['received'] += len(chunk)
+
+        if rows and predict_batch is not None:
+            stats['scored'] += score_missing(rows, predict_batch)
+
+        if rows:
+            with conn:
+                conn.executemany(STATEMENTS['insert_ingested_record'],
+                                 [[row[column] for column in INGEST_COLUMNS] for row in rows])
+                # Ids are contiguous within the transaction since SQLite has a single writer
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                apply_to_summary(conn, rows)
+            if stats['first_record_id'] is None:
+                stats['first_record_id'] = last_id - len(rows) + 1
+            stats['last_record_id'] = last_id
+            stats['inserted'] += len(rows)
+        stats['chunks'] += 1
+
+    stats['elapsed_seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['inserted'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] > 0 else 0.0
+    return stats
+
+
+def read_records_file(path: str) -> Iterator[Dict]:
+    """Stream records from a .csv file or a JSON-lines (.jsonl / .ndjson) file"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as handle:
+        if extension == '.csv':
+            yield from csv.DictReader(handle)
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported file type {extension}; expected .csv, .jsonl or .ndjson")
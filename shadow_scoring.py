@@ -0,0 +1,217 @@
+"""
+Shadow Scoring for EMI Risk Assessment
+Mirrors the inputs and outputs of live primary-model predictions into a bounded queue and scores
+them with a candidate model bundle in batches on a background thread, tracking how often and by
+how much the candidate disagrees
+"""
+
+from collections import deque
+from typing import Dict, Optional
+import queue
+import threading
+import time
+import numpy as np
+
+from metrics import metrics
+
+# Sentinel telling the scorer thread to exit
+_STOP = object()
+
+
+def _distribution(values) -> Dict:
+    """Mean and percentiles of a window of deltas"""
+    if not values:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+    data = np.fromiter(values, dtype=float, count=len(values))
+    p50, p95 = np.percentile(data, [50, 95])
+    return {'count': int(data.size), 'mean': round(float(data.mean()), 6), 'p50': round(float(p50), 6),
+            'p95': round(float(p95), 6), 'max': round(float(data.max()), 6)}
+
+
+class ShadowScorer:
+    """Background scorer for a candidate bundle; ``submit`` never blocks and drops work when behind"""
+
+    def __init__(self, candidate, max_pending_rows: int = 5000, batch_size: int = 256,
+                 flush_interval: float = 0.05, window: int = 5000):
+        self.candidate = candidate
+        self.max_pending_rows = max(1, int(max_pending_rows))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self._queue = queue.Queue()
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        # Set by stop(); a retired scorer accepts no work and never restarts its thread
+        self._stopped = False
+        self.started_at = time.time()
+        # Recent per-row deltas; agreement counts are lifetime
+        self._probability_deltas = deque(maxlen=window)
+        self._emi_deltas = deque(maxlen=window)
+        self._emi_delta_pcts = deque(maxlen=window)
+        self._stats = {'mirrored_rows': 0, 'scored_rows': 0, 'dropped_rows': 0, 'skipped_rows': 0,
+                       'failed_rows': 0, 'batches': 0, 'classification_compared': 0, 'classification_agreed': 0,
+                       'regression_compared': 0, 'regression_signed_delta_sum': 0.0, 'max_queue_wait': 0.0}
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.candidate.version
+
+    def start(self):
+        """Start the scorer thread (idempotent; no-op once stopped)"""
+        with self._lock:
+            if self._stopped:
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+                self._thread.start()
+
+    def submit(self, task: str, frame, rows, primary: np.ndarray) -> bool:
+        """Mirror one primary call: its encoded frame, the frame rows scored (None = all) and the outputs
+
+        Returns False when the scorer is stopped, the candidate cannot score ``task`` or the queue
+        is full; the primary request never waits on the shadow.
+        """
+        if self._stopped:
+            return False
+        count = len(primary)
+        if task not in self.candidate.models or task not in self.candidate.feature_encoders:
+            with self._lock:
+                self._stats['skipped_rows'] += count
+            return False
+        with self._lock:
+            if self._pending_rows + count > self.max_pending_rows:
+                self._stats['dropped_rows'] += count
+                return False
+            self._pending_rows += count
+            self._stats['mirrored_rows'] += count
+        self.start()
+        self._queue.put((task, frame, rows, primary, time.perf_counter()))
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP or self._stopped:
+                return
+            batch = [item]
+            rows = len(item[3])
+            deadline = time.perf_counter() + self.flush_interval
+            # Collect until the batch is full or the interval since the first item elapses
+            while rows < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP or self._stopped:
+                    return
+                batch.append(item)
+                rows += len(item[3])
+            self._score(batch)
+
+    def _score(self, batch):
+        start = time.perf_counter()
+        for task in ('classification', 'regression'):
+            items = [item for item in batch if item[0] == task]
+            if not items:
+                continue
+            count = sum(len(item[3]) for item in items)
+            try:
+                encoder = self.candidate.feature_encoders[task]
+                matrices = []
+                for _, frame, rows, _, _ in items:
+                    matrix = encoder.assemble(frame)
+                    matrices.append(matrix if rows is None else matrix[rows])
+                primary = np.concatenate([np.asarray(item[3], dtype=float) for item in items])
+                call_start = time.perf_counter()
+                candidate = np.asarray(self.candidate.score(task, np.vstack(matrices)), dtype=float)
+                metrics.observe('shadow_latency', time.perf_counter() - call_start, model=task)
+                if candidate.shape != primary.shape:
+                    raise ValueError(f"candidate output shape {candidate.shape} != primary {primary.shape}")
+                self._compare(task, primary, candidate)
+                outcome = 'scored_rows'
+            except Exception as e:
+                print(f"❌ Shadow scoring of {count} {task} rows failed: {e}")
+                outcome = 'failed_rows'
+            with self._lock:
+                self._stats[outcome] += count
+        with self._lock:
+            self._pending_rows -= sum(len(item[3]) for item in batch)
+            self._stats['batches'] += 1
+            self._stats['max_queue_wait'] = max(self._stats['max_queue_wait'], start - batch[0][4])
+
+    def _compare(self, task: str, primary: np.ndarray, candidate: np.ndarray):
+        if task == 'classification':
+            agreed = int(np.sum(np.argmax(primary, axis=1) == np.argmax(candidate, axis=1)))
+            # Largest per-class probability change for each row
+            deltas = np.max(np.abs(candidate - primary), axis=1)
+            with self._lock:
+                self._stats['classification_compared'] += len(primary)
+                self._stats['classification_agreed'] += agreed
+                self._probability_deltas.extend(deltas.tolist())
+        else:
+            signed = candidate - primary
+            pcts = np.abs(signed[primary != 0]) / np.abs(primary[primary != 0]) * 100
+            with self._lock:
+                self._stats['regression_compared'] += len(primary)
+                self._stats['regression_signed_delta_sum'] += float(signed.sum())
+                self._emi_deltas.extend(np.abs(signed).tolist())
+                self._emi_delta_pcts.extend(pcts.tolist())
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the scorer thread after the batch in progress; queued work is abandoned"""
+        with self._lock:
+            self._stopped = True
+        # Drop queued work now rather than behind the sentinel, releasing the frames it holds
+        abandoned = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                abandoned += len(item[3])
+        with self._lock:
+            self._pending_rows -= abandoned
+            self._stats['dropped_rows'] += abandoned
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Queue pressure, agreement rate, probability/EMI deltas and candidate latency"""
+        with self._lock:
+            stats = dict(self._stats)
+            probability_deltas = list(self._probability_deltas)
+            emi_deltas = list(self._emi_deltas)
+            emi_delta_pcts = list(self._emi_delta_pcts)
+            pending = self._pending_rows
+        batches = stats.pop('batches')
+        clf_compared = stats.pop('classification_compared')
+        clf_agreed = stats.pop('classification_agreed')
+        reg_compared = stats.pop('regression_compared')
+        signed_sum = stats.pop('regression_signed_delta_sum')
+        stats.update({
+            'candidate_version': self.version,
+            'started_at': self.started_at,
+            'pending_rows': pending,
+            'max_pending_rows': self.max_pending_rows,
+            'batches': batches,
+            'avg_batch_rows': (stats['scored_rows'] + stats['failed_rows']) / batches if batches else 0.0,
+            'max_queue_wait_ms': stats.pop('max_queue_wait') * 1000,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'classification': {
+                'compared': clf_compared,
+                'agreement_rate': clf_agreed / clf_compared if clf_compared else None,
+                'probability_delta': _distribution(probability_deltas)
+            },
+            'regression': {
+                'compared': reg_compared,
+                'mean_signed_emi_delta': signed_sum / reg_compared if reg_compared else None,
+                'emi_delta': _distribution(emi_deltas),
+                'emi_delta_pct': _distribution(emi_delta_pcts)
+            },
+            'latency': metrics.latency_summary('shadow_latency', 'model')
+        })
+        return stats
@@ -0,0 +1,63 @@
+"""
+Startup Benchmark for the EMI Risk Assessment App
+Measures, in fresh interpreters, how long importing the app takes and the time to the first
+page request and the first prediction request
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs inside each fresh interpreter and prints one JSON line of timings (milliseconds)
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app as application
+imported = time.perf_counter()
+if {eager}:
+    application.init_app()
+initialized = time.perf_counter()
+client = application.app.test_client()
+page = client.get('/')
+first_page = time.perf_counter()
+prediction = client.post('/api/predict_eligibility', json={{
+    'age': 35, 'monthly_salary': 75000, 'credit_score': 720, 'requested_amount': 500000, 'requested_tenure': 36
+}})
+first_prediction = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'init_ms': (initialized - imported) * 1000,
+    'first_page_ms': (first_page - start) * 1000,
+    'first_prediction_ms': (first_prediction - start) * 1000,
+    'page_status': page.status_code,
+    'prediction_status': prediction.status_code
+}}))
+"""
+
+
+def run_once(eager: bool) -> dict:
+    result = subprocess.run([sys.executable, '-c', PROBE.format(eager=eager)], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per mode')
+    parser.add_argument('--eager', action='store_true', help='call init_app() before the first request')
+    args = parser.parse_args()
+
+    runs = [run_once(args.eager) for _ in range(args.runs)]
+    print(f"Startup over {args.runs} runs ({'eager init_app()' if args.eager else 'lazy'}), median / max:")
+    for key in ('import_ms', 'init_ms', 'first_page_ms', 'first_prediction_ms'):
+        values = [run[key] for run in runs]
+        print(f"  {key:<20} {statistics.median(values):9.1f} ms  {max(values):9.1f} ms")
+    statuses = {(run['page_status'], run['prediction_status']) for run in runs}
+    print(f"  statuses (page, prediction): {sorted(statuses)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Tests for the micro-batching dispatcher's timeout fallback and partial-failure handling"""
+
+from concurrent.futures import Future
+import threading
+import time
+
+import pytest
+
+from micro_batching import MicroBatcher
+
+
+def test_stuck_lane_falls_back_to_direct_scoring():
+    release = threading.Event()
+    calls = []
+
+    def score(task, customers):
+        calls.append(threading.current_thread().name)
+        if threading.current_thread().name.startswith('micro-batch'):
+            release.wait(5)
+        return [{'id': customer['id']} for customer in customers]
+
+    batcher = MicroBatcher(score, timeout=0.05)
+    try:
+        first = batcher.submit('classification', {'id': 1})
+        assert batcher.predict('classification', {'id': 2}) == {'id': 2}
+        assert batcher.stats()['tasks']['classification']['timeouts'] == 1
+    finally:
+        release.set()
+    assert first.result(timeout=5) == {'id': 1}
+
+
+def test_failure_after_partial_results_resolves_every_future():
+    class FailingResults(list):
+        """Results whose iteration fails after the first customer"""
+
+        def __iter__(self):
+            yield from self[:1]
+            raise RuntimeError('scorer crashed')
+
+    def score(task, customers):
+        return FailingResults({'id': customer['id']} for customer in customers)
+
+    batcher = MicroBatcher(score)
+    lane = batcher._lanes['regression']
+    # Dispatch one batch of three on this thread, without starting the lane
+    futures = [Future() for _ in range(3)]
+    batcher._dispatch(lane, [({'id': i}, future, time.perf_counter()) for i, future in enumerate(futures)])
+
+    assert futures[0].result(timeout=1) == {'id': 0}
+    for future in futures[1:]:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+    assert lane.stats['failed_batches'] == 1
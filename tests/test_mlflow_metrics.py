@@ -0,0 +1,102 @@
+"""Tests for the background MLflow metrics refresher against a local file-based mlruns store"""
+
+import threading
+
+import pytest
+
+pytest.importorskip('mlflow')
+
+from mlflow.tracking import MlflowClient
+
+from mlflow_metrics import MlflowMetricsRefresher
+
+
+class ControlledClient:
+    """Real client whose experiment search can be made to hang or fail"""
+
+    def __init__(self, client):
+        self.client = client
+        self.mode = 'ok'
+        self.release = threading.Event()
+
+    def search_experiments(self, *args, **kwargs):
+        if self.mode == 'hang':
+            self.release.wait(10)
+        elif self.mode == 'fail':
+            raise ConnectionError('tracking server unavailable')
+        return self.client.search_experiments(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+@pytest.fixture
+def tracking_uri(tmp_path, monkeypatch):
+    monkeypatch.setenv('MLFLOW_ALLOW_FILE_STORE', 'true')
+    uri = (tmp_path / 'mlruns').as_uri()
+    client = MlflowClient(tracking_uri=uri)
+    experiment_id = client.create_experiment('emi-risk')
+    for start_time, accuracy, r2 in ((1_000, 0.91, 0.88), (2_000, 0.95, 0.93)):
+        run = client.create_run(experiment_id, start_time=start_time)
+        client.log_metric(run.info.run_id, 'accuracy', accuracy)
+        client.log_metric(run.info.run_id, 'r2', r2)
+        client.set_terminated(run.info.run_id, 'FINISHED')
+    return uri
+
+
+def newest_run_id(uri):
+    client = MlflowClient(tracking_uri=uri)
+    experiment = client.get_experiment_by_name('emi-risk')
+    return client.search_runs([experiment.experiment_id], order_by=['attributes.start_time DESC'])[0].info.run_id
+
+
+def test_refresh_picks_up_newest_run_metrics(tracking_uri):
+    refresher = MlflowMetricsRefresher(tracking_uri=tracking_uri, timeout=30)
+
+    snapshot = refresher.refresh()
+
+    assert snapshot['status'] == 'ok'
+    assert snapshot['metrics']['classification_accuracy'] == pytest.approx(0.95)
+    assert snapshot['metrics']['regression_r2'] == pytest.approx(0.93)
+    assert snapshot['runs']['classification_accuracy'] == newest_run_id(tracking_uri)
+    assert snapshot['version'] == 1
+    assert refresher.metrics()['classification_accuracy'] == pytest.approx(0.95)
+
+
+def test_timeout_keeps_previous_snapshot(tracking_uri):
+    client = ControlledClient(MlflowClient(tracking_uri=tracking_uri))
+    refresher = MlflowMetricsRefresher(timeout=0.5, client_factory=lambda: client)
+    good = refresher.refresh()
+
+    client.mode = 'hang'
+    try:
+        snapshot = refresher.refresh()
+        assert snapshot['status'] == 'error'
+        assert 'timed out' in snapshot['last_error']
+        assert snapshot['consecutive_failures'] == 1
+        assert dict(snapshot['metrics']) == dict(good['metrics'])
+        assert snapshot['version'] == good['version']
+        assert snapshot['last_updated'] == good['last_updated']
+    finally:
+        client.release.set()
+
+
+def test_failures_back_off_and_keep_previous_snapshot(tracking_uri):
+    client = ControlledClient(MlflowClient(tracking_uri=tracking_uri))
+    refresher = MlflowMetricsRefresher(timeout=30, client_factory=lambda: client)
+    good = refresher.refresh()
+
+    client.mode = 'fail'
+    for failures in (1, 2):
+        snapshot = refresher.refresh()
+        assert snapshot['status'] == 'error'
+        assert snapshot['consecutive_failures'] == failures
+        assert dict(snapshot['metrics']) == dict(good['metrics'])
+        assert refresher.metrics()['classification_accuracy'] == pytest.approx(0.95)
+
+    client.mode = 'ok'
+    recovered = refresher.refresh()
+    assert recovered['status'] == 'ok'
+    assert recovered['consecutive_failures'] == 0
+    # Same metrics as before the outage, so pollers see no change
+    assert recovered['version'] == good['version']
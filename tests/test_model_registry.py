@@ -0,0 +1,49 @@
+"""Tests for the process-wide model registry's lifetime and fork handling"""
+
+import gc
+import os
+import pickle
+import weakref
+
+import pytest
+
+import model_registry
+from model_registry import discard_registry, get_registry
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    with open(tmp_path / 'feature_names.pkl', 'wb') as f:
+        pickle.dump({'classification': ['credit_score'], 'regression': ['credit_score']}, f)
+    return str(tmp_path)
+
+
+def test_discarded_registry_is_freed(model_dir):
+    registry = get_registry(model_dir)
+    registry.load()
+    assert registry.get('feature_names')['classification'] == ['credit_score']
+    assert get_registry(model_dir) is registry
+
+    ref = weakref.ref(registry)
+    del registry
+    discard_registry(model_dir)
+    gc.collect()
+
+    assert ref() is None
+    assert all(r.model_path != model_dir for r in model_registry._live_registries)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+def test_registry_lock_is_reset_in_forked_child(model_dir):
+    registry = get_registry(model_dir)
+    try:
+        with registry._lock:
+            pid = os.fork()
+            if pid == 0:
+                # A lock inherited in the held state would make this acquire time out
+                acquired = registry._lock.acquire(timeout=1)
+                os._exit(0 if acquired else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+    finally:
+        discard_registry(model_dir)
@@ -0,0 +1,75 @@
+"""Tests for the shadow scorer's shutdown: stopped scorers take no work and abandon their queue"""
+
+import threading
+import time
+
+import numpy as np
+
+from shadow_scoring import ShadowScorer
+
+
+class IdentityEncoder:
+    def assemble(self, frame):
+        return np.asarray(frame, dtype=float)
+
+
+class BlockingCandidate:
+    """Candidate echoing its input; scoring waits until ``release`` is set"""
+
+    version = 'candidate'
+    path = 'models/versions/candidate'
+
+    def __init__(self):
+        self.models = {'regression': object()}
+        self.feature_encoders = {'regression': IdentityEncoder()}
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.scored_batches = 0
+
+    def score(self, task, matrix):
+        self.entered.set()
+        self.release.wait(5)
+        self.scored_batches += 1
+        return matrix[:, 0]
+
+
+def mirror(scorer, rows=1):
+    frame = np.ones((rows, 1))
+    return scorer.submit('regression', frame, None, np.ones(rows))
+
+
+def test_submit_after_stop_is_a_noop():
+    candidate = BlockingCandidate()
+    candidate.release.set()
+    scorer = ShadowScorer(candidate, flush_interval=0.0)
+    assert mirror(scorer)
+    scorer.stop()
+    assert not scorer._thread.is_alive()
+
+    assert not mirror(scorer)
+    assert not scorer._thread.is_alive()
+    assert scorer.stats()['mirrored_rows'] == 1
+
+
+def test_stop_abandons_queued_work():
+    candidate = BlockingCandidate()
+    scorer = ShadowScorer(candidate, batch_size=1, flush_interval=0.0)
+    assert mirror(scorer)
+    assert candidate.entered.wait(5)
+    for _ in range(3):
+        assert mirror(scorer)
+
+    stopper = threading.Thread(target=scorer.stop)
+    stopper.start()
+    # Let the batch in progress finish only once stop() has emptied the queue
+    while stopper.is_alive() and scorer._queue.qsize() > 1:
+        time.sleep(0.001)
+    candidate.release.set()
+    stopper.join(5)
+
+    stats = scorer.stats()
+    assert not stats['running']
+    assert candidate.scored_batches == 1
+    assert stats['scored_rows'] == 1
+    assert stats['dropped_rows'] == 3
+    assert stats['pending_rows'] == 0
@@ -0,0 +1,162 @@
+"""
+Write-behind Queue for Saved Records
+Buffers inserts in a bounded in-process queue and writes them from a single thread in group
+commits, so request threads never wait on an SQLite fsync
+"""
+
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional
+import itertools
+import queue
+import threading
+import time
+
+from db import RECORD_COLUMNS, STATEMENTS, apply_to_summary
+
+# Sentinel telling the writer thread to drain and exit
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Single-writer group-commit queue; ``submit`` returns a ticket resolved once the row is written"""
+
+    def __init__(self, pool, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 0.05,
+                 max_tickets: int = 100000):
+        self.pool = pool
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_tickets = int(max_tickets)
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._tickets = OrderedDict()
+        self._ticket_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {'enqueued': 0, 'written': 0, 'failed': 0, 'rejected': 0, 'flushes': 0,
+                       'total_flush_time': 0.0, 'max_flush_time': 0.0, 'max_queue_wait': 0.0,
+                       'last_flush_at': None}
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+
+    def submit(self, record: Mapping) -> Optional[int]:
+        """Queue one record; returns its ticket, or None when the queue is full"""
+        self.start()
+        ticket = next(self._ticket_ids)
+        values = [record.get(column) for column in RECORD_COLUMNS]
+        # Registered before the put: the writer may flush the record before put_nowait returns
+        with self._lock:
+            self._remember(ticket, {'status': 'queued'})
+        try:
+            self._queue.put_nowait((ticket, values, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self._tickets.pop(ticket, None)
+                self._stats['rejected'] += 1
+            return None
+        with self._lock:
+            self._stats['enqueued'] += 1
+        return ticket
+
+    def status(self, ticket: int) -> Dict:
+        """Current state of a ticket: queued, written (with record_id), failed or unknown"""
+        with self._lock:
+            return dict(self._tickets.get(ticket, {'status': 'unknown'}), ticket=ticket)
+
+    def _remember(self, ticket: int, state: Dict):
+        self._tickets[ticket] = state
+        self._tickets.move_to_end(ticket)
+        while len(self._tickets) > self.max_tickets:
+            self._tickets.popitem(last=False)
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            deadline = time.perf_counter() + self.flush_interval
+            # Group commit: collect until the batch is full or the interval since the first item elapses
+            while True:
+                if item is _STOP:
+                    running = False
+                    self._queue.task_done()
+                else:
+                    batch.append(item)
+                if not running or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        try:
+            with self.pool.connection() as conn:
+                with conn:
+                    conn.executemany(STATEMENTS['insert_record'], [values for _, values, _ in batch])
+                    # Ids are contiguous within the transaction since SQLite has a single writer
+                    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    # Summarize exactly what was inserted, not fields of the payload that were never persisted
+                    apply_to_summary(conn, [dict(zip(RECORD_COLUMNS, values)) for _, values, _ in batch])
+            states = [{'status': 'written', 'record_id': last_id - len(batch) + 1 + i} for i in range(len(batch))]
+            failed = 0
+        except Exception as e:
+            print(f"❌ Write-behind flush of {len(batch)} records failed: {e}")
+            states = [{'status': 'failed', 'error': str(e)}] * len(batch)
+            failed = len(batch)
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            for (ticket, _, _), state in zip(batch, states):
+                self._remember(ticket, state)
+            self._stats['written'] += len(batch) - failed
+            self._stats['failed'] += failed
+            self._stats['flushes'] += 1
+            self._stats['total_flush_time'] += elapsed
+            self._stats['max_flush_time'] = max(self._stats['max_flush_time'], elapsed)
+            self._stats['max_queue_wait'] = max(self._stats['max_queue_wait'], start - batch[0][2])
+            self._stats['last_flush_at'] = time.time()
+        for _ in batch:
+            self._queue.task_done()
+
+    def flush(self):
+        """Block until everything queued so far has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self, timeout: float = 30.0):
+        """Write out the remaining records and stop the writer thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput and group-commit latency"""
+        with self._lock:
+            stats = dict(self._stats)
+        flushes = stats.pop('flushes')
+        total_flush_time = stats.pop('total_flush_time')
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'batch_size': self.batch_size,
+            'flush_interval_ms': self.flush_interval * 1000,
+            'flushes': flushes,
+            'avg_batch_size': (stats['written'] + stats['failed']) / flushes if flushes else 0.0,
+            'avg_flush_ms': total_flush_time / flushes * 1000 if flushes else 0.0,
+            'max_flush_ms': stats.pop('max_flush_time') * 1000,
+            'max_queue_wait_ms': stats.pop('max_queue_wait') * 1000,
+            'running': self._thread is not None and self._thread.is_alive()
+        })
+        return stats